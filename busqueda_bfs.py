@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - BÚSQUEDA EN EL ESPACIO DE ESTADOS (BFS)
+Motor de validación independiente del álgebra lineal
+
+Recorre los estados (tableros empaquetados) por capas, sin suponer que el
+problema sea lineal, por lo que sirve para reglas propias:
+- Celdas prohibidas (no se pueden presionar)
+- Máscaras de efecto arbitrarias por celda
+- Costos enteros por presión (búsqueda por niveles de costo, algoritmo de Dial)
+
+El conjunto de visitados es un arreglo de bits indexado por el estado
+(2^N bits, 4 MB para 5×5). Cada capa se expande con operaciones de NumPy y
+los movimientos se reparten entre varios hilos.
+
+Con esto se confirma, para todos los tableros hasta 5×5, que la solución de
+la factorización minimizada con el núcleo da el mínimo real de presiones.
+resolver_lights_out (gauss_mod2 con listas) es mucho más lento: el ejemplo
+lo comprueba en todos los tableros hasta 4×4 y en 5×5 solo en una muestra
+de cada capa.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from motor_vectorizado import factorizacion, minimizar_con_nucleo, tabla_lineal
+from operador_implicito import producto_A
+
+MAX_BITS = 30
+
+
+class ReglasLightsOut:
+    """
+    Movimientos permitidos para la búsqueda.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño del tablero (n² ≤ 30 para poder indexar los visitados)
+    prohibidas : Iterable[int]
+        Índices i·n + j de celdas que no se pueden presionar
+    costos : Optional[Sequence[int]]
+        Costo entero ≥ 1 de presionar cada celda (por defecto 1)
+    mascaras : Optional[Sequence[int]]
+        Efecto de presionar cada celda (por defecto la regla clásica)
+    """
+
+    def __init__(self, n: int, prohibidas: Iterable[int] = (), costos: Optional[Sequence[int]] = None,
+                 mascaras: Optional[Sequence[int]] = None):
+        N = n * n
+        if N > MAX_BITS:
+            raise ValueError(f"La búsqueda exhaustiva admite como máximo {MAX_BITS} luces")
+        prohibidas = set(prohibidas)
+        if mascaras is None:
+            mascaras = [producto_A(1 << k, n) for k in range(N)]
+        if costos is None:
+            costos = [1] * N
+        if min(costos) < 1:
+            raise ValueError("Los costos deben ser enteros ≥ 1")
+
+        self.n = n
+        self.bits = N
+        self.celdas = [k for k in range(N) if k not in prohibidas]
+        self.mascaras = [int(mascaras[k]) for k in self.celdas]
+        self.costos = [int(costos[k]) for k in self.celdas]
+
+    @property
+    def costo_unitario(self) -> bool:
+        return all(c == 1 for c in self.costos)
+
+
+def _unicos(estados: np.ndarray) -> np.ndarray:
+    """Estados ordenados y sin repetir (ordenar + comparar vecinos es mucho más rápido que np.unique)."""
+    estados = np.sort(estados)
+    if len(estados) < 2:
+        return estados
+    return estados[np.concatenate(([True], estados[1:] != estados[:-1]))]
+
+
+class _Visitados:
+    """Arreglo de bits con un bit por estado posible."""
+
+    def __init__(self, bits: int):
+        self.datos = np.zeros(max(1, (1 << bits) >> 3), dtype=np.uint8)
+
+    def contiene(self, estados: np.ndarray) -> np.ndarray:
+        return (self.datos[estados >> 3] >> (estados & 7).astype(np.uint8)) & 1 == 1
+
+    def marcar(self, estados: np.ndarray):
+        """Marca estados (ordenados): los bits de un mismo byte se combinan antes de escribir."""
+        if not len(estados):
+            return
+        bytes_estado = estados >> 3
+        inicios = np.flatnonzero(np.concatenate(([True], bytes_estado[1:] != bytes_estado[:-1])))
+        bits = (1 << (estados & 7)).astype(np.uint8)
+        self.datos[bytes_estado[inicios]] |= np.bitwise_or.reduceat(bits, inicios)
+
+
+def _expandir(frontera: np.ndarray, mascaras: List[int], visitados: _Visitados,
+              ejecutor: Optional[ThreadPoolExecutor]) -> List[np.ndarray]:
+    """Vecinos no visitados de la frontera, uno por movimiento (en paralelo si hay hilos)."""
+    def vecinos(mascara: int) -> np.ndarray:
+        candidatos = frontera ^ np.uint32(mascara)
+        return candidatos[~visitados.contiene(candidatos)]
+
+    if ejecutor is None:
+        return [vecinos(m) for m in mascaras]
+    return list(ejecutor.map(vecinos, mascaras))
+
+
+def recorrer_por_capas(reglas: ReglasLightsOut, origen: int = 0,
+                       hilos: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Recorre todos los estados alcanzables desde origen, por costo creciente.
+
+    Retorna:
+    --------
+    Iterator[Tuple[int, np.ndarray]]
+        (costo, estados ordenados con ese costo mínimo), capa por capa
+    """
+    visitados = _Visitados(reglas.bits)
+    cubetas: Dict[int, List[np.ndarray]] = {0: [np.array([origen], dtype=np.uint32)]}
+    ejecutor = ThreadPoolExecutor(hilos) if hilos > 1 else None
+    try:
+        costo = 0
+        while cubetas:
+            if costo not in cubetas:
+                costo += 1
+                continue
+            capa = _unicos(np.concatenate(cubetas.pop(costo)))
+            capa = capa[~visitados.contiene(capa)]
+            if len(capa):
+                visitados.marcar(capa)
+                yield costo, capa
+                por_movimiento = _expandir(capa, reglas.mascaras, visitados, ejecutor)
+                for vecinos, c in zip(por_movimiento, reglas.costos):
+                    if len(vecinos):
+                        cubetas.setdefault(costo + c, []).append(vecinos)
+            costo += 1
+    finally:
+        if ejecutor:
+            ejecutor.shutdown()
+
+
+def busqueda_bidireccional(inicial: int, reglas: ReglasLightsOut, objetivo: int = 0,
+                           hilos: int = 1) -> Optional[List[int]]:
+    """
+    Camino más corto entre dos estados con BFS desde ambos extremos.
+
+    Requiere costo unitario; como cada movimiento es un XOR, es su propio
+    inverso y el lado del objetivo usa los mismos movimientos.
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Celdas a presionar (índices i·n + j) o None si el objetivo no es alcanzable
+    """
+    if not reglas.costo_unitario:
+        raise ValueError("La búsqueda bidireccional requiere costo unitario")
+    if inicial == objetivo:
+        return []
+
+    lados = []
+    for origen in (inicial, objetivo):
+        visitados = _Visitados(reglas.bits)
+        capa = np.array([origen], dtype=np.uint32)
+        visitados.marcar(capa)
+        lados.append({"visitados": visitados, "capas": [capa]})
+
+    ejecutor = ThreadPoolExecutor(hilos) if hilos > 1 else None
+    try:
+        while all(len(lado["capas"][-1]) for lado in lados):
+            # Expandir el lado con la frontera más chica
+            indice = 0 if len(lados[0]["capas"][-1]) <= len(lados[1]["capas"][-1]) else 1
+            lado, otro = lados[indice], lados[1 - indice]
+            vecinos = _expandir(lado["capas"][-1], reglas.mascaras, lado["visitados"], ejecutor)
+            capa = _unicos(np.concatenate(vecinos))
+            lado["visitados"].marcar(capa)
+            lado["capas"].append(capa)
+
+            encuentro = capa[otro["visitados"].contiene(capa)]
+            if len(encuentro):
+                estado = int(encuentro[0])
+                camino = _reconstruir(lados[0]["capas"], estado, reglas)
+                camino += _reconstruir(lados[1]["capas"], estado, reglas)
+                return camino
+    finally:
+        if ejecutor:
+            ejecutor.shutdown()
+    return None
+
+
+def _reconstruir(capas: List[np.ndarray], estado: int, reglas: ReglasLightsOut) -> List[int]:
+    """Movimientos que llevan del origen de las capas hasta estado."""
+    # Ubicar la capa del estado (puede no ser la última del lado)
+    nivel = next(k for k, capa in enumerate(capas) if _pertenece(capa, estado))
+    camino = []
+    for k in range(nivel, 0, -1):
+        for celda, mascara in zip(reglas.celdas, reglas.mascaras):
+            anterior = estado ^ mascara
+            if _pertenece(capas[k - 1], anterior):
+                camino.append(celda)
+                estado = anterior
+                break
+    return camino
+
+
+def _pertenece(capa: np.ndarray, estado: int) -> bool:
+    posicion = np.searchsorted(capa, estado)
+    return bool(posicion < len(capa) and capa[posicion] == estado)
+
+
+# ===================================================================
+# VALIDACIÓN DEL SOLVER ALGEBRAICO
+# ===================================================================
+
+def validar_minimos(n: int, hilos: int = 1, muestras_por_capa: Optional[int] = 20,
+                    semilla: int = 0) -> Tuple[bool, int]:
+    """
+    Compara la distancia BFS de cada tablero con la solución algebraica mínima.
+
+    Para todos los tableros alcanzables se calcula P·b (tablas lineales) y se
+    minimiza con el núcleo. resolver_lights_out (gauss_mod2 con listas) se usa
+    como solución particular solo en muestras_por_capa tableros al azar de
+    cada capa, o en todos si muestras_por_capa es None.
+
+    Retorna:
+    --------
+    Tuple[bool, int]
+        (todos coinciden, cantidad de tableros comprobados)
+    """
+    from resolver_lights_out import resolver_lights_out
+
+    N = n * n
+    f = factorizacion(n)
+    columnas = [sum(((fila >> k) & 1) << r for r, fila in enumerate(f.filas_inversa)) for k in range(N)]
+    bajos = N // 2
+    tabla_baja = tabla_lineal(columnas[:bajos], bajos, np.uint32)
+    tabla_alta = tabla_lineal(columnas[bajos:], N - bajos, np.uint32)
+    generador = np.random.default_rng(semilla)
+
+    comprobados = 0
+    for costo, capa in recorrer_por_capas(ReglasLightsOut(n), 0, hilos):
+        soluciones = tabla_baja[capa & np.uint32((1 << bajos) - 1)] ^ tabla_alta[capa >> np.uint32(bajos)]
+        _, pesos = minimizar_con_nucleo(soluciones, f.nucleo)
+        if (pesos != costo).any():
+            return False, comprobados
+
+        if muestras_por_capa is not None and muestras_por_capa < len(capa):
+            capa_gauss = generador.choice(capa, size=muestras_por_capa, replace=False)
+        else:
+            capa_gauss = capa
+        for b in capa_gauss:
+            tablero = [[(int(b) >> (i * n + j)) & 1 for j in range(n)] for i in range(n)]
+            x = sum(bit << k for k, bit in enumerate(resolver_lights_out(tablero)))
+            _, peso = minimizar_con_nucleo(np.array([x], dtype=np.uint32), f.nucleo)
+            if peso[0] != costo:
+                return False, comprobados
+        comprobados += len(capa)
+
+    # Deben haberse alcanzado exactamente los 2^rango tableros resolubles
+    return comprobados == 1 << (N - f.nulidad), comprobados
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import time
+
+    print("=" * 60)
+    print("LIGHTS OUT - VALIDACIÓN POR BÚSQUEDA EN ANCHURA")
+    print("=" * 60)
+    print()
+
+    # resolver_lights_out se comprueba en todos los tableros hasta 4×4 y por muestreo en 5×5
+    for n in range(1, 6):
+        inicio = time.perf_counter()
+        muestras = None if n <= 4 else 20
+        correcto, total = validar_minimos(n, hilos=4, muestras_por_capa=muestras)
+        gauss = "todos" if muestras is None else f"{muestras} por capa"
+        print(f"{n}×{n}: {total} tableros resolubles (gauss_mod2: {gauss}), mínimos "
+              f"{'CORRECTOS' if correcto else 'INCORRECTOS'} ({time.perf_counter() - inicio:.2f} s)")
+
+    # Regla propia: 4×4 con las esquinas prohibidas
+    reglas = ReglasLightsOut(4, prohibidas=[0, 3, 12, 15])
+    tablero = producto_A(0b0000_0110_0110_0000, 4)
+    camino = busqueda_bidireccional(tablero, reglas)
+    print(f"\n4×4 sin esquinas: presionar {camino}")
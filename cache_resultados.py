@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - CACHÉ DE RESULTADOS
+Memoización acotada delante de resolver_lights_out
+
+La clave es (n, tablero empaquetado en un entero), reducido a su forma
+canónica bajo las 8 simetrías del cuadrado (ver simetrias.py): los
+tableros rotados o reflejados comparten una entrada y la solución se
+transforma al devolverla. Se ofrecen dos niveles:
+- Caché local en memoria con expulsión LRU y vencimiento opcional (TTL)
+- Tabla compartida opcional en un archivo mapeado en memoria, para que
+  varios procesos reutilicen las soluciones calculadas por los demás
+
+Los tableros sin solución también se guardan (como SIN_SOLUCION), para no
+volver a resolverlos. Las estadísticas (aciertos, fallos, expulsiones)
+permiten ver la tasa de aciertos en producción.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from operador_implicito import bits_a_vector, empaquetar_tablero, vector_a_bits
+from simetrias import canonizar, descanonizar, transformar
+
+try:
+    import fcntl
+except ImportError:  # Windows: las escrituras solo se serializan dentro del proceso
+    fcntl = None
+
+# Valor guardado para los tableros que no tienen solución
+SIN_SOLUCION = -1
+
+
+# ===================================================================
+# TABLA COMPARTIDA ENTRE PROCESOS
+# ===================================================================
+
+class TablaCompartida:
+    """
+    Tabla hash de tamaño fijo en un archivo mapeado en memoria.
+
+    El archivo empieza con un encabezado (firma, n, ranuras) que se
+    comprueba al abrirlo: una tabla creada para otro tamaño se rechaza en
+    lugar de leerse mal. Cada ranura guarda (secuencia, estado, marca de
+    tiempo, tablero, solución) con ancho fijo para tableros n×n; el estado
+    distingue vacía, con solución y sin solución. Las lecturas no toman
+    candados: usan la secuencia de la ranura (impar mientras se escribe) para
+    descartar lecturas a medias. Las escrituras se serializan con flock
+    (donde exista).
+
+    Parámetros:
+    -----------
+    ruta : str
+        Archivo de la tabla (se crea si no existe)
+    n : int
+        Tamaño de los tableros guardados
+    ranuras : int
+        Cantidad de ranuras (capacidad máxima)
+    sondeos : int
+        Ranuras consecutivas que se revisan por clave
+    """
+
+    _ENCABEZADO = struct.Struct("<8sII")  # firma, n, ranuras
+    _FIRMA = b"LOTABLA1"
+    _CABECERA = struct.Struct("<IId")  # secuencia, estado, marca de tiempo
+    _VACIA, _CON_SOLUCION, _SIN_SOLUCION = 0, 1, 2
+
+    def __init__(self, ruta: str, n: int, ranuras: int = 1 << 16, sondeos: int = 8):
+        self.n = n
+        self.ranuras = ranuras
+        self.sondeos = sondeos
+        self.bytes_vector = (n * n + 7) // 8
+        self.ancho = self._CABECERA.size + 2 * self.bytes_vector
+        tamano = self._ENCABEZADO.size + self.ancho * ranuras
+
+        self._descriptor = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._mapa = self._mapear(ruta, tamano)
+        except Exception:
+            os.close(self._descriptor)
+            raise
+        self._candado = threading.Lock()
+
+    def _mapear(self, ruta: str, tamano: int) -> mmap.mmap:
+        """Comprueba (o escribe) el encabezado y mapea el archivo."""
+        encabezado = self._ENCABEZADO.pack(self._FIRMA, self.n, self.ranuras)
+        if fcntl:
+            fcntl.flock(self._descriptor, fcntl.LOCK_EX)
+        try:
+            existente = os.read(self._descriptor, self._ENCABEZADO.size)
+            if existente.strip(b"\0") and existente != encabezado:
+                if len(existente) < self._ENCABEZADO.size or not existente.startswith(self._FIRMA):
+                    raise ValueError(f"{ruta} no es una tabla de soluciones")
+                _, n, ranuras = self._ENCABEZADO.unpack(existente)
+                raise ValueError(f"{ruta} guarda tableros {n}×{n} en {ranuras} ranuras, "
+                                 f"no {self.n}×{self.n} en {self.ranuras}")
+            if os.fstat(self._descriptor).st_size < tamano:
+                os.ftruncate(self._descriptor, tamano)
+            mapa = mmap.mmap(self._descriptor, tamano)
+            mapa[:self._ENCABEZADO.size] = encabezado
+            return mapa
+        finally:
+            if fcntl:
+                fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+
+    def _inicio(self, clave: int) -> int:
+        resumen = hashlib.blake2b(clave.to_bytes(self.bytes_vector, "little"), digest_size=8).digest()
+        return int.from_bytes(resumen, "little") % self.ranuras
+
+    def _leer_ranura(self, indice: int) -> Optional[Tuple[float, int, int]]:
+        desplazamiento = self._ENCABEZADO.size + indice * self.ancho
+        for _ in range(4):
+            secuencia, estado, marca = self._CABECERA.unpack_from(self._mapa, desplazamiento)
+            if secuencia & 1:
+                continue
+            inicio = desplazamiento + self._CABECERA.size
+            datos = self._mapa[inicio:inicio + 2 * self.bytes_vector]
+            if self._CABECERA.unpack_from(self._mapa, desplazamiento)[0] != secuencia:
+                continue
+            if estado == self._VACIA:
+                return None
+            clave = int.from_bytes(datos[:self.bytes_vector], "little")
+            if estado == self._SIN_SOLUCION:
+                return marca, clave, SIN_SOLUCION
+            solucion = int.from_bytes(datos[self.bytes_vector:], "little")
+            return marca, clave, solucion
+        return None
+
+    def obtener(self, clave: int, ttl: Optional[float] = None) -> Optional[int]:
+        """Solución guardada para el tablero clave (o SIN_SOLUCION), o None."""
+        inicio = self._inicio(clave)
+        for k in range(self.sondeos):
+            ranura = self._leer_ranura((inicio + k) % self.ranuras)
+            if ranura is None:
+                return None
+            marca, clave_guardada, solucion = ranura
+            if clave_guardada == clave:
+                if ttl is not None and time.time() - marca > ttl:
+                    return None
+                return solucion
+        return None
+
+    def guardar(self, clave: int, solucion: int):
+        """Guarda la solución o SIN_SOLUCION (reemplaza la ranura más antigua si no hay lugar)."""
+        inicio = self._inicio(clave)
+        self._candado.acquire()
+        if fcntl:
+            fcntl.flock(self._descriptor, fcntl.LOCK_EX)
+        try:
+            destino = None
+            marca_mas_antigua = None
+            for k in range(self.sondeos):
+                indice = (inicio + k) % self.ranuras
+                ranura = self._leer_ranura(indice)
+                if ranura is None or ranura[1] == clave:
+                    destino = indice
+                    break
+                if marca_mas_antigua is None or ranura[0] < marca_mas_antigua:
+                    destino, marca_mas_antigua = indice, ranura[0]
+
+            estado = self._SIN_SOLUCION if solucion == SIN_SOLUCION else self._CON_SOLUCION
+            desplazamiento = self._ENCABEZADO.size + destino * self.ancho
+            secuencia = self._CABECERA.unpack_from(self._mapa, desplazamiento)[0]
+            struct.pack_into("<I", self._mapa, desplazamiento, secuencia + 1)
+            inicio_datos = desplazamiento + self._CABECERA.size
+            self._mapa[inicio_datos:inicio_datos + 2 * self.bytes_vector] = (
+                clave.to_bytes(self.bytes_vector, "little")
+                + max(solucion, 0).to_bytes(self.bytes_vector, "little")
+            )
+            self._CABECERA.pack_into(self._mapa, desplazamiento, secuencia + 2, estado, time.time())
+        finally:
+            if fcntl:
+                fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+            self._candado.release()
+
+    def cerrar(self):
+        """Libera el mapa y el descriptor del archivo."""
+        self._mapa.close()
+        os.close(self._descriptor)
+
+
+# ===================================================================
+# CACHÉ LOCAL LRU / TTL
+# ===================================================================
+
+# Más allá de este tamaño canonizar cuesta casi lo mismo que resolver
+TAMANO_MAXIMO_SIMETRIAS = 64
+
+class CacheResultados:
+    """
+    Caché acotada de soluciones delante de un resolvedor.
+
+    Parámetros:
+    -----------
+    capacidad : int
+        Máximo de tableros en la caché local (expulsión LRU)
+    ttl : Optional[float]
+        Segundos de validez de cada entrada (None = sin vencimiento)
+    resolver : Optional[Callable]
+        Función matriz → vector solución, o None si no hay solución (por
+        defecto resolver_lights_out)
+    simetrias : bool
+        Guardar una sola entrada por clase de tableros simétricos
+    """
+
+    def __init__(self, capacidad: int = 4096, ttl: Optional[float] = None,
+                 resolver: Optional[Callable[[List[List[int]]], Optional[List[int]]]] = None,
+                 simetrias: bool = True):
+        if resolver is None:
+            from resolver_lights_out import resolver_lights_out as resolver
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.simetrias = simetrias
+        self._resolver = resolver
+        self._entradas: "OrderedDict[Tuple[int, int], Tuple[float, int]]" = OrderedDict()
+        self._tablas: Dict[int, TablaCompartida] = {}
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_compartidos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.vencidas = 0
+
+    def compartir(self, n: int, ruta: str, ranuras: int = 1 << 16):
+        """Activa la tabla compartida (archivo mapeado) para tableros n×n."""
+        self._tablas[n] = TablaCompartida(ruta, n, ranuras)
+
+    def _canonizar(self, n: int, clave: int) -> Tuple[int, int]:
+        """(clave canónica, simetría que lleva la clave a ella)."""
+        if self.simetrias and n <= TAMANO_MAXIMO_SIMETRIAS:
+            return canonizar(clave, n)
+        return clave, 0
+
+    def obtener(self, n: int, clave: int) -> Optional[int]:
+        """Solución empaquetada en caché para (n, clave) (o SIN_SOLUCION), o None."""
+        canonica, simetria = self._canonizar(n, clave)
+        solucion = self._obtener_canonica(n, canonica)
+        if solucion is None or solucion == SIN_SOLUCION or simetria == 0:
+            return solucion
+        return descanonizar(solucion, n, simetria)
+
+    def _obtener_canonica(self, n: int, clave: int) -> Optional[int]:
+        with self._candado:
+            entrada = self._entradas.get((n, clave))
+            if entrada is not None:
+                marca, solucion = entrada
+                if self.ttl is None or time.monotonic() - marca <= self.ttl:
+                    self._entradas.move_to_end((n, clave))
+                    self.aciertos += 1
+                    return solucion
+                del self._entradas[(n, clave)]
+                self.vencidas += 1
+
+        tabla = self._tablas.get(n)
+        if tabla is not None:
+            solucion = tabla.obtener(clave, self.ttl)
+            if solucion is not None:
+                with self._candado:
+                    self.aciertos_compartidos += 1
+                self._guardar_local(n, clave, solucion)
+                return solucion
+        return None
+
+    def guardar(self, n: int, clave: int, solucion: int):
+        """Guarda la solución empaquetada (o SIN_SOLUCION) en la caché local y en la compartida."""
+        canonica, simetria = self._canonizar(n, clave)
+        if simetria and solucion != SIN_SOLUCION:
+            solucion = transformar(solucion, n, simetria)
+        self._guardar_local(n, canonica, solucion)
+        tabla = self._tablas.get(n)
+        if tabla is not None:
+            tabla.guardar(canonica, solucion)
+
+    def _guardar_local(self, n: int, clave: int, solucion: int):
+        with self._candado:
+            self._entradas[(n, clave)] = (time.monotonic(), solucion)
+            self._entradas.move_to_end((n, clave))
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def resolver(self, matriz: List[List[int]]) -> Optional[List[int]]:
+        """
+        Resuelve el tablero consultando primero la caché.
+
+        Retorna:
+        --------
+        Optional[List[int]]
+            Vector solución (mismo formato que resolver_lights_out), o None
+            si el tablero no tiene solución
+        """
+        n = len(matriz)
+        clave = empaquetar_tablero(matriz)
+        solucion = self.obtener(n, clave)
+        if solucion is None:
+            with self._candado:
+                self.fallos += 1
+            vector = self._resolver(matriz)
+            self.guardar(n, clave, SIN_SOLUCION if vector is None else vector_a_bits(vector))
+            return vector
+        if solucion == SIN_SOLUCION:
+            return None
+        return bits_a_vector(solucion, n * n)
+
+    @property
+    def tasa_aciertos(self) -> float:
+        """Fracción de consultas resueltas desde la caché (local o compartida)."""
+        total = self.aciertos + self.aciertos_compartidos + self.fallos
+        return (self.aciertos + self.aciertos_compartidos) / total if total else 0.0
+
+    def estadisticas(self) -> dict:
+        """Contadores actuales de la caché."""
+        with self._candado:
+            return {
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "aciertos_compartidos": self.aciertos_compartidos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "vencidas": self.vencidas,
+                "tasa_aciertos": self.tasa_aciertos,
+            }
+
+    def limpiar(self):
+        """Vacía la caché local (la tabla compartida no se modifica)."""
+        with self._candado:
+            self._entradas.clear()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - GENERADOR DE CARGA
+Cliente que mide solicitudes por segundo y latencias del servidor local
+
+Abre varias conexiones concurrentes contra servidor_resolucion.py, envía
+tableros aleatorios de tamaño n y muestra el throughput y los percentiles
+de latencia (p50, p95, p99 y máximo).
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+
+async def _trabajador(argumentos, cantidad: int, latencias: List[float], errores: List[str]):
+    """Una conexión que envía cantidad solicitudes, de a una por vez."""
+    if argumentos.unix:
+        lector, escritor = await asyncio.open_unix_connection(argumentos.unix)
+    else:
+        lector, escritor = await asyncio.open_connection(argumentos.host, argumentos.puerto)
+
+    n = argumentos.n
+    try:
+        for i in range(cantidad):
+            tablero = [[random.randint(0, 1) for _ in range(n)] for _ in range(n)]
+            solicitud = {"id": i, "tablero": tablero, "plazo_ms": argumentos.plazo_ms}
+            inicio = time.perf_counter()
+            escritor.write(json.dumps(solicitud).encode() + b"\n")
+            await escritor.drain()
+            respuesta = json.loads(await lector.readline())
+            latencias.append(time.perf_counter() - inicio)
+            if "error" in respuesta:
+                errores.append(respuesta["error"])
+    finally:
+        escritor.close()
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    """Percentil p (0-100) de una lista ya ordenada."""
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+async def _ejecutar(argumentos):
+    latencias: List[float] = []
+    errores: List[str] = []
+    por_conexion, resto = divmod(argumentos.solicitudes, argumentos.concurrencia)
+    cantidades = [por_conexion + (1 if k < resto else 0) for k in range(argumentos.concurrencia)]
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_trabajador(argumentos, c, latencias, errores) for c in cantidades if c))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    print(f"Solicitudes: {len(latencias)} ({len(errores)} con error) en {duracion:.2f} s")
+    print(f"Throughput: {len(latencias) / duracion:.1f} solicitudes/s")
+    print("Latencia (ms): " + ", ".join(
+        f"p{p} = {_percentil(latencias, p) * 1000:.2f}" for p in (50, 95, 99)
+    ) + f", máx = {(latencias[-1] if latencias else 0) * 1000:.2f}")
+    if errores:
+        print(f"Primer error: {errores[0]}")
+
+
+def main():
+    """Punto de entrada por línea de comandos."""
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor Lights Out")
+    parser.add_argument("--unix", help="Ruta del socket Unix (si no, TCP en localhost)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("-n", type=int, default=5, help="Tamaño de los tableros")
+    parser.add_argument("--solicitudes", type=int, default=10000)
+    parser.add_argument("--concurrencia", type=int, default=64)
+    parser.add_argument("--plazo-ms", type=float, default=1000.0)
+    asyncio.run(_ejecutar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - CORPUS DE TABLEROS EN DISCO
+Almacén columnar de tableros y soluciones, mapeado en memoria
+
+Reemplaza los corpus en JSON (listas de listas) por un directorio por
+tamaño con una columna por archivo, cada una de registros de ancho fijo:
+- tableros.u64     tablero empaquetado, ⌈n²/64⌉ palabras por registro
+- soluciones.u64   presiones empaquetadas (0 si no tiene solución)
+- presiones.u16    cantidad de presiones de la solución
+- resoluble.u8     1 si el tablero tiene solución
+- metadatos.json   cantidad de registros confirmados
+
+Las columnas se leen con np.memmap, así que recorrer el corpus produce
+vistas de NumPy sin copiar. Un índice ordenado por (resolubilidad,
+presiones) permite seleccionar registros sin recorrer todo el corpus.
+
+Con agregar(..., unicos=True) se guarda un solo tablero por clase de
+simetría (su forma canónica, ver simetrias.py) y se descartan los que ya
+están en el corpus. Para no releer el corpus en cada agregado, los tableros
+guardados se mantienen en corridas ordenadas en disco (claves_*.bin) que se
+fusionan de a pares como un contador binario: cada consulta es una búsqueda
+binaria por corrida y cada tablero se reescribe O(log registros) veces.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from motor_vectorizado import (desempaquetar_uint64, empaquetar_uint64, resolver_lote,
+                               verificar_solucion_batch)
+from simetrias import canonizar_arreglo, transformar_arreglo
+
+SIN_SOLUCION = np.uint16(0xFFFF)  # Clave del índice para tableros sin solución
+
+_COLUMNAS = {
+    "tableros": np.uint64,
+    "soluciones": np.uint64,
+    "presiones": np.uint16,
+    "resoluble": np.uint8,
+}
+
+
+def _palabras(n: int) -> int:
+    return (n * n + 63) // 64
+
+
+def _claves(tableros: np.ndarray) -> np.ndarray:
+    """Tableros empaquetados (k, palabras) como claves opacas comparables y ordenables."""
+    tableros = np.ascontiguousarray(tableros, dtype=np.uint64)
+    return tableros.view(f"V{tableros.shape[1] * 8}").ravel()
+
+
+class CorpusTableros:
+    """
+    Corpus de tableros guardado en un directorio.
+
+    Parámetros:
+    -----------
+    directorio : str
+        Carpeta del corpus (se crea si no existe); hay una subcarpeta por tamaño
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._indices: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    # ---------------------------------------------------------------
+    # Rutas y metadatos
+    # ---------------------------------------------------------------
+
+    def _carpeta(self, n: int) -> str:
+        return os.path.join(self.directorio, f"{n}x{n}")
+
+    def _ruta(self, n: int, columna: str) -> str:
+        extension = f"u{np.dtype(_COLUMNAS[columna]).itemsize * 8}"
+        return os.path.join(self._carpeta(n), f"{columna}.{extension}")
+
+    def _ruta_metadatos(self, n: int) -> str:
+        return os.path.join(self._carpeta(n), "metadatos.json")
+
+    def tamanos(self) -> List[int]:
+        """Tamaños de tablero presentes en el corpus."""
+        tamanos = []
+        for nombre in os.listdir(self.directorio):
+            lado, _, otro = nombre.partition("x")
+            if lado.isdigit() and lado == otro and os.path.exists(self._ruta_metadatos(int(lado))):
+                tamanos.append(int(lado))
+        return sorted(tamanos)
+
+    def cantidad(self, n: int) -> int:
+        """Registros confirmados para tableros n×n."""
+        try:
+            with open(self._ruta_metadatos(n), encoding="utf-8") as archivo:
+                return json.load(archivo)["registros"]
+        except FileNotFoundError:
+            return 0
+
+    def _confirmar(self, n: int, registros: int):
+        """Escribe la cantidad de registros de forma atómica (lo demás en disco se ignora)."""
+        temporal = self._ruta_metadatos(n) + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump({"n": n, "registros": registros, "palabras": _palabras(n)}, archivo)
+        os.replace(temporal, self._ruta_metadatos(n))
+
+    # ---------------------------------------------------------------
+    # Escritura
+    # ---------------------------------------------------------------
+
+    def agregar(self, tableros: np.ndarray, soluciones: Optional[np.ndarray] = None,
+                unicos: bool = False) -> int:
+        """
+        Agrega tableros del mismo tamaño al final del corpus.
+
+        Parámetros:
+        -----------
+        tableros : np.ndarray
+            Arreglo (k, n, n) o (k, n²) de 0s y 1s
+        soluciones : Optional[np.ndarray]
+            Presiones (k, n²) ya calculadas; si se omiten se usa resolver_lote
+        unicos : bool
+            Guardar la forma canónica de cada tablero y omitir los que
+            (salvo simetría) se repiten en el lote o ya están en el corpus
+
+        Retorna:
+        --------
+        int
+            Índice del primer registro agregado
+        """
+        tableros = np.asarray(tableros, dtype=np.uint8)
+        k = tableros.shape[0]
+        N = int(np.prod(tableros.shape[1:]))
+        n = int(round(N ** 0.5))
+        if n * n != N:
+            raise ValueError("Los tableros deben ser cuadrados")
+        tableros = tableros.reshape(k, N)
+        inicio = self.cantidad(n)
+        if k == 0:
+            return inicio
+
+        corridas = None
+        if unicos:
+            tableros, simetrias = canonizar_arreglo(tableros.reshape(k, n, n))
+            tableros = tableros.reshape(k, N)
+            if soluciones is not None:
+                soluciones = transformar_arreglo(
+                    np.asarray(soluciones, dtype=np.uint8).reshape(k, N), n, simetrias)
+            # Primera aparición en el lote que no esté ya en alguna corrida
+            claves = _claves(empaquetar_uint64(tableros))
+            _, primeros = np.unique(claves, return_index=True)
+            primeros = np.sort(primeros)
+            existentes = np.zeros(len(primeros), dtype=bool)
+            corridas = self._corridas(n)
+            for corrida in corridas:
+                guardadas = self._leer_corrida(n, corrida)
+                posiciones = np.minimum(np.searchsorted(guardadas, claves[primeros]), len(guardadas) - 1)
+                existentes |= guardadas[posiciones] == claves[primeros]
+            nuevos = primeros[~existentes]
+            tableros = tableros[nuevos]
+            soluciones = None if soluciones is None else soluciones[nuevos]
+            k = len(nuevos)
+            if k == 0:
+                return inicio
+
+        if soluciones is None:
+            soluciones, resolubles = resolver_lote(tableros)
+        else:
+            # Las soluciones recibidas se verifican; las inválidas se recalculan
+            soluciones = np.asarray(soluciones, dtype=np.uint8).reshape(k, N).copy()
+            resolubles, _ = verificar_solucion_batch(tableros, soluciones)
+            if not resolubles.all():
+                recalculadas, resolubles_malas = resolver_lote(tableros[~resolubles])
+                soluciones[~resolubles] = recalculadas
+                resolubles[~resolubles] = resolubles_malas
+
+        columnas = {
+            "tableros": empaquetar_uint64(tableros),
+            "soluciones": empaquetar_uint64(soluciones),
+            "presiones": np.where(resolubles, soluciones.sum(axis=1), SIN_SOLUCION).astype(np.uint16),
+            "resoluble": resolubles.astype(np.uint8),
+        }
+
+        os.makedirs(self._carpeta(n), exist_ok=True)
+        for nombre, datos in columnas.items():
+            ruta = self._ruta(n, nombre)
+            ancho = datos[0].nbytes
+            # Descartar restos de una escritura interrumpida antes de agregar
+            with open(ruta, "ab") as archivo:
+                archivo.truncate(inicio * ancho)
+                archivo.write(np.ascontiguousarray(datos).tobytes())
+        self._confirmar(n, inicio + k)
+        self._indices.pop(n, None)
+        if corridas is not None:
+            self._agregar_corrida(n, corridas, columnas["tableros"], inicio)
+        return inicio
+
+    def importar_json(self, ruta: str, unicos: bool = False) -> Dict[int, int]:
+        """
+        Importa un corpus en JSON (lista de tableros como listas de listas).
+
+        Retorna:
+        --------
+        Dict[int, int]
+            Registros importados por tamaño
+        """
+        with open(ruta, encoding="utf-8") as archivo:
+            tableros = json.load(archivo)
+        por_tamano: Dict[int, List[List[List[int]]]] = {}
+        for tablero in tableros:
+            por_tamano.setdefault(len(tablero), []).append(tablero)
+        importados = {}
+        for n, grupo in por_tamano.items():
+            inicio = self.agregar(np.array(grupo, dtype=np.uint8), unicos=unicos)
+            importados[n] = self.cantidad(n) - inicio
+        return importados
+
+    # ---------------------------------------------------------------
+    # Corridas ordenadas de tableros (para agregar con unicos=True)
+    # ---------------------------------------------------------------
+
+    def _ruta_corrida(self, n: int, corrida: Tuple[int, int]) -> str:
+        return os.path.join(self._carpeta(n), f"claves_{corrida[0]}_{corrida[1]}.bin")
+
+    def _leer_corrida(self, n: int, corrida: Tuple[int, int]) -> np.ndarray:
+        return np.memmap(self._ruta_corrida(n, corrida), dtype=f"V{8 * _palabras(n)}", mode="r")
+
+    def _corridas(self, n: int) -> List[Tuple[int, int]]:
+        """
+        Rangos de registros (desde, hasta) de cada corrida, al día con el corpus.
+
+        Los registros confirmados que aún no están en ninguna corrida (por
+        agregados sin unicos, o por una interrupción) se agregan como una
+        corrida nueva; si el índice no corresponde al corpus se reconstruye.
+        """
+        registros = self.cantidad(n)
+        try:
+            with open(os.path.join(self._carpeta(n), "claves.json"), encoding="utf-8") as archivo:
+                corridas = [tuple(corrida) for corrida in json.load(archivo)["corridas"]]
+        except FileNotFoundError:
+            corridas = []
+        cubiertos = corridas[-1][1] if corridas else 0
+        if cubiertos > registros or not all(os.path.exists(self._ruta_corrida(n, c)) for c in corridas):
+            for corrida in corridas:
+                if os.path.exists(self._ruta_corrida(n, corrida)):
+                    os.remove(self._ruta_corrida(n, corrida))
+            corridas, cubiertos = [], 0
+        if cubiertos < registros:
+            corridas = self._agregar_corrida(n, corridas, self.tableros(n)[cubiertos:registros], cubiertos)
+        return corridas
+
+    def _agregar_corrida(self, n: int, corridas: List[Tuple[int, int]], tableros: np.ndarray,
+                         desde: int) -> List[Tuple[int, int]]:
+        """
+        Agrega los tableros empaquetados de los registros desde.. como corrida.
+
+        Mientras la penúltima corrida no sea más del doble de grande que la
+        última, ambas se fusionan (contador binario).
+        """
+        corridas = list(corridas)
+        escritas = set(corridas)
+        nueva = (desde, desde + len(tableros))
+        if nueva[1] > nueva[0]:
+            np.sort(_claves(tableros)).tofile(self._ruta_corrida(n, nueva))
+            corridas.append(nueva)
+            escritas.add(nueva)
+        while len(corridas) >= 2 and (corridas[-2][1] - corridas[-2][0]
+                                      <= 2 * (corridas[-1][1] - corridas[-1][0])):
+            primera, segunda = corridas[-2], corridas[-1]
+            fusion = (primera[0], segunda[1])
+            unidas = np.concatenate([self._leer_corrida(n, primera), self._leer_corrida(n, segunda)])
+            np.sort(unidas, kind="stable").tofile(self._ruta_corrida(n, fusion))
+            corridas[-2:] = [fusion]
+            escritas.add(fusion)
+
+        ruta = os.path.join(self._carpeta(n), "claves.json")
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+            json.dump({"corridas": corridas}, archivo)
+        os.replace(ruta + ".tmp", ruta)
+        for corrida in escritas - set(corridas):
+            if os.path.exists(self._ruta_corrida(n, corrida)):
+                os.remove(self._ruta_corrida(n, corrida))
+        return corridas
+
+    # ---------------------------------------------------------------
+    # Lectura (vistas sin copia)
+    # ---------------------------------------------------------------
+
+    def columna(self, n: int, nombre: str) -> np.ndarray:
+        """Columna completa como np.memmap de solo lectura."""
+        registros = self.cantidad(n)
+        dtype = _COLUMNAS[nombre]
+        forma = (registros, _palabras(n)) if dtype is np.uint64 else (registros,)
+        if registros == 0:
+            return np.zeros(forma, dtype=dtype)
+        return np.memmap(self._ruta(n, nombre), dtype=dtype, mode="r", shape=forma)
+
+    def tableros(self, n: int) -> np.ndarray:
+        """Tableros empaquetados (registros, palabras) uint64."""
+        return self.columna(n, "tableros")
+
+    def soluciones(self, n: int) -> np.ndarray:
+        """Soluciones empaquetadas (registros, palabras) uint64."""
+        return self.columna(n, "soluciones")
+
+    def presiones(self, n: int) -> np.ndarray:
+        return self.columna(n, "presiones")
+
+    def resolubles(self, n: int) -> np.ndarray:
+        return self.columna(n, "resoluble").view(bool)
+
+    def iterar(self, n: int, lote: int = 1 << 16) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Recorre el corpus por lotes sin copiar.
+
+        Retorna:
+        --------
+        Iterator[Tuple[int, np.ndarray, np.ndarray]]
+            (índice del primer registro, vista de tableros, vista de soluciones)
+        """
+        tableros = self.tableros(n)
+        soluciones = self.soluciones(n)
+        for inicio in range(0, len(tableros), lote):
+            yield inicio, tableros[inicio:inicio + lote], soluciones[inicio:inicio + lote]
+
+    # ---------------------------------------------------------------
+    # Índice por resolubilidad y presiones
+    # ---------------------------------------------------------------
+
+    def construir_indice(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ordena los registros por (presiones, resolubilidad) y guarda el índice.
+
+        Retorna:
+        --------
+        Tuple[np.ndarray, np.ndarray]
+            (registros en orden, clave de cada posición): la clave es la cantidad
+            de presiones, o SIN_SOLUCION para los tableros sin solución, que quedan al final
+        """
+        claves = np.asarray(self.presiones(n))
+        orden = np.argsort(claves, kind="stable").astype(np.int64)
+        claves_ordenadas = claves[orden]
+        np.save(os.path.join(self._carpeta(n), "indice_orden.npy"), orden)
+        np.save(os.path.join(self._carpeta(n), "indice_claves.npy"), claves_ordenadas)
+        self._indices[n] = (orden, claves_ordenadas)
+        return orden, claves_ordenadas
+
+    def _indice(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        if n in self._indices:
+            return self._indices[n]
+        carpeta = self._carpeta(n)
+        try:
+            orden = np.load(os.path.join(carpeta, "indice_orden.npy"), mmap_mode="r")
+            claves = np.load(os.path.join(carpeta, "indice_claves.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            return self.construir_indice(n)
+        if len(orden) != self.cantidad(n):  # Índice desactualizado
+            return self.construir_indice(n)
+        self._indices[n] = (orden, claves)
+        return orden, claves
+
+    def buscar(self, n: int, presiones_minimas: int = 0, presiones_maximas: Optional[int] = None,
+               resoluble: Optional[bool] = None) -> np.ndarray:
+        """
+        Registros que cumplen el filtro, usando el índice.
+
+        Parámetros:
+        -----------
+        presiones_minimas, presiones_maximas : int
+            Rango (inclusivo) de presiones de la solución guardada
+        resoluble : Optional[bool]
+            True: solo resolubles, False: solo sin solución, None: el rango pedido
+            entre los resolubles más todos los sin solución
+
+        Retorna:
+        --------
+        np.ndarray
+            Índices de registro (vista del índice, ordenada por presiones)
+        """
+        orden, claves = self._indice(n)
+        if resoluble is False:
+            return orden[np.searchsorted(claves, SIN_SOLUCION):]
+        maximo = n * n if presiones_maximas is None else presiones_maximas
+        desde = np.searchsorted(claves, presiones_minimas)
+        hasta = np.searchsorted(claves, maximo, side="right")
+        if resoluble is None:
+            return np.concatenate((orden[desde:hasta], orden[np.searchsorted(claves, SIN_SOLUCION):]))
+        return orden[desde:hasta]
+
+    def histograma_presiones(self, n: int) -> np.ndarray:
+        """Cantidad de tableros resolubles por número de presiones."""
+        _, claves = self._indice(n)
+        return np.bincount(claves[claves != SIN_SOLUCION], minlength=n * n + 1)
+
+    # ---------------------------------------------------------------
+    # Integración con el resolvedor por lotes y la verificación
+    # ---------------------------------------------------------------
+
+    def desempaquetar(self, n: int, vista: np.ndarray) -> np.ndarray:
+        """Vista empaquetada → arreglo (k, n, n) uint8 listo para resolver_lote."""
+        return desempaquetar_uint64(vista, n * n).reshape(-1, n, n)
+
+    def resolver(self, n: int, registros: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Resuelve con resolver_lote los registros indicados."""
+        tableros = self.tableros(n)[np.asarray(registros, dtype=np.int64)]
+        return resolver_lote(self.desempaquetar(n, tableros))
+
+    def verificar(self, n: int, lote: int = 1 << 16) -> np.ndarray:
+        """
+        Comprueba A·x = b para todas las soluciones guardadas.
+
+        Retorna:
+        --------
+        np.ndarray
+            Índices de los registros resolubles cuya solución no es válida
+        """
+        resolubles = self.resolubles(n)
+        fallidos = []
+        for inicio, tableros, soluciones in self.iterar(n, lote):
+            correctos, _ = verificar_solucion_batch(tableros, soluciones, n, empaquetado=True)
+            malos = np.flatnonzero(~correctos & resolubles[inicio:inicio + len(tableros)])
+            fallidos.append(malos + inicio)
+        return np.concatenate(fallidos) if fallidos else np.zeros(0, dtype=np.int64)
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    print("=" * 60)
+    print("LIGHTS OUT - CORPUS DE TABLEROS EN DISCO")
+    print("=" * 60)
+    print()
+
+    generador = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as carpeta:
+        corpus = CorpusTableros(carpeta)
+        for n in (4, 5, 10):
+            inicio = time.perf_counter()
+            corpus.agregar(generador.integers(0, 2, size=(100_000, n, n), dtype=np.uint8))
+            corpus.construir_indice(n)
+            fallidos = corpus.verificar(n)
+            resolubles = int(corpus.resolubles(n).sum())
+            print(f"{n}×{n}: {corpus.cantidad(n)} tableros, {resolubles} resolubles, "
+                  f"{len(fallidos)} soluciones inválidas ({time.perf_counter() - inicio:.2f} s)")
+
+        faciles = corpus.buscar(4, presiones_maximas=3, resoluble=True)
+        print(f"\n4×4 con a lo sumo 3 presiones: {len(faciles)} tableros")
+        soluciones, _ = corpus.resolver(4, faciles[:5])
+        print(f"Presiones recalculadas de los primeros 5: {soluciones.sum(axis=1).tolist()}")
+        print(f"Tamaños en el corpus: {corpus.tamanos()}")
+
+        corpus.agregar(generador.integers(0, 2, size=(10_000, 3, 3), dtype=np.uint8), unicos=True)
+        print(f"3×3 sin repetir simetrías: {corpus.cantidad(3)} de 10000 tableros aleatorios")
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - ELIMINACIÓN REANUDABLE
+Gauss-Jordan mod 2 con plazo, cancelación y puntos de control en disco
+
+Para sistemas muy grandes (tableros irregulares, precálculos por tamaño)
+una caída o un plazo vencido hacían perder toda la eliminación. Este motor
+trabaja sobre filas empaquetadas en un arreglo (filas, palabras) uint64 y:
+
+- Revisa antes de cada columna el plazo y un threading.Event de
+  cancelación; si hay que parar, guarda el avance y lanza
+  EliminacionInterrumpida
+- Cada `intervalo` segundos copia la matriz, la columna siguiente y los
+  pivotes a un archivo mapeado en memoria
+- EliminacionReanudable.reanudar(ruta) continúa desde el último punto
+
+El archivo tiene dos ranuras que se escriben de forma alternada: primero
+se completa la ranura inactiva y recién después la cabecera pasa a
+señalarla, así que una caída durante la escritura deja intacto el punto de
+control anterior. El primer punto de control se escribe con otro nombre
+(ruta + ".tmp") y se renombra al completarse: un archivo en ruta siempre
+tiene una ranura válida. Si igual aparece uno sin ranura (por ejemplo de
+una versión anterior), las funciones de uso lo toman como un comienzo
+nuevo.
+
+Las reglas de pivoteo son las de motor_vectorizado (primer 1 desde la fila
+actual, eliminación en todas las filas), por lo que factorizacion_reanudable
+produce exactamente la misma factorización que Factorizacion(n).
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import os
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from motor_vectorizado import Factorizacion, artefactos_de_eliminacion
+from operador_implicito import producto_A
+
+_MARCA = b"LOELIM01"
+_CABECERA = struct.Struct("<8sQQQQ")  # marca, filas, palabras, columnas, ranura activa
+_ESTADO = struct.Struct("<QQQQ")      # secuencia, columna siguiente, fila actual, pivotes
+_INICIO_RANURAS = 64
+_SIN_RANURA = 2
+
+
+class EliminacionInterrumpida(RuntimeError):
+    """
+    La eliminación se detuvo antes de terminar.
+
+    Atributos:
+    ----------
+    motivo : str
+        "plazo" o "cancelada"
+    columna : int
+        Próxima columna a eliminar
+    ruta : Optional[str]
+        Punto de control desde el que se puede reanudar (None si no se guardó)
+    """
+
+    def __init__(self, motivo: str, columna: int, ruta: Optional[str]):
+        super().__init__(f"Eliminación {'cancelada' if motivo == 'cancelada' else 'detenida por plazo'} "
+                         f"en la columna {columna}")
+        self.motivo = motivo
+        self.columna = columna
+        self.ruta = ruta
+
+
+class EliminacionReanudable:
+    """
+    Gauss-Jordan mod 2 sobre filas empaquetadas (bit c de la fila = columna c).
+
+    Parámetros:
+    -----------
+    filas : np.ndarray
+        Matriz (filas, palabras) uint64; se copia
+    columnas : int
+        Se eliminan las columnas 0..columnas-1 (las demás, por ejemplo el
+        término independiente o la identidad de [A | I], solo acompañan)
+    ruta : Optional[str]
+        Archivo de puntos de control (None: sin puntos de control)
+    intervalo : float
+        Segundos entre puntos de control
+    """
+
+    def __init__(self, filas: np.ndarray, columnas: int, ruta: Optional[str] = None,
+                 intervalo: float = 5.0):
+        self.filas = np.array(filas, dtype=np.uint64, order="C")
+        if self.filas.ndim != 2 or columnas > 64 * self.filas.shape[1]:
+            raise ValueError("Se esperaba una matriz (filas, palabras) con todas las columnas a eliminar")
+        self.columnas = columnas
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.columna = 0
+        self.fila_actual = 0
+        self.pivotes: List[Tuple[int, int]] = []
+        self._secuencia = 0
+        self._mapa: Optional[np.memmap] = None
+
+    @property
+    def terminada(self) -> bool:
+        return self.columna >= self.columnas
+
+    # ---------------------------------------------------------------
+    # Puntos de control
+    # ---------------------------------------------------------------
+
+    def _tamano_ranura(self) -> int:
+        filas, palabras = self.filas.shape
+        return _ESTADO.size + 8 * filas * palabras + 16 * filas
+
+    def _abrir_mapa(self) -> np.memmap:
+        if self._mapa is None:
+            filas, palabras = self.filas.shape
+            tamano = _INICIO_RANURAS + 2 * self._tamano_ranura()
+            # Nombre provisorio hasta completar la primera ranura (ver guardar)
+            self._mapa = np.memmap(self.ruta + ".tmp", dtype=np.uint8, mode="w+", shape=(tamano,))
+            _CABECERA.pack_into(self._mapa, 0, _MARCA, filas, palabras, self.columnas, _SIN_RANURA)
+            self._mapa.flush()
+        return self._mapa
+
+    def guardar(self):
+        """Copia el estado actual a la ranura inactiva y la marca como vigente."""
+        if self.ruta is None:
+            return
+        mapa = self._abrir_mapa()
+        activa = _CABECERA.unpack_from(mapa, 0)[4]
+        ranura = 0 if activa != 0 else 1
+        inicio = _INICIO_RANURAS + ranura * self._tamano_ranura()
+        filas, palabras = self.filas.shape
+
+        self._secuencia += 1
+        _ESTADO.pack_into(mapa, inicio, self._secuencia, self.columna, self.fila_actual, len(self.pivotes))
+        datos = inicio + _ESTADO.size
+        mapa[datos:datos + self.filas.nbytes] = self.filas.reshape(-1).view(np.uint8)
+        pivotes = np.zeros((filas, 2), dtype=np.int64)
+        if self.pivotes:
+            pivotes[:len(self.pivotes)] = self.pivotes
+        datos += self.filas.nbytes
+        mapa[datos:datos + pivotes.nbytes] = pivotes.reshape(-1).view(np.uint8)
+        mapa.flush()
+
+        _CABECERA.pack_into(mapa, 0, _MARCA, filas, palabras, self.columnas, ranura)
+        mapa.flush()
+        if activa == _SIN_RANURA:
+            os.replace(self.ruta + ".tmp", self.ruta)
+
+    @classmethod
+    def reanudar(cls, ruta: str, intervalo: float = 5.0) -> "EliminacionReanudable":
+        """Reconstruye la eliminación desde el último punto de control de ruta."""
+        mapa = np.memmap(ruta, dtype=np.uint8, mode="r+")
+        marca, filas, palabras, columnas, ranura = _CABECERA.unpack_from(mapa, 0)
+        if marca != _MARCA:
+            raise ValueError(f"{ruta} no es un punto de control de eliminación")
+        if ranura == _SIN_RANURA:
+            raise ValueError(f"{ruta} todavía no tiene un punto de control completo")
+
+        eliminacion = cls(np.zeros((filas, palabras), dtype=np.uint64), columnas, ruta, intervalo)
+        inicio = _INICIO_RANURAS + ranura * eliminacion._tamano_ranura()
+        (eliminacion._secuencia, eliminacion.columna,
+         eliminacion.fila_actual, cantidad) = _ESTADO.unpack_from(mapa, inicio)
+        datos = inicio + _ESTADO.size
+        eliminacion.filas[...] = np.frombuffer(mapa, dtype=np.uint64, count=filas * palabras,
+                                               offset=datos).reshape(filas, palabras)
+        datos += 8 * filas * palabras
+        pivotes = np.frombuffer(mapa, dtype=np.int64, count=2 * cantidad, offset=datos).reshape(cantidad, 2)
+        eliminacion.pivotes = [(int(c), int(f)) for c, f in pivotes]
+        eliminacion._mapa = mapa
+        return eliminacion
+
+    @staticmethod
+    def tiene_punto_de_control(ruta: Optional[str]) -> bool:
+        """Indica si ruta existe y tiene una ranura completa para reanudar."""
+        if ruta is None or not os.path.exists(ruta) or os.path.getsize(ruta) < _CABECERA.size:
+            return False
+        with open(ruta, "rb") as archivo:
+            marca, *_, ranura = _CABECERA.unpack(archivo.read(_CABECERA.size))
+        return marca != _MARCA or ranura != _SIN_RANURA  # Un archivo ajeno lo rechaza reanudar
+
+    def descartar(self):
+        """Borra el archivo de puntos de control."""
+        if self._mapa is not None:
+            del self._mapa
+            self._mapa = None
+        for ruta in (self.ruta, None if self.ruta is None else self.ruta + ".tmp"):
+            if ruta and os.path.exists(ruta):
+                os.remove(ruta)
+
+    # ---------------------------------------------------------------
+    # Eliminación
+    # ---------------------------------------------------------------
+
+    def _eliminar_columna(self, col: int):
+        palabra, bit = divmod(col, 64)
+        mascara = np.uint64(1 << bit)
+        con_uno = (self.filas[:, palabra] & mascara) != 0
+        candidatas = np.flatnonzero(con_uno[self.fila_actual:])
+        if not len(candidatas):
+            return
+        pivote = self.fila_actual + int(candidatas[0])
+        if pivote != self.fila_actual:
+            self.filas[[self.fila_actual, pivote]] = self.filas[[pivote, self.fila_actual]]
+            con_uno[pivote] = con_uno[self.fila_actual]
+        con_uno[self.fila_actual] = False
+        self.filas[con_uno] ^= self.filas[self.fila_actual]
+        self.pivotes.append((col, self.fila_actual))
+        self.fila_actual += 1
+
+    def ejecutar(self, plazo: Optional[float] = None,
+                 cancelacion: Optional[threading.Event] = None,
+                 conservar: bool = False) -> List[Tuple[int, int]]:
+        """
+        Elimina las columnas que faltan.
+
+        Parámetros:
+        -----------
+        plazo : Optional[float]
+            Segundos máximos de esta ejecución
+        cancelacion : Optional[threading.Event]
+            Si se activa (desde otro hilo), la eliminación para en la
+            próxima columna
+        conservar : bool
+            Mantener el archivo de puntos de control al terminar
+
+        Retorna:
+        --------
+        List[Tuple[int, int]]
+            (columna, fila) de cada pivote; self.filas queda reducida
+
+        Lanza EliminacionInterrumpida (después de guardar el avance) si vence
+        el plazo o se cancela.
+        """
+        ahora = time.monotonic()
+        limite = None if plazo is None else ahora + plazo
+        proximo_guardado = ahora + self.intervalo
+        while self.columna < self.columnas:
+            motivo = None
+            if cancelacion is not None and cancelacion.is_set():
+                motivo = "cancelada"
+            elif limite is not None or self.ruta is not None:
+                ahora = time.monotonic()
+                if limite is not None and ahora >= limite:
+                    motivo = "plazo"
+                elif self.ruta is not None and ahora >= proximo_guardado:
+                    self.guardar()
+                    proximo_guardado = time.monotonic() + self.intervalo
+            if motivo:
+                self.guardar()
+                raise EliminacionInterrumpida(motivo, self.columna, self.ruta)
+
+            self._eliminar_columna(self.columna)
+            self.columna += 1
+
+        if conservar:
+            self.guardar()
+        else:
+            self.descartar()
+        return self.pivotes
+
+    def filas_enteras(self) -> List[int]:
+        """Filas de la matriz como enteros de Python."""
+        return [int.from_bytes(fila.tobytes(), "little") for fila in self.filas]
+
+
+# ===================================================================
+# USOS: FACTORIZACIÓN POR TAMAÑO Y SISTEMAS ARBITRARIOS
+# ===================================================================
+
+def _empaquetar_enteros(filas: List[int], palabras: int) -> np.ndarray:
+    datos = b"".join(fila.to_bytes(8 * palabras, "little") for fila in filas)
+    return np.frombuffer(datos, dtype="<u8").reshape(len(filas), palabras)
+
+
+def factorizacion_reanudable(n: int, ruta: Optional[str] = None, plazo: Optional[float] = None,
+                             cancelacion: Optional[threading.Event] = None,
+                             intervalo: float = 5.0) -> Factorizacion:
+    """
+    Factorización del tamaño n con plazo, cancelación y puntos de control.
+
+    Si ruta ya tiene un punto de control completo, se continúa desde ahí;
+    si no (no existe o la caída fue antes de completar la primera ranura),
+    se empieza de cero.
+    Con el resultado se puede alimentar la caché de motor_vectorizado,
+    por ejemplo con establecer_proveedor.
+    """
+    N = n * n
+    if EliminacionReanudable.tiene_punto_de_control(ruta):
+        eliminacion = EliminacionReanudable.reanudar(ruta, intervalo)
+        if eliminacion.columnas != N or eliminacion.filas.shape[0] != N:
+            raise ValueError(f"{ruta} es un punto de control de otro sistema")
+    else:
+        filas = [producto_A(1 << i, n) | (1 << (N + i)) for i in range(N)]
+        eliminacion = EliminacionReanudable(_empaquetar_enteros(filas, (2 * N + 63) // 64), N,
+                                            ruta, intervalo)
+    pivotes = eliminacion.ejecutar(plazo, cancelacion)
+    return Factorizacion.desde_artefactos(n, *artefactos_de_eliminacion(eliminacion.filas_enteras(), pivotes, N))
+
+
+def resolver_sistema_reanudable(A: np.ndarray, b: np.ndarray, ruta: Optional[str] = None,
+                                plazo: Optional[float] = None,
+                                cancelacion: Optional[threading.Event] = None,
+                                intervalo: float = 5.0) -> Optional[np.ndarray]:
+    """
+    Resuelve A·x = b mod 2 para una matriz densa cualquiera (m × N).
+
+    Parámetros:
+    -----------
+    A : np.ndarray
+        Matriz de 0s y 1s (por ejemplo, de un grafo irregular)
+    b : np.ndarray
+        Término independiente de longitud m
+    ruta, plazo, cancelacion, intervalo :
+        Como en EliminacionReanudable; si ruta tiene un punto de control se
+        reanuda (A y b deben ser los mismos)
+
+    Retorna:
+    --------
+    Optional[np.ndarray]
+        Solución uint8 con las variables libres en 0, o None si no existe
+    """
+    A = np.asarray(A, dtype=np.uint8)
+    m, N = A.shape
+    palabras = (N + 1 + 63) // 64
+    if EliminacionReanudable.tiene_punto_de_control(ruta):
+        eliminacion = EliminacionReanudable.reanudar(ruta, intervalo)
+        if eliminacion.columnas != N or eliminacion.filas.shape != (m, palabras):
+            raise ValueError(f"{ruta} es un punto de control de otro sistema")
+    else:
+        aumentada = np.zeros((m, 64 * palabras), dtype=np.uint8)
+        aumentada[:, :N] = A
+        aumentada[:, N] = np.asarray(b, dtype=np.uint8).reshape(m)
+        filas = np.packbits(aumentada, axis=1, bitorder="little").view(np.uint64)
+        eliminacion = EliminacionReanudable(filas, N, ruta, intervalo)
+    pivotes = eliminacion.ejecutar(plazo, cancelacion)
+
+    palabra, bit = divmod(N, 64)
+    independiente = (eliminacion.filas[:, palabra] >> np.uint64(bit)) & np.uint64(1)
+    if independiente[len(pivotes):].any():
+        return None  # Una fila 0 = 1: el sistema es incompatible
+    x = np.zeros(N, dtype=np.uint8)
+    for col, fila in pivotes:
+        x[col] = independiente[fila]
+    return x
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("=" * 60)
+    print("LIGHTS OUT - ELIMINACIÓN REANUDABLE")
+    print("=" * 60)
+    print()
+
+    n = 40
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, f"factorizacion_{n}.ckpt")
+
+        # Primera ejecución con un plazo corto: se interrumpe y guarda el avance
+        intentos = 0
+        inicio = time.perf_counter()
+        while True:
+            intentos += 1
+            try:
+                f = factorizacion_reanudable(n, ruta, plazo=0.05, intervalo=0.02)
+                break
+            except EliminacionInterrumpida as interrupcion:
+                print(f"Intento {intentos}: {interrupcion} (avance en {os.path.basename(interrupcion.ruta)})")
+        print(f"{n}×{n} factorizado en {intentos} tramos ({time.perf_counter() - inicio:.2f} s), "
+              f"nulidad {f.nulidad}")
+
+        referencia = Factorizacion(n)
+        iguales = (f.filas_inversa == referencia.filas_inversa and f.nucleo == referencia.nucleo
+                   and f.controles == referencia.controles)
+        print(f"Igual a Factorizacion({n}): {'SÍ' if iguales else 'NO'}")
+        print(f"Punto de control borrado al terminar: {'SÍ' if not os.path.exists(ruta) else 'NO'}")
+
+        # Un archivo que quedó sin ranura completa (caída antes del primer
+        # punto de control) no impide empezar de nuevo
+        with open(ruta, "wb") as archivo:
+            archivo.write(_CABECERA.pack(_MARCA, 0, 0, 0, _SIN_RANURA))
+        f = factorizacion_reanudable(n, ruta)
+        print(f"Archivo sin ranura tomado como comienzo nuevo: "
+              f"{'SÍ' if f.filas_inversa == referencia.filas_inversa else 'NO'}")
+
+        # Cancelación cooperativa desde otro hilo
+        cancelar = threading.Event()
+        threading.Timer(0.02, cancelar.set).start()
+        try:
+            factorizacion_reanudable(60, os.path.join(carpeta, "f60.ckpt"), cancelacion=cancelar)
+        except EliminacionInterrumpida as interrupcion:
+            print(f"\n60×60: {interrupcion}")
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - ENUMERACIÓN DE TODAS LAS SOLUCIONES
+Generadores perezosos sobre la coclase x_p + núcleo
+
+En los tamaños singulares resolver_lights_out devuelve una sola solución
+(variables libres en 0), pero hay 2^nulidad. La solución número i es
+
+    x_i = x_p ⊕ (XOR de K[j] para cada bit j de i)
+
+con x_p la solución particular de la factorización en caché. Así:
+- Se puede empezar en cualquier índice sin recorrer los anteriores
+- Pasar de i a i+1 es un único XOR (prefijos del núcleo precalculados)
+- La memoria no depende de cuántas soluciones haya
+
+Para recorrerlas por cantidad de presiones se hace una pasada por bloques
+que cuenta cuántas soluciones hay de cada peso (para saltar directo al
+desplazamiento pedido) y luego una pasada por peso que emite solo las de
+ese peso, en orden de índice. La memoria sigue acotada por el bloque.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from motor_vectorizado import factorizacion
+from operador_implicito import bits_a_vector, empaquetar_tablero
+
+# Más allá de esta nulidad ordenar por presiones deja de ser razonable
+MAX_NULIDAD_POR_PRESIONES = 24
+
+# Palabras uint64 por bloque al evaluar pesos (acota la memoria)
+PALABRAS_POR_BLOQUE = 1 << 20
+
+
+def contar_soluciones(matriz: List[List[int]]) -> int:
+    """Cantidad de soluciones del tablero: 2^nulidad, o 0 si no es resoluble."""
+    n = len(matriz)
+    f = factorizacion(n)
+    return 1 << f.nulidad if f.es_resoluble(empaquetar_tablero(matriz)) else 0
+
+
+def solucion_numero(matriz: List[List[int]], indice: int) -> Optional[List[int]]:
+    """Solución número `indice` de la coclase (0 = la de resolver_lights_out)."""
+    n = len(matriz)
+    f = factorizacion(n)
+    if not 0 <= indice < 1 << f.nulidad:
+        raise IndexError(f"Índice fuera de rango: hay {1 << f.nulidad} soluciones")
+    x = f.resolver(empaquetar_tablero(matriz))
+    if x is None:
+        return None
+    return bits_a_vector(x ^ _combinacion(f.nucleo, indice), n * n)
+
+
+def _combinacion(nucleo: List[int], indice: int) -> int:
+    x = 0
+    j = 0
+    while indice:
+        if indice & 1:
+            x ^= nucleo[j]
+        indice >>= 1
+        j += 1
+    return x
+
+
+# ===================================================================
+# RECORRIDO POR ÍNDICE
+# ===================================================================
+
+def _por_indice(x: int, nucleo: List[int], inicio: int, fin: int) -> Iterator[int]:
+    # i ⊕ (i+1) = 2^(t+1) - 1 con t = unos finales de i: se suman K[0..t]
+    prefijos = []
+    acumulado = 0
+    for vector in nucleo:
+        acumulado ^= vector
+        prefijos.append(acumulado)
+    x ^= _combinacion(nucleo, inicio)
+    for i in range(inicio, fin):
+        yield x
+        if i + 1 < fin:
+            x ^= prefijos[(~i & (i + 1)).bit_length() - 1]
+
+
+# ===================================================================
+# RECORRIDO POR CANTIDAD DE PRESIONES
+# ===================================================================
+
+def _palabras(valor: int, W: int) -> np.ndarray:
+    return np.frombuffer(valor.to_bytes(W * 8, "little"), dtype=np.uint64)
+
+
+def _bloques(x: int, nucleo: List[int], N: int):
+    """
+    Recorre las 2^nulidad soluciones en bloques consecutivos de índices.
+
+    Los bits bajos del índice salen de una tabla (llenada por duplicación
+    como en tabla_lineal) y los altos de un XOR por bloque.
+
+    Retorna:
+    --------
+    Iterator[Tuple[np.ndarray, np.ndarray]]
+        (soluciones (filas, W) uint64, pesos) en orden de índice
+    """
+    W = max(1, (N + 63) // 64)
+    bajos = min(len(nucleo), max(0, (PALABRAS_POR_BLOQUE // W).bit_length() - 1))
+    tabla = np.zeros((1 << bajos, W), dtype=np.uint64)
+    for k in range(bajos):
+        tabla[1 << k:2 << k] = tabla[:1 << k] ^ _palabras(nucleo[k], W)
+    altos = nucleo[bajos:]
+    for h in range(1 << len(altos)):
+        bloque = tabla ^ _palabras(x ^ _combinacion(altos, h), W)
+        pesos = np.bitwise_count(bloque).sum(axis=1, dtype=np.int64)
+        yield bloque, pesos
+
+
+def _por_presiones(x: int, nucleo: List[int], N: int, inicio: int, fin: int) -> Iterator[int]:
+    histograma = np.zeros(N + 1, dtype=np.int64)
+    for _, pesos in _bloques(x, nucleo, N):
+        histograma += np.bincount(pesos, minlength=N + 1)
+
+    posicion = 0
+    for peso in np.flatnonzero(histograma):
+        cantidad = int(histograma[peso])
+        if posicion + cantidad <= inicio:
+            posicion += cantidad
+            continue
+        for bloque, pesos in _bloques(x, nucleo, N):
+            for fila in np.flatnonzero(pesos == peso):
+                if posicion >= fin:
+                    return
+                if posicion >= inicio:
+                    yield int.from_bytes(bloque[fila].tobytes(), "little")
+                posicion += 1
+        if posicion >= fin:
+            return
+
+
+# ===================================================================
+# INTERFAZ
+# ===================================================================
+
+def iterar_soluciones(matriz: List[List[int]], inicio: int = 0, cantidad: Optional[int] = None,
+                      por_presiones: bool = False,
+                      empaquetadas: bool = False) -> Iterator[Union[List[int], int]]:
+    """
+    Genera perezosamente todas las soluciones del tablero.
+
+    Los argumentos se validan al llamar; las soluciones se calculan a
+    medida que se consumen.
+
+    Parámetros:
+    -----------
+    matriz : List[List[int]]
+        Tablero n×n
+    inicio : int
+        Desplazamiento: cuántas soluciones saltear (en el orden elegido)
+    cantidad : Optional[int]
+        Máximo de soluciones a generar (None = hasta el final)
+    por_presiones : bool
+        Ordenar de menos a más presiones (empates por índice). Requiere
+        nulidad ≤ MAX_NULIDAD_POR_PRESIONES
+    empaquetadas : bool
+        Generar enteros empaquetados en lugar de vectores
+
+    Retorna:
+    --------
+    Iterator[Union[List[int], int]]
+        Vectores solución en el formato de resolver_lights_out (nada si el
+        tablero no tiene solución)
+    """
+    n = len(matriz)
+    N = n * n
+    f = factorizacion(n)
+    if inicio < 0:
+        raise ValueError("El desplazamiento no puede ser negativo")
+    if por_presiones and f.nulidad > MAX_NULIDAD_POR_PRESIONES:
+        raise ValueError(f"Nulidad {f.nulidad} demasiado grande para ordenar por presiones "
+                         f"(máximo {MAX_NULIDAD_POR_PRESIONES})")
+    x = f.resolver(empaquetar_tablero(matriz))
+    total = 0 if x is None else 1 << f.nulidad
+    fin = total if cantidad is None else min(total, inicio + cantidad)
+    if inicio >= fin:
+        return iter(())
+    if por_presiones:
+        soluciones = _por_presiones(x, f.nucleo, N, inicio, fin)
+    else:
+        soluciones = _por_indice(x, f.nucleo, inicio, fin)
+    if empaquetadas:
+        return soluciones
+    return (bits_a_vector(solucion, N) for solucion in soluciones)
+
+
+if __name__ == "__main__":
+    import itertools
+    import random
+    import time
+
+    from operador_implicito import producto_A
+
+    print("=" * 60)
+    print("LIGHTS OUT - ENUMERACIÓN DE SOLUCIONES")
+    print("=" * 60)
+    print()
+
+    # 5×5 tiene nulidad 2: el tablero todo encendido tiene 4 soluciones
+    matriz = [[1] * 5 for _ in range(5)]
+    print(f"5×5 todo encendido: {contar_soluciones(matriz)} soluciones")
+    for solucion in iterar_soluciones(matriz, por_presiones=True):
+        print(f"  {sum(solucion):2d} presiones")
+
+    # Contra fuerza bruta en 4×4 (nulidad 4)
+    rng = random.Random(0)
+    coinciden = True
+    for _ in range(10):
+        x = rng.getrandbits(16)
+        b = producto_A(x, 4)
+        tablero = [[b >> (i * 4 + j) & 1 for j in range(4)] for i in range(4)]
+        todas = {y for y in range(1 << 16) if producto_A(y, 4) == b}
+        por_indice = list(iterar_soluciones(tablero, empaquetadas=True))
+        ordenadas = list(iterar_soluciones(tablero, por_presiones=True, empaquetadas=True))
+        pagina = list(iterar_soluciones(tablero, inicio=5, cantidad=4, por_presiones=True,
+                                        empaquetadas=True))
+        coinciden &= set(por_indice) == todas == set(ordenadas)
+        coinciden &= [y.bit_count() for y in ordenadas] == sorted(y.bit_count() for y in todas)
+        coinciden &= pagina == ordenadas[5:9]
+    print(f"\nCoincide con fuerza bruta (4×4): {'SÍ' if coinciden else 'NO'}")
+
+    # Paginación barata sobre 2^nulidad soluciones en un tamaño grande
+    n = 30
+    f = factorizacion(n)
+    tablero = [[1] * n for _ in range(n)]
+    total = contar_soluciones(tablero)
+    print(f"\n{n}×{n} todo encendido: nulidad {f.nulidad}, {total} soluciones")
+    inicio = time.perf_counter()
+    pagina = list(iterar_soluciones(tablero, inicio=total // 2, cantidad=1000, empaquetadas=True))
+    print(f"  1000 soluciones desde la mitad: {(time.perf_counter() - inicio) * 1e3:.1f} ms")
+    inicio = time.perf_counter()
+    primeras = list(itertools.islice(iterar_soluciones(tablero, por_presiones=True, empaquetadas=True), 5))
+    print(f"  Primeras 5 por presiones: {[y.bit_count() for y in primeras]} presiones "
+          f"({(time.perf_counter() - inicio) * 1e3:.1f} ms)")
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - ESTADÍSTICAS DEL ESPACIO DE ESTADOS
+Distribución de presiones mínimas, fracción de tableros resolubles y luces
+encendidas esperadas, calculadas de forma vectorizada
+
+Dos modos:
+- Exacto (n pequeño): los tableros resolubles son el espacio columna de A.
+  Cada uno corresponde a una coclase x + núcleo, con x apoyado en las
+  columnas pivote. Se recorren todas las coclases por bloques (tablas
+  lineales) y la presión mínima sale de comparar popcounts con el núcleo.
+- Monte Carlo (n grande): tableros aleatorios resueltos por lotes con la
+  factorización en caché.
+
+Ambos modos son generadores: cada bloque produce un acumulado parcial, sin
+guardar nunca todos los tableros en memoria.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from motor_vectorizado import (empaquetar_uint64, factorizacion, minimizar_con_nucleo,
+                               resolver_lote, tabla_lineal)
+from operador_implicito import producto_A
+
+
+class EstadisticasTamano(NamedTuple):
+    """Estadísticas acumuladas para tableros n×n."""
+    n: int
+    exacto: bool
+    tableros: int                   # Tableros considerados (todos o muestreados)
+    resolubles: int                 # De ellos, cuántos tienen solución
+    suma_luces: int                 # Suma de luces encendidas de todos los considerados
+    histograma_presiones: np.ndarray  # [k] = resolubles con k presiones mínimas
+    histograma_luces: np.ndarray      # [k] = resolubles con k luces encendidas
+    presiones_minimas: bool         # False si no se minimizó con el núcleo
+
+    @property
+    def fraccion_resolubles(self) -> float:
+        return self.resolubles / self.tableros if self.tableros else 0.0
+
+    @property
+    def media_luces(self) -> float:
+        """Luces encendidas esperadas en un tablero cualquiera."""
+        return self.suma_luces / self.tableros if self.tableros else 0.0
+
+    @property
+    def media_luces_resolubles(self) -> float:
+        """Luces encendidas esperadas en un tablero resoluble."""
+        return _media(self.histograma_luces)
+
+    @property
+    def media_presiones(self) -> float:
+        """Presiones mínimas esperadas para un tablero resoluble."""
+        return _media(self.histograma_presiones)
+
+
+def _media(histograma: np.ndarray) -> float:
+    total = histograma.sum()
+    return float((histograma * np.arange(len(histograma))).sum() / total) if total else 0.0
+
+
+# ===================================================================
+# MODO EXACTO
+# ===================================================================
+
+def estadisticas_exactas_por_bloques(n: int, bits_bloque: int = 20,
+                                     max_coclases: int = 1 << 30) -> Iterator[EstadisticasTamano]:
+    """
+    Recorre todas las coclases del espacio columna y produce acumulados parciales.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño del tablero (n² ≤ 64)
+    bits_bloque : int
+        Cada bloque cubre 2^bits_bloque tableros resolubles
+    max_coclases : int
+        Límite de tableros resolubles a enumerar (si se supera, usar Monte Carlo)
+    """
+    N = n * n
+    if N > 64:
+        raise ValueError("El modo exacto requiere n² ≤ 64")
+    f = factorizacion(n)
+    rango = len(f.columnas_pivote)
+    if 1 << rango > max_coclases:
+        raise ValueError(f"2^{rango} tableros resolubles superan el límite; use Monte Carlo")
+
+    columnas_x = [1 << c for c in f.columnas_pivote]
+    columnas_b = [producto_A(1 << c, n) for c in f.columnas_pivote]
+    bits = min(rango, bits_bloque)
+    tabla_x = tabla_lineal(columnas_x[:bits], bits)
+    tabla_b = tabla_lineal(columnas_b[:bits], bits)
+
+    histograma_presiones = np.zeros(N + 1, dtype=np.int64)
+    histograma_luces = np.zeros(N + 1, dtype=np.int64)
+    alto_x = alto_b = 0
+    for bloque in range(1 << (rango - bits)):
+        if bloque:
+            # Código de Gray sobre los bits altos: un XOR por bloque
+            k = bits + (bloque & -bloque).bit_length() - 1
+            alto_x ^= columnas_x[k]
+            alto_b ^= columnas_b[k]
+
+        _, pesos = minimizar_con_nucleo(tabla_x ^ np.uint64(alto_x), f.nucleo)
+        histograma_presiones += np.bincount(pesos, minlength=N + 1)
+        histograma_luces += np.bincount(np.bitwise_count(tabla_b ^ np.uint64(alto_b)), minlength=N + 1)
+
+        resolubles = (bloque + 1) << bits
+        tableros = resolubles << f.nulidad
+        yield EstadisticasTamano(n, True, tableros, resolubles, tableros * N // 2,
+                                 histograma_presiones.copy(), histograma_luces.copy(), True)
+
+
+def estadisticas_exactas(n: int) -> EstadisticasTamano:
+    """Estadísticas exactas sobre los 2^(n²) tableros n×n."""
+    resultado = None
+    for resultado in estadisticas_exactas_por_bloques(n):
+        pass
+    return resultado
+
+
+# ===================================================================
+# MODO MONTE CARLO
+# ===================================================================
+
+def pesos_minimos(soluciones: np.ndarray, nucleo: np.ndarray) -> np.ndarray:
+    """Peso mínimo de cada coclase con vectores de varias palabras."""
+    candidatas = soluciones.copy()
+    pesos = np.bitwise_count(candidatas).sum(axis=1)
+    for paso in range(1, 1 << len(nucleo)):
+        candidatas ^= nucleo[(paso & -paso).bit_length() - 1]
+        np.minimum(pesos, np.bitwise_count(candidatas).sum(axis=1), out=pesos)
+    return pesos
+
+
+def estadisticas_monte_carlo_por_lotes(n: int, muestras: int, lote: int = 4096,
+                                       semilla: Optional[int] = None,
+                                       max_nulidad: int = 16) -> Iterator[EstadisticasTamano]:
+    """
+    Estima las estadísticas con tableros aleatorios uniformes, lote por lote.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño del tablero
+    muestras : int
+        Cantidad total de tableros aleatorios
+    lote : int
+        Tableros resueltos por llamada a resolver_lote
+    semilla : Optional[int]
+        Semilla del generador aleatorio
+    max_nulidad : int
+        Si la nulidad la supera, no se minimiza con el núcleo y se informa el
+        peso de la solución canónica (presiones_minimas = False)
+    """
+    N = n * n
+    f = factorizacion(n)
+    minimizar = f.nulidad <= max_nulidad
+    nucleo = None
+    if minimizar and f.nulidad:
+        _, _, K = f.matrices()
+        nucleo = empaquetar_uint64(K.astype(np.uint8))
+
+    generador = np.random.default_rng(semilla)
+    histograma_presiones = np.zeros(N + 1, dtype=np.int64)
+    histograma_luces = np.zeros(N + 1, dtype=np.int64)
+    tableros = resolubles = suma_luces = 0
+
+    while tableros < muestras:
+        k = min(lote, muestras - tableros)
+        muestra = generador.integers(0, 2, size=(k, N), dtype=np.uint8)
+        soluciones, es_resoluble = resolver_lote(muestra)
+        luces = muestra.sum(axis=1, dtype=np.int64)
+
+        soluciones = soluciones[es_resoluble]
+        if nucleo is not None:
+            pesos = pesos_minimos(empaquetar_uint64(soluciones), nucleo)
+        else:
+            pesos = soluciones.sum(axis=1, dtype=np.int64)
+
+        histograma_presiones += np.bincount(pesos, minlength=N + 1)
+        histograma_luces += np.bincount(luces[es_resoluble], minlength=N + 1)
+        tableros += k
+        resolubles += int(es_resoluble.sum())
+        suma_luces += int(luces.sum())
+        yield EstadisticasTamano(n, False, tableros, resolubles, suma_luces,
+                                 histograma_presiones.copy(), histograma_luces.copy(), minimizar)
+
+
+def estadisticas_monte_carlo(n: int, muestras: int, **opciones) -> EstadisticasTamano:
+    """Estimación Monte Carlo con muestras tableros aleatorios."""
+    resultado = None
+    for resultado in estadisticas_monte_carlo_por_lotes(n, muestras, **opciones):
+        pass
+    return resultado
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LIGHTS OUT - ESTADÍSTICAS DEL ESPACIO DE ESTADOS")
+    print("=" * 60)
+    print()
+
+    for n in range(2, 6):
+        e = estadisticas_exactas(n)
+        print(f"{n}×{n} (exacto): resolubles = {e.fraccion_resolubles:.4f}, "
+              f"presiones mínimas medias = {e.media_presiones:.3f}, "
+              f"máximo = {np.flatnonzero(e.histograma_presiones)[-1]}, "
+              f"luces medias (resolubles) = {e.media_luces_resolubles:.3f}")
+
+    for n in (6, 10, 20):
+        e = estadisticas_monte_carlo(n, 20000, semilla=0)
+        print(f"{n}×{n} (Monte Carlo): resolubles ≈ {e.fraccion_resolubles:.4f}, "
+              f"presiones {'mínimas ' if e.presiones_minimas else ''}medias ≈ {e.media_presiones:.2f}, "
+              f"luces medias ≈ {e.media_luces:.2f}")
@@ -16,7 +16,18 @@ Curso: Álgebra Aplicada
 
 import pygame
 import sys
-from typing import List, Tuple, Optional
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, Optional
+
+import numpy as np
+
+from cache_resultados import CacheResultados
+from operador_implicito import desempaquetar_tablero, empaquetar_tablero, producto_A
+from resolver_polinomial import resolver_lights_out_polinomial
+from sesiones import GrabadorSesiones
 
 # ===================================================================
 # PARTE 1: MÓDULO ALGEBRAICO (Sistema lineal mod 2)
@@ -174,10 +185,313 @@ def resolver_lights_out(matriz: List[List[int]]) -> List[int]:
     return solucion
 
 
+# Hasta este tamaño se resuelve con la eliminación de Gauss de la consigna;
+# para tableros más grandes se usa el método polinomial (resolver_polinomial)
+TAMANO_MAXIMO_GAUSS = 8
+
+
+def resolver_tablero(matriz: List[List[int]]) -> Optional[List[int]]:
+    """
+    Resuelve el tablero con Gauss mod 2 o, si es grande, con el método polinomial.
+    
+    Los tableros grandes del juego se generan siempre resolubles (ver
+    configurar_tablero_inicial), igual que todos los estados que se
+    alcanzan desde ellos presionando luces. Si aun así el método polinomial
+    no encuentra solución se retorna None (y la caché lo recuerda).
+    """
+    if len(matriz) <= TAMANO_MAXIMO_GAUSS:
+        return resolver_lights_out(matriz)
+    return resolver_lights_out_polinomial(matriz)
+
+
+# Caché de soluciones compartida por todas las partidas: evita re-resolver
+# estados repetidos (por ejemplo, al presionar una luz y volver a presionarla)
+CACHE_SOLUCIONES = CacheResultados(capacidad=4096, resolver=resolver_tablero)
+
+
 # ===================================================================
 # PARTE 2: INTERFAZ VISUAL PYGAME
 # ===================================================================
 
+class RegistroConsola:
+    """
+    Salida por consola con límite de frecuencia.
+    
+    Los mensajes se acumulan y se imprimen como mucho max_lineas por
+    intervalo; el resto se resume en una línea y se muestra el último.
+    Así una reproducción de miles de presiones no inunda la terminal ni
+    frena el bucle.
+    """
+    
+    def __init__(self, intervalo: float = 0.5, max_lineas: int = 5):
+        self.intervalo = intervalo
+        self.max_lineas = max_lineas
+        self._pendientes: List[str] = []
+        self._omitidos = 0
+        self._ultimo: Optional[str] = None
+        self._ultimo_vaciado = 0.0
+    
+    def registrar(self, mensaje: str):
+        """Agrega un mensaje al búfer (se imprime en el próximo vaciado)."""
+        if len(self._pendientes) < self.max_lineas:
+            self._pendientes.append(mensaje)
+        else:
+            if self._ultimo is not None:
+                self._omitidos += 1
+            self._ultimo = mensaje
+    
+    def vaciar(self, forzar: bool = False):
+        """Imprime lo acumulado si pasó el intervalo (o siempre, si forzar)."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_vaciado < self.intervalo:
+            return
+        if not self._pendientes:
+            return
+        for mensaje in self._pendientes:
+            print(mensaje)
+        if self._omitidos:
+            print(f"   ... ({self._omitidos} mensajes más)")
+        if self._ultimo is not None:
+            print(self._ultimo)
+        self._pendientes.clear()
+        self._omitidos = 0
+        self._ultimo = None
+        self._ultimo_vaciado = ahora
+
+
+class ReproductorPresiones:
+    """
+    Reproduce una lista de presiones de a poco, cuadro por cuadro.
+    
+    En lugar de aplicar toda la solución dentro del manejador de eventos,
+    las presiones se encolan y en cada cuadro se aplican
+    presiones_por_cuadro (puede ser fraccionario: 0.25 = una cada 4 cuadros).
+    
+    Parámetros:
+    -----------
+    presionar : Callable[[int, int], None]
+        Función que aplica una presión en (fila, columna)
+    presiones_por_cuadro : float
+        Velocidad inicial de reproducción
+    """
+    
+    VELOCIDAD_MINIMA = 1 / 32
+    VELOCIDAD_MAXIMA = 4096
+    
+    def __init__(self, presionar: Callable[[int, int], None], presiones_por_cuadro: float = 1.0):
+        self._presionar = presionar
+        self.presiones_por_cuadro = presiones_por_cuadro
+        self._cola: deque = deque()
+        self._credito = 0.0
+        self._al_terminar: Optional[Callable[[], None]] = None
+        self.total = 0
+    
+    @property
+    def activo(self) -> bool:
+        return bool(self._cola)
+    
+    @property
+    def aplicadas(self) -> int:
+        return self.total - len(self._cola)
+    
+    def encolar(self, presiones: List[Tuple[int, int]], al_terminar: Optional[Callable[[], None]] = None):
+        """Reemplaza la reproducción actual por una nueva lista de presiones."""
+        self._cola = deque(presiones)
+        self.total = len(self._cola)
+        self._credito = 0.0
+        self._al_terminar = al_terminar
+        if not self._cola:
+            self._terminar()
+    
+    def cancelar(self) -> int:
+        """Descarta las presiones pendientes; retorna cuántas quedaron sin aplicar."""
+        pendientes = len(self._cola)
+        self._cola.clear()
+        self._al_terminar = None
+        return pendientes
+    
+    def cambiar_velocidad(self, factor: float):
+        """Multiplica la velocidad (dentro de los límites)."""
+        self.presiones_por_cuadro = min(self.VELOCIDAD_MAXIMA,
+                                        max(self.VELOCIDAD_MINIMA, self.presiones_por_cuadro * factor))
+    
+    def avanzar(self) -> int:
+        """Aplica las presiones que corresponden a este cuadro; retorna cuántas aplicó."""
+        if not self._cola:
+            return 0
+        self._credito += self.presiones_por_cuadro
+        cantidad = min(int(self._credito), len(self._cola))
+        self._credito -= cantidad
+        for _ in range(cantidad):
+            fila, columna = self._cola.popleft()
+            self._presionar(fila, columna)
+        if not self._cola:
+            self._terminar()
+        return cantidad
+    
+    def _terminar(self):
+        al_terminar, self._al_terminar = self._al_terminar, None
+        if al_terminar:
+            al_terminar()
+
+
+class HistorialPresiones:
+    """
+    Pila de deshacer/rehacer que guarda solo el índice de cada presión.
+
+    Presionar una luz es su propia inversa: deshacer o rehacer es volver a
+    alternar la misma cruz de luces, sin copiar el tablero. Para saltar a
+    cualquier punto del historial se toman las presiones intermedias; las
+    que aparecen una cantidad impar de veces forman el vector de presiones
+    acumulado entre ambos puntos y basta aplicar cada una una sola vez.
+
+    Los índices se guardan en un array('I'): 4 bytes por presión, sin
+    importar el tamaño del tablero.
+    """
+
+    def __init__(self):
+        self._indices = array("I")
+        self.posicion = 0  # Presiones aplicadas (el resto se puede rehacer)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @property
+    def puede_deshacer(self) -> bool:
+        return self.posicion > 0
+
+    @property
+    def puede_rehacer(self) -> bool:
+        return self.posicion < len(self._indices)
+
+    def registrar(self, indice: int):
+        """Agrega una presión nueva (descarta lo que se podía rehacer)."""
+        self.descartar_rehacer()
+        self._indices.append(indice)
+        self.posicion += 1
+
+    def descartar_rehacer(self):
+        """Olvida las presiones posteriores a la posición actual."""
+        if self.posicion < len(self._indices):
+            del self._indices[self.posicion:]
+
+    def deshacer(self) -> Optional[int]:
+        """Índice de la presión a revertir, o None si no hay nada que deshacer."""
+        if not self.posicion:
+            return None
+        self.posicion -= 1
+        return self._indices[self.posicion]
+
+    def rehacer(self) -> Optional[int]:
+        """Índice de la presión a repetir, o None si no hay nada que rehacer."""
+        if self.posicion == len(self._indices):
+            return None
+        self.posicion += 1
+        return self._indices[self.posicion - 1]
+
+    def saltar(self, posicion: int) -> List[int]:
+        """
+        Mueve el historial a `posicion` (0 = tablero inicial).
+
+        Retorna:
+        --------
+        List[int]
+            Índices a presionar una vez para pasar del estado actual al pedido
+        """
+        if not 0 <= posicion <= len(self._indices):
+            raise IndexError(f"Posición fuera del historial (0 a {len(self._indices)})")
+        desde, hasta = sorted((self.posicion, posicion))
+        self.posicion = posicion
+        if desde == hasta:
+            return []
+        tramo = np.frombuffer(self._indices, dtype=np.uint32)[desde:hasta]
+        indices, veces = np.unique(tramo, return_counts=True)
+        return indices[veces & 1 == 1].tolist()
+
+    def limpiar(self):
+        """Vacía el historial (nuevo tablero)."""
+        del self._indices[:]
+        self.posicion = 0
+
+
+# Evento con el que el hilo de resolución entrega cada resultado
+EVENTO_SOLUCION = pygame.USEREVENT + 1
+
+
+class ResolvedorSegundoPlano:
+    """
+    Resuelve tableros en un hilo aparte y entrega los resultados como eventos.
+    
+    Cada solicitud tiene una clave ("inicial", "actual") y un número de
+    orden. Solo el último pedido de cada clave está vigente: si se pide de
+    nuevo o se cancela, el resultado anterior se descarta al llegar.
+    
+    Parámetros:
+    -----------
+    resolver : Callable[[List[List[int]]], List[int]]
+        Función matriz → vector solución
+    tipo_evento : int
+        Tipo del evento de Pygame que se publica con cada resultado
+    """
+    
+    def __init__(self, resolver: Callable[[List[List[int]]], List[int]],
+                 tipo_evento: int = EVENTO_SOLUCION):
+        self._resolver = resolver
+        self.tipo_evento = tipo_evento
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resolvedor")
+        self._vigentes: Dict[str, Tuple[int, Future, float]] = {}
+        self._siguiente = 0
+    
+    def solicitar(self, clave: str, tablero: List[List[int]]) -> int:
+        """Encola la resolución de una copia del tablero; retorna el número de orden."""
+        self.cancelar(clave)
+        self._siguiente += 1
+        orden = self._siguiente
+        copia = [fila[:] for fila in tablero]
+        futuro = self._ejecutor.submit(self._trabajar, clave, orden, copia)
+        self._vigentes[clave] = (orden, futuro, time.monotonic())
+        return orden
+    
+    def _trabajar(self, clave: str, orden: int, tablero: List[List[int]]):
+        try:
+            solucion, error = self._resolver(tablero), None
+        except Exception as e:
+            solucion, error = None, str(e)
+        try:
+            pygame.event.post(pygame.event.Event(self.tipo_evento, clave=clave, orden=orden,
+                                                 solucion=solucion, error=error))
+        except pygame.error:
+            pass  # La ventana ya se cerró
+    
+    def cancelar(self, clave: str):
+        """Descarta el pedido vigente de esa clave (si ya se está calculando, se ignora al llegar)."""
+        vigente = self._vigentes.pop(clave, None)
+        if vigente is not None:
+            vigente[1].cancel()
+    
+    def recibir(self, evento) -> bool:
+        """Indica si el evento corresponde al pedido vigente (y lo da por terminado)."""
+        vigente = self._vigentes.get(evento.clave)
+        if vigente is None or vigente[0] != evento.orden:
+            return False
+        del self._vigentes[evento.clave]
+        return True
+    
+    def pendiente(self, clave: str) -> bool:
+        return clave in self._vigentes
+    
+    def espera(self) -> Optional[float]:
+        """Segundos desde el pedido pendiente más antiguo, o None si no hay."""
+        if not self._vigentes:
+            return None
+        return time.monotonic() - min(inicio for _, _, inicio in self._vigentes.values())
+    
+    def cerrar(self):
+        """Detiene el hilo sin esperar al cálculo en curso."""
+        self._vigentes.clear()
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+
+
 class LightsOutGame:
     """
     Clase principal del juego Lights Out con interfaz Pygame.
@@ -189,7 +503,10 @@ class LightsOutGame:
     - Indicador de victoria
     """
     
-    def __init__(self, tamano_tablero: int = 3):
+    LADO_MAXIMO = 760          # Lado máximo del tablero en píxeles
+    CELDA_MINIMA_CLASICA = 32  # Con celdas más chicas se usa la textura
+    
+    def __init__(self, tamano_tablero: int = 3, grabar: Optional[str] = None):
         """
         Inicializa el juego.
         
@@ -197,16 +514,30 @@ class LightsOutGame:
         -----------
         tamano_tablero : int
             Tamaño del tablero (n×n)
+        grabar : Optional[str]
+            Archivo donde registrar las sesiones (ver sesiones.py)
         """
         # Configuración del juego
         self.n = tamano_tablero
-        self.tamano_celda = 80
         self.margen = 10
         self.tamano_boton = 40
         
+        # Tamaño de celda adaptativo: celdas de hasta 80 px mientras el tablero
+        # quepa en LADO_MAXIMO; si las celdas quedan muy chicas se dibuja el
+        # tablero como una textura escalada (sin márgenes entre celdas)
+        self.tamano_celda = min(80, (self.LADO_MAXIMO - (self.n + 1) * self.margen) // self.n)
+        self.usar_textura = self.tamano_celda < self.CELDA_MINIMA_CLASICA
+        if self.usar_textura:
+            lado_disponible = self.LADO_MAXIMO - 2 * self.margen
+            self.tamano_celda = max(1, lado_disponible // self.n)
+            self.lado_textura = min(self.n * self.tamano_celda, lado_disponible)
+        
         # Dimensiones de la ventana - calculadas dinámicamente
-        self.ancho_tablero = self.n * self.tamano_celda + (self.n + 1) * self.margen
-        self.alto_tablero = self.n * self.tamano_celda + (self.n + 1) * self.margen
+        if self.usar_textura:
+            self.ancho_tablero = self.lado_textura + 2 * self.margen
+        else:
+            self.ancho_tablero = self.n * self.tamano_celda + (self.n + 1) * self.margen
+        self.alto_tablero = self.ancho_tablero
         
         # Asegurar ancho mínimo para botones y UI
         ancho_minimo_botones = 420  # Espacio para 3 botones
@@ -223,6 +554,23 @@ class LightsOutGame:
         self.solucion_inicial = None  # Solución para el estado inicial
         self.mostrando_solucion = False
         self.juego_ganado = False
+        self.version_tablero = 0  # Cambia con cada modificación (invalida la textura)
+        
+        # Resoluciones en segundo plano: qué hacer cuando llegue cada resultado
+        self.resolvedor = ResolvedorSegundoPlano(CACHE_SOLUCIONES.resolver)
+        self._accion_actual: Optional[str] = None  # "mostrar" o "aplicar"
+        self._reproducir_inicial = False
+        
+        # Deshacer/rehacer: solo los índices de las presiones
+        self.historial = HistorialPresiones()
+        
+        # Registro binario de las partidas (tablero inicial y cada presión)
+        self.grabador = GrabadorSesiones(grabar) if grabar else None
+        
+        # Reproducción animada de soluciones (no bloquea el bucle de eventos)
+        self.registro = RegistroConsola()
+        self.reproductor = ReproductorPresiones(self._presionar_reproduccion,
+                                                presiones_por_cuadro=max(0.25, self.n * self.n / 120))
         
         # Configurar Pygame
         try:
@@ -252,6 +600,9 @@ class LightsOutGame:
         self.COLOR_BOTON = (70, 130, 180)
         self.COLOR_BOTON_HOVER = (100, 160, 210)
         
+        if self.usar_textura:
+            self._preparar_textura()
+        
         # Configurar tablero inicial (ejemplo del enunciado)
         self.configurar_tablero_inicial()
     
@@ -262,10 +613,16 @@ class LightsOutGame:
         """
         import random
         
-        # Generar configuración aleatoria
-        for i in range(self.n):
-            for j in range(self.n):
-                self.tablero[i][j] = random.choice([0, 1])
+        if self.n > TAMANO_MAXIMO_GAUSS:
+            # Tableros grandes: aplicar presiones aleatorias garantiza que haya
+            # solución (con luces al azar, muchos tamaños no la tendrían)
+            presiones = random.getrandbits(self.n * self.n)
+            self.tablero = desempaquetar_tablero(producto_A(presiones, self.n), self.n)
+        else:
+            # Generar configuración aleatoria
+            for i in range(self.n):
+                for j in range(self.n):
+                    self.tablero[i][j] = random.choice([0, 1])
         
         # Asegurar que no todas las luces estén apagadas (sería un juego trivial)
         luces_encendidas = sum(sum(fila) for fila in self.tablero)
@@ -277,9 +634,14 @@ class LightsOutGame:
         
         # Guardar copia del estado inicial para auto-resolver
         self.tablero_inicial = [fila[:] for fila in self.tablero]
+        self.historial.limpiar()
+        self.version_tablero += 1
+        if self.grabador:
+            self.grabador.iniciar(self.n, empaquetar_tablero(self.tablero_inicial))
         
-        # Calcular la solución para el estado inicial
-        self.solucion_inicial = resolver_lights_out(self.tablero_inicial)
+        # Calcular la solución para el estado inicial (llega con EVENTO_SOLUCION)
+        self.solucion_inicial = None
+        self.resolvedor.solicitar("inicial", self.tablero_inicial)
         print(f"Nuevo tablero aleatorio generado")
         print(f"Luces encendidas: {sum(sum(fila) for fila in self.tablero)}")
     
@@ -302,6 +664,14 @@ class LightsOutGame:
         # Obtener offset si existe (para tablero centrado)
         offset_x = getattr(self, 'offset_tablero_x', 0)
         
+        if self.usar_textura:
+            # Con textura la celda sale directamente de la proporción
+            x -= offset_x + self.margen
+            y -= self.margen
+            if 0 <= x < self.lado_textura and 0 <= y < self.lado_textura:
+                return (y * self.n // self.lado_textura, x * self.n // self.lado_textura)
+            return None
+        
         for i in range(self.n):
             for j in range(self.n):
                 # Calcular posición de la celda (con offset)
@@ -315,7 +685,7 @@ class LightsOutGame:
         
         return None
     
-    def presionar_luz(self, fila: int, columna: int):
+    def presionar_luz(self, fila: int, columna: int, verificar: bool = True, automatica: bool = False):
         """
         Simula presionar una luz, cambiando su estado y el de sus adyacentes.
         
@@ -329,7 +699,21 @@ class LightsOutGame:
             Fila de la luz presionada
         columna : int
             Columna de la luz presionada
+        verificar : bool
+            Si es False no se revisa la victoria (la reproducción lo hace una
+            vez por cuadro)
+        automatica : bool
+            La presión la hizo el reproductor de soluciones (para el registro)
         """
+        self._alternar(fila, columna)
+        
+        if self.grabador:
+            self.grabador.presion(fila * self.n + columna, automatica)
+        self.historial.registrar(fila * self.n + columna)
+        self._tablero_modificado(verificar)
+    
+    def _alternar(self, fila: int, columna: int):
+        """Cambia la luz (fila, columna) y sus adyacentes, sin registrar nada."""
         # Cambiar luz actual
         self.tablero[fila][columna] = 1 - self.tablero[fila][columna]
         
@@ -343,20 +727,98 @@ class LightsOutGame:
             # Solo cambiar si la posición está dentro del tablero
             if 0 <= nueva_fila < self.n and 0 <= nueva_columna < self.n:
                 self.tablero[nueva_fila][nueva_columna] = 1 - self.tablero[nueva_fila][nueva_columna]
-        
-        # Resetear indicadores
+    
+    def _tablero_modificado(self, verificar: bool = True):
+        """Resetea indicadores (una solución pedida para el estado anterior ya no sirve)."""
         self.mostrando_solucion = False
-        self.verificar_victoria()
+        self.version_tablero += 1
+        if self._accion_actual is not None:
+            self.resolvedor.cancelar("actual")
+            self._accion_actual = None
+        if verificar:
+            self.verificar_victoria()
+    
+    def _aplicar_presiones(self, indices: List[int]):
+        """Alterna las presiones indicadas fuera del historial (se graban como manuales)."""
+        for indice in indices:
+            self._alternar(*divmod(indice, self.n))
+            if self.grabador:
+                self.grabador.presion(indice, False)
+        self._tablero_modificado()
+    
+    def deshacer(self) -> bool:
+        """
+        Revierte la última presión (también las del reproductor).
+        
+        Retorna:
+        --------
+        bool
+            True si había algo que deshacer
+        """
+        self.cancelar_reproduccion()
+        indice = self.historial.deshacer()
+        if indice is None:
+            return False
+        self._aplicar_presiones([indice])
+        return True
+    
+    def rehacer(self) -> bool:
+        """Vuelve a aplicar la última presión deshecha; False si no hay ninguna."""
+        self.cancelar_reproduccion()
+        indice = self.historial.rehacer()
+        if indice is None:
+            return False
+        self._aplicar_presiones([indice])
+        return True
+    
+    def ir_a_historial(self, posicion: int):
+        """
+        Lleva el tablero al estado después de `posicion` presiones del historial.
+        
+        Parámetros:
+        -----------
+        posicion : int
+            0 = tablero inicial, len(self.historial) = última presión
+        """
+        self.cancelar_reproduccion()
+        self._aplicar_presiones(self.historial.saltar(posicion))
+    
+    def _presionar_reproduccion(self, fila: int, columna: int):
+        """Presión aplicada por el reproductor."""
+        self.presionar_luz(fila, columna, verificar=False, automatica=True)
+        self.registro.registrar(f"   Presionando luz ({fila},{columna})")
+    
+    def _presiones_de(self, solucion: List[int]) -> List[Tuple[int, int]]:
+        """Posiciones (fila, columna) a presionar según un vector solución."""
+        return [divmod(idx, self.n) for idx, valor in enumerate(solucion) if valor == 1]
+    
+    def actualizar_reproduccion(self):
+        """Avanza la reproducción un cuadro (se llama desde el bucle principal)."""
+        if self.reproductor.avanzar():
+            self.verificar_victoria()
+        self.registro.vaciar()
+    
+    def cancelar_reproduccion(self):
+        """Detiene la reproducción en curso dejando el tablero como esté."""
+        pendientes = self.reproductor.cancelar()
+        if pendientes:
+            self.verificar_victoria()
+            self.registro.registrar(f"Reproducción cancelada ({pendientes} presiones sin aplicar)")
     
     def verificar_victoria(self):
         """
         Verifica si el jugador ha ganado (todas las luces apagadas).
         """
-        self.juego_ganado = all(self.tablero[i][j] == 0 
-                              for i in range(self.n) 
-                              for j in range(self.n))
+        self.juego_ganado = not any(map(any, self.tablero))
     
-    def calcular_solucion(self):
+    def contar_luces(self) -> int:
+        """Luces encendidas (se recuenta solo si el tablero cambió)."""
+        if getattr(self, '_version_conteo', None) != self.version_tablero:
+            self._luces_encendidas = sum(map(sum, self.tablero))
+            self._version_conteo = self.version_tablero
+        return self._luces_encendidas
+    
+    def calcular_solucion(self, accion: str = "mostrar"):
         """
         Calcula la solución usando el módulo algebraico para el estado ACTUAL del tablero.
         
@@ -364,9 +826,45 @@ class LightsOutGame:
         1. Construcción del sistema lineal mod 2
         2. Resolución por eliminación de Gauss mod 2
         3. Retorna vector de presiones necesarias
+        
+        La resolución corre en un hilo aparte; el resultado llega como
+        EVENTO_SOLUCION y se procesa en recibir_solucion. Los estados ya
+        resueltos se toman de CACHE_SOLUCIONES.
+        
+        Parámetros:
+        -----------
+        accion : str
+            Qué hacer al recibir la solución: "mostrar" o "aplicar"
+        """
+        self._accion_actual = accion
+        self.resolvedor.solicitar("actual", self.tablero)
+        self.registro.registrar("Calculando solución para el estado actual...")
+    
+    def recibir_solucion(self, evento):
         """
-        self.solucion_calculada = resolver_lights_out(self.tablero)
-        print(f"Solución para estado actual: {self.solucion_calculada}")
+        Procesa un resultado del hilo de resolución (EVENTO_SOLUCION).
+        
+        Los resultados de pedidos cancelados o reemplazados se descartan.
+        """
+        if not self.resolvedor.recibir(evento):
+            return
+        if evento.error is not None or evento.solucion is None:
+            motivo = "el tablero no tiene solución" if evento.error is None else evento.error
+            self.registro.registrar(f"Error al resolver: {motivo}")
+            self._accion_actual = None
+            self._reproducir_inicial = False
+            return
+        
+        if evento.clave == "inicial":
+            self.solucion_inicial = evento.solucion
+            if self._reproducir_inicial:
+                self._reproducir_inicial = False
+                self.aplicar_solucion_inicial()
+            return
+        
+        self.solucion_calculada = evento.solucion
+        self.version_tablero += 1
+        self.registro.registrar(f"Solución para estado actual: {sum(self.solucion_calculada)} presiones")
         
         # Convertir vector lineal a matriz para visualización
         solucion_matriz = []
@@ -377,9 +875,15 @@ class LightsOutGame:
                 fila.append(self.solucion_calculada[idx])
             solucion_matriz.append(fila)
         
-        print("Solución por filas (estado actual):")
+        self.registro.registrar("Solución por filas (estado actual):")
         for i, fila in enumerate(solucion_matriz):
-            print(f"   Fila {i+1}: {fila}")
+            self.registro.registrar(f"   Fila {i+1}: {fila}")
+        
+        accion, self._accion_actual = self._accion_actual, None
+        if accion == "mostrar":
+            self.mostrando_solucion = True
+        elif accion == "aplicar":
+            self.aplicar_solucion_automatica()
     
     def aplicar_solucion_automatica(self):
         """
@@ -387,57 +891,71 @@ class LightsOutGame:
         
         IMPORTANTE: Esta función calcula la solución para el estado ACTUAL del tablero,
         no para el estado inicial. Es útil para resolver el estado actual.
+        
+        Las presiones se reproducen de a poco desde el bucle principal
+        (ver actualizar_reproduccion), sin bloquear la ventana.
         """
         if self.solucion_calculada is None:
-            self.calcular_solucion()
-        
-        print("Aplicando solución para estado actual...")
-        
-        # Aplicar cada presión indicada en la solución
-        for i in range(self.n):
-            for j in range(self.n):
-                idx = i * self.n + j
-                if self.solucion_calculada[idx] == 1:
-                    print(f"   Presionando luz ({i},{j})")
-                    self.presionar_luz(i, j)
+            # Se aplica cuando llegue la solución (ver recibir_solucion)
+            self.calcular_solucion(accion="aplicar")
+            return
         
-        print("Solución aplicada")
+        self.registro.registrar("Aplicando solución para estado actual...")
+        self.reproductor.encolar(self._presiones_de(self.solucion_calculada),
+                                 al_terminar=lambda: self.registro.registrar("Solución aplicada"))
     
     def aplicar_solucion_inicial(self):
         """
         Aplica la solución para resolver el juego desde el estado inicial.
         
-        Esta función reinicia el tablero al estado inicial y aplica la solución
+        Esta función reinicia el tablero al estado inicial y reproduce la solución
         que llevará directamente a todas las luces apagadas.
+        
+        La vuelta al inicio es un salto del historial y las presiones de la
+        solución se registran como cualquier otra, así que se pueden
+        deshacer; lo que se podía rehacer se descarta al saltar.
         """
         if self.solucion_inicial is None:
-            print("No hay solución inicial calculada")
+            if self.resolvedor.pendiente("inicial"):
+                # Se aplica cuando llegue la solución (ver recibir_solucion)
+                self._reproducir_inicial = True
+                self.registro.registrar("Esperando la solución del estado inicial...")
+            else:
+                print("No hay solución inicial calculada")
             return
         
-        print("Reiniciando al estado inicial y aplicando solución...")
-        
-        # Reiniciar al estado inicial
-        self.tablero = [fila[:] for fila in self.tablero_inicial]
-        
-        # Aplicar cada presión indicada en la solución inicial
-        for i in range(self.n):
-            for j in range(self.n):
-                idx = i * self.n + j
-                if self.solucion_inicial[idx] == 1:
-                    print(f"   Presionando luz ({i},{j})")
-                    self.presionar_luz(i, j)
+        self.cancelar_reproduccion()
+        self.registro.registrar("Reiniciando al estado inicial y aplicando solución...")
         
-        print("Solución inicial aplicada - ¡Juego resuelto!")
+        # Volver al estado inicial deshaciendo el historial (sin copiar el tablero)
+        for indice in self.historial.saltar(0):
+            self._alternar(*divmod(indice, self.n))
+        self.historial.descartar_rehacer()
+        self.version_tablero += 1
+        if self.grabador:
+            self.grabador.reinicio()
+        self.verificar_victoria()
+        self.resolvedor.cancelar("actual")
+        self._accion_actual = None
         
         # Resetear estados
         self.solucion_calculada = None
         self.mostrando_solucion = False
+        
+        # Reproducir cada presión indicada en la solución inicial
+        self.reproductor.encolar(
+            self._presiones_de(self.solucion_inicial),
+            al_terminar=lambda: self.registro.registrar("Solución inicial aplicada - ¡Juego resuelto!"))
     
     def reiniciar_juego(self):
         """
         Reinicia el juego generando un tablero aleatorio completamente nuevo.
         """
         print("Generando nuevo tablero aleatorio...")
+        self.reproductor.cancelar()
+        self.resolvedor.cancelar("actual")
+        self._accion_actual = None
+        self._reproducir_inicial = False
         self.configurar_tablero_inicial()  # Esto genera un nuevo tablero aleatorio
         self.solucion_calculada = None
         self.mostrando_solucion = False
@@ -455,6 +973,10 @@ class LightsOutGame:
         # Obtener offset si existe (para centrar el tablero)
         offset_x = getattr(self, 'offset_tablero_x', 0)
         
+        if self.usar_textura:
+            self._dibujar_tablero_textura(offset_x + self.margen, self.margen)
+            return
+        
         for i in range(self.n):
             for j in range(self.n):
                 # Calcular posición de la celda (con offset para centrar)
@@ -480,6 +1002,50 @@ class LightsOutGame:
                 texto_rect = texto.get_rect(center=(x + self.tamano_celda//2, y + self.tamano_celda//2))
                 self.pantalla.blit(texto, texto_rect)
     
+    def _preparar_textura(self):
+        """
+        Crea las superficies del dibujo por textura.
+        
+        El tablero se guarda como una superficie de n×n píxeles (un píxel por
+        luz) que se actualiza con surfarray y se escala a la ventana. La
+        rejilla entre celdas se dibuja una sola vez en otra superficie.
+        """
+        # Índice de color: estado de la luz + 2 si se presiona según la solución
+        self._paleta = np.array([self.COLOR_LUZ_APAGADA, self.COLOR_LUZ_ENCENDIDA,
+                                 self.COLOR_SOLUCION, self.COLOR_SOLUCION], dtype=np.uint8)
+        self._superficie_tablero = pygame.Surface((self.n, self.n))
+        self._tablero_escalado = None
+        self._version_textura = None
+        
+        self._rejilla = None
+        if self.tamano_celda >= 4 and self.n * self.tamano_celda == self.lado_textura:
+            self._rejilla = pygame.Surface((self.lado_textura, self.lado_textura), pygame.SRCALPHA)
+            color_rejilla = (*self.COLOR_FONDO, 255)
+            for k in range(self.n + 1):
+                pos = min(k * self.tamano_celda, self.lado_textura - 1)
+                pygame.draw.line(self._rejilla, color_rejilla, (pos, 0), (pos, self.lado_textura - 1))
+                pygame.draw.line(self._rejilla, color_rejilla, (0, pos), (self.lado_textura - 1, pos))
+    
+    def _dibujar_tablero_textura(self, x: int, y: int):
+        """Dibuja el tablero como textura; solo se recalcula si el tablero cambió."""
+        version = (self.version_tablero, self.mostrando_solucion)
+        if version != self._version_textura:
+            indices = np.asarray(self.tablero, dtype=np.uint8)
+            if self.mostrando_solucion and self.solucion_calculada:
+                indices = indices + 2 * np.asarray(self.solucion_calculada, dtype=np.uint8).reshape(self.n, self.n)
+            # surfarray indexa (x, y): se trasponen filas y columnas
+            pygame.surfarray.blit_array(self._superficie_tablero, self._paleta[indices].swapaxes(0, 1))
+            lado = (self.lado_textura, self.lado_textura)
+            if self.n * self.tamano_celda == self.lado_textura:
+                self._tablero_escalado = pygame.transform.scale(self._superficie_tablero, lado)
+            else:
+                self._tablero_escalado = pygame.transform.smoothscale(self._superficie_tablero, lado)
+            self._version_textura = version
+        
+        self.pantalla.blit(self._tablero_escalado, (x, y))
+        if self._rejilla is not None:
+            self.pantalla.blit(self._rejilla, (x, y))
+    
     def dibujar_interfaz(self):
         """
         Dibuja la interfaz completa del juego.
@@ -540,16 +1106,28 @@ class LightsOutGame:
             texto_estado = "¡GANASTE! Todas las luces apagadas"
             color_estado = (0, 255, 0)
         else:
-            luces_encendidas = sum(sum(fila) for fila in self.tablero)
-            texto_estado = f"Luces encendidas: {luces_encendidas}"
+            texto_estado = f"Luces encendidas: {self.contar_luces()}"
             color_estado = self.COLOR_TEXTO
         
         superficie_estado = self.fuente_mediana.render(texto_estado, True, color_estado)
         estado_rect = superficie_estado.get_rect(center=(self.ancho_ventana // 2, y_info))
         self.pantalla.blit(superficie_estado, estado_rect)
         
-        # Información adicional si se muestra la solución - centrada
-        if self.mostrando_solucion:
+        # Progreso del cálculo o de la reproducción (o información de la solución) - centrada
+        espera = self.resolvedor.espera()
+        if espera is not None:
+            giro = "|/-\\"[int(espera * 8) % 4]
+            info_calculo = f"{giro} Calculando solución... {espera:.1f} s"
+            superficie_info = self.fuente_mediana.render(info_calculo, True, self.COLOR_TEXTO)
+            info_rect = superficie_info.get_rect(center=(self.ancho_ventana // 2, y_info + 25))
+            self.pantalla.blit(superficie_info, info_rect)
+        elif self.reproductor.activo:
+            info_reproduccion = (f"Reproduciendo {self.reproductor.aplicadas}/{self.reproductor.total} "
+                                 f"({self.reproductor.presiones_por_cuadro:g} por cuadro, +/- velocidad, C cancelar)")
+            superficie_info = self.fuente_mediana.render(info_reproduccion, True, self.COLOR_TEXTO)
+            info_rect = superficie_info.get_rect(center=(self.ancho_ventana // 2, y_info + 25))
+            self.pantalla.blit(superficie_info, info_rect)
+        elif self.mostrando_solucion:
             info_solucion = "Verde = presionar según álgebra mod 2"
             superficie_info = self.fuente_mediana.render(info_solucion, True, (0, 255, 0))
             info_rect = superficie_info.get_rect(center=(self.ancho_ventana // 2, y_info + 25))
@@ -572,16 +1150,20 @@ class LightsOutGame:
         if evento.type == pygame.QUIT:
             return False
         
+        elif evento.type == EVENTO_SOLUCION:
+            self.recibir_solucion(evento)
+        
         elif evento.type == pygame.MOUSEBUTTONDOWN:
             if evento.button == 1:  # Click izquierdo
                 pos_mouse = evento.pos
                 
                 # Verificar clicks en botones
                 if hasattr(self, 'rect_boton_solucion') and self.rect_boton_solucion.collidepoint(pos_mouse):
-                    # Mostrar/ocultar solución
-                    if not self.mostrando_solucion:
-                        self.calcular_solucion()
-                    self.mostrando_solucion = not self.mostrando_solucion
+                    # Mostrar/ocultar solución (se muestra cuando llega el resultado)
+                    if self.mostrando_solucion:
+                        self.mostrando_solucion = False
+                    else:
+                        self.calcular_solucion(accion="mostrar")
                     
                 elif hasattr(self, 'rect_boton_resolver') and self.rect_boton_resolver.collidepoint(pos_mouse):
                     # Resolver juego completo
@@ -595,6 +1177,7 @@ class LightsOutGame:
                     # Click en el tablero
                     posicion_celda = self.obtener_posicion_celda(pos_mouse)
                     if posicion_celda and not self.juego_ganado:
+                        self.cancelar_reproduccion()
                         fila, columna = posicion_celda
                         self.presionar_luz(fila, columna)
                         print(f"Luz presionada: ({fila},{columna})")
@@ -606,13 +1189,30 @@ class LightsOutGame:
                 print("Juego reiniciado")
             elif evento.key == pygame.K_s:
                 # Tecla S para mostrar solución
-                if not self.mostrando_solucion:
-                    self.calcular_solucion()
-                self.mostrando_solucion = not self.mostrando_solucion
-                print(f"Solución {'mostrada' if self.mostrando_solucion else 'ocultada'}")
+                if self.mostrando_solucion:
+                    self.mostrando_solucion = False
+                    print("Solución ocultada")
+                else:
+                    self.calcular_solucion(accion="mostrar")
             elif evento.key == pygame.K_g:
                 # Tecla G para resolver juego completo
                 self.aplicar_solucion_inicial()
+            elif evento.key == pygame.K_z:
+                # Tecla Z para deshacer, Y para rehacer
+                self.deshacer()
+            elif evento.key == pygame.K_y:
+                self.rehacer()
+            elif evento.key in (pygame.K_HOME, pygame.K_END):
+                # Inicio/Fin: principio o final del historial
+                self.ir_a_historial(0 if evento.key == pygame.K_HOME else len(self.historial))
+            elif evento.key == pygame.K_c:
+                # Tecla C para cancelar la reproducción
+                self.cancelar_reproduccion()
+            elif evento.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                # Teclas +/- para cambiar la velocidad de reproducción
+                self.reproductor.cambiar_velocidad(2)
+            elif evento.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.reproductor.cambiar_velocidad(0.5)
             elif evento.key == pygame.K_ESCAPE:
                 # ESC para salir
                 print("Saliendo del juego...")
@@ -636,6 +1236,8 @@ class LightsOutGame:
             print("  • 'Resolver Juego': resolver completamente el juego")
             print("  • 'Reiniciar': generar nuevo tablero aleatorio")
             print("  • Teclas: R (reiniciar), S (ver solución), G (resolver juego)")
+            print("  • Historial: Z (deshacer), Y (rehacer), Inicio/Fin (principio/final)")
+            print("  • Durante la reproducción: +/- (velocidad), C (cancelar)")
             print("  • ESC o cerrar ventana: salir")
             print("=" * 50)
             
@@ -649,6 +1251,9 @@ class LightsOutGame:
                 if not ejecutando:
                     break
                 
+                # Aplicar las presiones pendientes de este cuadro
+                self.actualizar_reproduccion()
+                
                 # Dibujar interfaz
                 try:
                     self.dibujar_interfaz()
@@ -661,6 +1266,7 @@ class LightsOutGame:
                 # Controlar FPS
                 reloj.tick(60)
             
+            self.registro.vaciar(forzar=True)
             print("Cerrando juego...")
             
         except KeyboardInterrupt:
@@ -670,6 +1276,9 @@ class LightsOutGame:
             import traceback
             traceback.print_exc()
         finally:
+            self.resolvedor.cerrar()
+            if self.grabador:
+                self.grabador.cerrar()
             try:
                 pygame.quit()
             except:
@@ -684,6 +1293,13 @@ def main():
     """
     Función principal que inicia el juego.
     """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Lights Out con Pygame")
+    parser.add_argument("--grabar", metavar="ARCHIVO",
+                        help="Registrar las sesiones en ARCHIVO (analizar con sesiones.py)")
+    argumentos = parser.parse_args()
+    
     print("LIGHTS OUT - PROYECTO ÁLGEBRA APLICADA")
     print("Implementación con Pygame + Resolución Algebraica mod 2")
     print()
@@ -701,9 +1317,6 @@ def main():
         if tamano < 2:
             print("El tamaño debe ser al menos 2x2, usando 3x3 por defecto")
             tamano = 3
-        elif tamano > 8:
-            print("El tamaño máximo recomendado es 8x8, usando 8x8")
-            tamano = 8
             
     except ValueError:
         print("Entrada inválida, usando 3x3 por defecto")
@@ -717,7 +1330,7 @@ def main():
     
     try:
         # Crear e iniciar el juego
-        juego = LightsOutGame(tamano)
+        juego = LightsOutGame(tamano, grabar=argumentos.grabar)
         juego.ejecutar()
     except pygame.error as e:
         print(f"Error de Pygame: {e}")
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - MÉTRICAS DEL SOLVER
+Registro liviano de contadores y temporizadores por etapa
+
+El registro está deshabilitado por defecto: en ese estado contar() y
+detener() retornan de inmediato e iniciar() retorna None, por lo que el
+costo en el camino crítico es una comprobación de un atributo.
+
+Las instantáneas se pueden exportar a un archivo local en JSON o en el
+formato de texto de Prometheus.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RegistroMetricas:
+    """
+    Registro de contadores y temporizadores.
+
+    Contadores: enteros acumulados (intercambios de filas, sumas de filas, ...)
+    Temporizadores: número de mediciones, tiempo total y máximo en segundos
+    """
+
+    def __init__(self, prefijo: str = "lights_out"):
+        self.prefijo = prefijo
+        self.habilitado = False
+        self._candado = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Borra todos los valores acumulados."""
+        with self._candado:
+            self._contadores: Dict[str, int] = {}
+            self._temporizadores: Dict[str, Tuple[int, float, float]] = {}
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        """Suma cantidad al contador nombre (si el registro está habilitado)."""
+        if not self.habilitado:
+            return
+        with self._candado:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + cantidad
+
+    def registrar_tiempo(self, nombre: str, segundos: float):
+        """Agrega una medición de duración al temporizador nombre."""
+        if not self.habilitado:
+            return
+        with self._candado:
+            conteo, total, maximo = self._temporizadores.get(nombre, (0, 0.0, 0.0))
+            self._temporizadores[nombre] = (conteo + 1, total + segundos, max(maximo, segundos))
+
+    def iniciar(self) -> Optional[float]:
+        """
+        Marca de tiempo de inicio de una etapa (None si está deshabilitado).
+
+        Uso:
+        ----
+        inicio = REGISTRO.iniciar()
+        ...
+        REGISTRO.detener("eliminacion", inicio)
+        """
+        return time.perf_counter() if self.habilitado else None
+
+    def detener(self, nombre: str, inicio: Optional[float]):
+        """Registra la duración desde la marca de iniciar()."""
+        if inicio is not None:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio)
+
+    def instantanea(self) -> dict:
+        """Copia de los valores actuales como diccionario."""
+        with self._candado:
+            return {
+                "contadores": dict(self._contadores),
+                "temporizadores": {
+                    nombre: {"conteo": conteo, "total_segundos": total, "max_segundos": maximo}
+                    for nombre, (conteo, total, maximo) in self._temporizadores.items()
+                },
+            }
+
+    def formato_prometheus(self) -> str:
+        """Instantánea en formato de texto de Prometheus."""
+        datos = self.instantanea()
+        lineas = []
+        for nombre, valor in sorted(datos["contadores"].items()):
+            metrica = f"{self.prefijo}_{nombre}_total"
+            lineas.append(f"# TYPE {metrica} counter")
+            lineas.append(f"{metrica} {valor}")
+        for nombre, valores in sorted(datos["temporizadores"].items()):
+            metrica = f"{self.prefijo}_{nombre}_segundos"
+            lineas.append(f"# TYPE {metrica} summary")
+            lineas.append(f"{metrica}_sum {valores['total_segundos']:.9f}")
+            lineas.append(f"{metrica}_count {valores['conteo']}")
+            lineas.append(f"# TYPE {metrica}_max gauge")
+            lineas.append(f"{metrica}_max {valores['max_segundos']:.9f}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta: str, formato: str = "json"):
+        """
+        Escribe la instantánea en un archivo local.
+
+        Parámetros:
+        -----------
+        ruta : str
+            Archivo destino (se reemplaza de forma atómica)
+        formato : str
+            "json" o "prometheus"
+        """
+        if formato == "json":
+            contenido = json.dumps(self.instantanea(), indent=2, ensure_ascii=False)
+        elif formato == "prometheus":
+            contenido = self.formato_prometheus()
+        else:
+            raise ValueError(f"Formato desconocido: {formato}")
+
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+
+
+# Registro global usado por resolver_lights_out
+REGISTRO = RegistroMetricas()
+
+
+def habilitar_metricas():
+    """Activa la recolección de métricas en el registro global."""
+    REGISTRO.habilitado = True
+
+
+def deshabilitar_metricas():
+    """Desactiva la recolección de métricas en el registro global."""
+    REGISTRO.habilitado = False
@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - MOTOR VECTORIZADO POR TAMAÑO
+Factorización por tamaño de tablero y resolución de lotes con NumPy
+
+Para un tamaño n se hace UNA eliminación de Gauss-Jordan mod 2 sobre
+[A | I] con filas empaquetadas en enteros. De ahí salen:
+- P (pseudo-inversa): x = P·b resuelve A·x = b cuando b es resoluble
+  (variables libres en 0, igual que gauss_mod2)
+- H (controles de paridad): b es resoluble si y solo si H·b = 0
+- K (base del núcleo): todas las soluciones son P·b + combinaciones de K
+
+Con la factorización en caché, resolver k tableros del mismo tamaño es un
+producto de matrices mod 2 sin ninguna eliminación adicional. Lo mismo vale
+para llevar un tablero S a otro T cualquiera: basta resolver A·x = S ⊕ T.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from operador_implicito import empaquetar_tablero, mascaras_borde, producto_A
+
+
+class Factorizacion:
+    """
+    Artefactos de resolución para tableros n×n.
+
+    Atributos:
+    ----------
+    n : int
+        Tamaño del tablero
+    filas_inversa : List[int]
+        Fila k de P empaquetada: x_k = paridad(filas_inversa[k] & b)
+    controles : List[int]
+        Filas de H empaquetadas: b es resoluble si todas las paridades son 0
+    nucleo : List[int]
+        Base del núcleo de A (vectores de presiones empaquetados)
+    columnas_pivote : List[int]
+        Variables con pivote; los vectores apoyados en ellas forman un
+        complemento del núcleo (un representante por coclase)
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.dimension = n * n
+        (self.filas_inversa, self.controles,
+         self.nucleo, self.columnas_pivote) = _gauss_jordan_empaquetado(n)
+        self._matrices = None
+        self._candado = threading.Lock()
+
+    @classmethod
+    def desde_artefactos(cls, n: int, filas_inversa: List[int], controles: List[int],
+                         nucleo: List[int], columnas_pivote: List[int],
+                         matrices: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None):
+        """Arma la factorización con artefactos ya calculados (sin eliminar)."""
+        f = cls.__new__(cls)
+        f.n = n
+        f.dimension = n * n
+        f.filas_inversa, f.controles = filas_inversa, controles
+        f.nucleo, f.columnas_pivote = nucleo, columnas_pivote
+        f._matrices = matrices
+        f._candado = threading.Lock()
+        return f
+
+    @property
+    def nulidad(self) -> int:
+        return len(self.nucleo)
+
+    def es_resoluble(self, b: int) -> bool:
+        """Indica si el tablero empaquetado b tiene solución."""
+        return not any((fila & b).bit_count() & 1 for fila in self.controles)
+
+    def resolver(self, b: int) -> Optional[int]:
+        """
+        Resuelve un tablero empaquetado.
+
+        Retorna:
+        --------
+        Optional[int]
+            Presiones empaquetadas, o None si el tablero no tiene solución
+        """
+        if not self.es_resoluble(b):
+            return None
+        x = 0
+        for k, fila in enumerate(self.filas_inversa):
+            if (fila & b).bit_count() & 1:
+                x |= 1 << k
+        return x
+
+    def matrices(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        P, H y K como matrices float32 de 0s y 1s (se crean una sola vez).
+
+        Se usa float32 para aprovechar BLAS: las sumas son enteros ≤ n²,
+        exactos en float32 mientras n² < 2²⁴.
+        """
+        if self._matrices is None:
+            with self._candado:
+                if self._matrices is None:
+                    N = self.dimension
+                    self._matrices = (
+                        desempaquetar_filas(self.filas_inversa, N),
+                        desempaquetar_filas(self.controles, N),
+                        desempaquetar_filas(self.nucleo, N),
+                    )
+        return self._matrices
+
+
+def desempaquetar_filas(filas: List[int], N: int) -> np.ndarray:
+    """Convierte filas empaquetadas en una matriz float32 (len(filas) × N)."""
+    matriz = np.zeros((len(filas), N), dtype=np.float32)
+    for k, fila in enumerate(filas):
+        bits = np.frombuffer(fila.to_bytes((N + 7) // 8, "little"), dtype=np.uint8)
+        matriz[k] = np.unpackbits(bits, bitorder="little")[:N]
+    return matriz
+
+
+def _gauss_jordan_empaquetado(n: int) -> Tuple[List[int], List[int], List[int], List[int]]:
+    """
+    Eliminación de Gauss-Jordan mod 2 sobre [A | I] con filas empaquetadas.
+
+    Cada fila guarda en los bits 0..N-1 la fila de A y en los bits N..2N-1
+    qué ecuaciones originales se combinaron para obtenerla.
+    """
+    N = n * n
+    # A es simétrica: la fila i coincide con la columna i = A·e_i
+    filas = [producto_A(1 << i, n) | (1 << (N + i)) for i in range(N)]
+
+    pivotes = []  # (columna, fila)
+    fila_actual = 0
+    for col in range(N):
+        bit = 1 << col
+        pivote = None
+        for fila in range(fila_actual, N):
+            if filas[fila] & bit:
+                pivote = fila
+                break
+        if pivote is None:
+            continue
+        filas[fila_actual], filas[pivote] = filas[pivote], filas[fila_actual]
+        fila_pivote = filas[fila_actual]
+        for fila in range(N):
+            if fila != fila_actual and filas[fila] & bit:
+                filas[fila] ^= fila_pivote
+        pivotes.append((col, fila_actual))
+        fila_actual += 1
+
+    return artefactos_de_eliminacion(filas, pivotes, N)
+
+
+def artefactos_de_eliminacion(filas: List[int], pivotes: List[Tuple[int, int]],
+                              N: int) -> Tuple[List[int], List[int], List[int], List[int]]:
+    """
+    P, H, K y columnas pivote a partir de [A | I] ya reducida por Gauss-Jordan.
+
+    Parámetros:
+    -----------
+    filas : List[int]
+        Filas reducidas: bits 0..N-1 de A, bits N..2N-1 de la identidad
+    pivotes : List[Tuple[int, int]]
+        (columna, fila) de cada pivote, en orden de columna
+    N : int
+        Cantidad de luces
+    """
+    mascara_A = (1 << N) - 1
+    fila_actual = len(pivotes)
+    filas_inversa = [0] * N
+    for col, fila in pivotes:
+        filas_inversa[col] = filas[fila] >> N
+    controles = [filas[fila] >> N for fila in range(fila_actual, N)]
+
+    columnas_pivote = {col for col, _ in pivotes}
+    nucleo = []
+    for libre in range(N):
+        if libre in columnas_pivote:
+            continue
+        vector = 1 << libre
+        for col, fila in pivotes:
+            if (filas[fila] & mascara_A) >> libre & 1:
+                vector |= 1 << col
+        nucleo.append(vector)
+
+    return filas_inversa, controles, nucleo, sorted(columnas_pivote)
+
+
+# ===================================================================
+# CACHÉ POR TAMAÑO
+# ===================================================================
+
+_CACHE_FACTORIZACIONES: Dict[int, Factorizacion] = {}
+_CANDADO_CACHE = threading.Lock()
+_PROVEEDOR: Callable[[int], Factorizacion] = Factorizacion
+
+
+def factorizacion(n: int) -> Factorizacion:
+    """Devuelve la factorización del tamaño n (la calcula la primera vez)."""
+    existente = _CACHE_FACTORIZACIONES.get(n)
+    if existente is not None:
+        return existente
+    with _CANDADO_CACHE:
+        if n not in _CACHE_FACTORIZACIONES:
+            _CACHE_FACTORIZACIONES[n] = _PROVEEDOR(n)
+        return _CACHE_FACTORIZACIONES[n]
+
+
+def establecer_proveedor(proveedor: Optional[Callable[[int], Factorizacion]] = None):
+    """
+    Cambia quién construye las factorizaciones que faltan en la caché.
+
+    Por ejemplo, registro_compartido las obtiene de memoria compartida en
+    lugar de calcularlas. Con None se vuelve a Factorizacion(n). Las
+    factorizaciones ya guardadas en la caché se conservan.
+    """
+    global _PROVEEDOR
+    with _CANDADO_CACHE:
+        _PROVEEDOR = proveedor or Factorizacion
+
+
+def precalentar(tamanos: Iterable[int]):
+    """Calcula de antemano las factorizaciones (y matrices) de varios tamaños."""
+    for n in tamanos:
+        factorizacion(n).matrices()
+
+
+# ===================================================================
+# TABLAS LINEALES Y MINIMIZACIÓN CON EL NÚCLEO
+# ===================================================================
+
+def tabla_lineal(columnas: List[int], bits: int, dtype=np.uint64) -> np.ndarray:
+    """
+    Evalúa una aplicación lineal en todos los vectores de bits posibles.
+
+    Retorna T de tamaño 2^bits con T[v] = XOR de columnas[k] para cada bit k
+    de v, llenada por duplicación: T[2^k + r] = T[r] ⊕ columnas[k].
+    """
+    tabla = np.zeros(1 << bits, dtype=dtype)
+    for k in range(bits):
+        tabla[1 << k:2 << k] = tabla[:1 << k] ^ dtype(columnas[k])
+    return tabla
+
+
+def minimizar_con_nucleo(soluciones: np.ndarray, nucleo: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solución de menor peso en cada coclase x + núcleo.
+
+    Recorre las 2^nulidad combinaciones del núcleo en orden de Gray, de modo
+    que cada paso es un único XOR sobre todo el arreglo.
+
+    Parámetros:
+    -----------
+    soluciones : np.ndarray
+        Soluciones empaquetadas (uint32 o uint64, una por tablero)
+    nucleo : List[int]
+        Base del núcleo empaquetada
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        Soluciones mínimas y sus pesos (cantidad de presiones)
+    """
+    dtype = soluciones.dtype.type
+    mejores = soluciones.copy()
+    pesos = np.bitwise_count(soluciones)
+    candidatas = soluciones.copy()
+    for paso in range(1, 1 << len(nucleo)):
+        # En el código de Gray cambia el bit menos significativo de paso
+        candidatas ^= dtype(nucleo[(paso & -paso).bit_length() - 1])
+        pesos_candidatas = np.bitwise_count(candidatas)
+        mejora = pesos_candidatas < pesos
+        mejores[mejora] = candidatas[mejora]
+        pesos[mejora] = pesos_candidatas[mejora]
+    return mejores, pesos
+
+
+def empaquetar_uint64(bits: np.ndarray) -> np.ndarray:
+    """Empaqueta filas de 0s y 1s (k, N) en palabras uint64 (k, ⌈N/64⌉), bit k = columna k."""
+    k, N = bits.shape
+    palabras = (N + 63) // 64
+    relleno = np.zeros((k, palabras * 64), dtype=np.uint8)
+    relleno[:, :N] = bits
+    return np.packbits(relleno, axis=1, bitorder="little").view(np.uint64)
+
+
+def desempaquetar_uint64(palabras: np.ndarray, N: int) -> np.ndarray:
+    """Inversa de empaquetar_uint64: (k, ⌈N/64⌉) uint64 → (k, N) uint8."""
+    bytes_filas = np.ascontiguousarray(palabras).view(np.uint8)
+    return np.unpackbits(bytes_filas, axis=1, count=N, bitorder="little")
+
+
+# ===================================================================
+# RESOLUCIÓN POR LOTES
+# ===================================================================
+
+def resolver_lote(tableros: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resuelve k tableros del mismo tamaño con productos de matrices mod 2.
+
+    Parámetros:
+    -----------
+    tableros : np.ndarray
+        Arreglo (k, n, n) o (k, n²) de 0s y 1s
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        Presiones (k, n²) uint8 y máscara booleana (k,) de tableros resolubles.
+        Las presiones de los tableros sin solución quedan en 0.
+    """
+    tableros = np.asarray(tableros)
+    k = tableros.shape[0]
+    N = int(np.prod(tableros.shape[1:]))
+    n = int(round(N ** 0.5))
+    if n * n != N:
+        raise ValueError("Los tableros deben ser cuadrados")
+
+    P, H, _ = factorizacion(n).matrices()
+    B = tableros.reshape(k, N).astype(np.float32)
+
+    soluciones = (B @ P.T).astype(np.int64) & 1
+    if H.shape[0]:
+        resolubles = ~((B @ H.T).astype(np.int64) & 1).any(axis=1)
+    else:
+        resolubles = np.ones(k, dtype=bool)
+    soluciones[~resolubles] = 0
+    return soluciones.astype(np.uint8), resolubles
+
+
+def _lote_o_tablero(tableros: np.ndarray, n: int) -> Tuple[np.ndarray, bool]:
+    """
+    Lee un único tablero ((n, n) o (n²,)) o un lote ((k, n, n) o (k, n²)).
+
+    Con n conocido la forma no es ambigua: (n, n) es un tablero y (k, n²) un
+    lote, también cuando k = n².
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, bool]
+        (tableros (k, n²), True si era un único tablero)
+    """
+    N = n * n
+    if tableros.shape in ((n, n), (N,)):
+        return tableros.reshape(1, N), True
+    if tableros.ndim in (2, 3) and tableros.shape[1:] in ((n, n), (N,)):
+        return tableros.reshape(-1, N), False
+    raise ValueError(f"Se esperaba un tablero ({n}, {n}) o ({N},), o un lote (k, {n}, {n}) "
+                     f"o (k, {N}): forma {tableros.shape}")
+
+
+def resolver_transformacion_lote(origenes: np.ndarray, destinos: np.ndarray,
+                                 n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Presiones que llevan cada tablero origen S a su destino T: A·x = S ⊕ T.
+
+    Usa la misma factorización en caché que resolver_lote, así que k pares
+    cuestan dos productos de matrices mod 2.
+
+    Parámetros:
+    -----------
+    origenes, destinos : np.ndarray
+        Lotes (k, n, n) o (k, n²) de 0s y 1s. Cualquiera de los dos puede ser
+        un único tablero (n, n) o (n²,) que se usa para todos los pares
+    n : int
+        Tamaño de los tableros (la forma sola no distingue, por ejemplo, un
+        tablero 16×16 de dieciséis tableros 4×4 en (16, 16))
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Presiones (k, n²) uint8, máscara booleana (k,) de destinos alcanzables
+        y síndromes H·(S ⊕ T) (k, controles) uint8: los controles de paridad
+        en que S y T difieren (todo 0 si y solo si T es alcanzable desde S)
+    """
+    origenes, origen_unico = _lote_o_tablero(np.asarray(origenes), n)
+    destinos, destino_unico = _lote_o_tablero(np.asarray(destinos), n)
+    if not (origen_unico or destino_unico) and len(origenes) != len(destinos):
+        raise ValueError("Orígenes y destinos deben tener la misma cantidad de tableros")
+    k = len(destinos) if origen_unico else len(origenes)
+    N = n * n
+
+    P, H, _ = factorizacion(n).matrices()
+    diferencias = origenes.astype(np.uint8) ^ destinos.astype(np.uint8)
+    B = np.broadcast_to(diferencias, (k, N)).astype(np.float32)
+
+    presiones = (B @ P.T).astype(np.int64) & 1
+    sindromes = ((B @ H.T).astype(np.int64) & 1).astype(np.uint8)
+    alcanzables = ~sindromes.any(axis=1)
+    presiones[~alcanzables] = 0
+    return presiones.astype(np.uint8), alcanzables, sindromes
+
+
+# ===================================================================
+# VERIFICACIÓN POR LOTES
+# ===================================================================
+
+def _palabras_de_entero(valor: int, palabras: int) -> np.ndarray:
+    return np.frombuffer(valor.to_bytes(palabras * 8, "little"), dtype=np.uint64)
+
+
+def _desplazar(x: np.ndarray, s: int) -> np.ndarray:
+    """Desplaza k vectores de varias palabras uint64: s > 0 hacia bits altos, s < 0 hacia bits bajos."""
+    W = x.shape[1]
+    q, r = divmod(abs(s), 64)
+    y = np.zeros_like(x)
+    if q >= W:
+        return y
+    if s > 0:
+        y[:, q:] = x[:, :W - q]
+        if r:
+            z = y << np.uint64(r)
+            z[:, 1:] |= y[:, :-1] >> np.uint64(64 - r)
+            y = z
+    else:
+        y[:, :W - q] = x[:, q:]
+        if r:
+            z = y >> np.uint64(r)
+            z[:, :-1] |= y[:, 1:] << np.uint64(64 - r)
+            y = z
+    return y
+
+
+def producto_A_lote(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    A·x para k vectores empaquetados (k, ⌈n²/64⌉) uint64.
+
+    Es producto_A aplicado a todo el lote: x ⊕ (x desplazado a los cuatro
+    vecinos), con las máscaras de borde de cada palabra.
+    """
+    W = x.shape[1]
+    completo, sin_columna_0, sin_columna_ultima = (_palabras_de_entero(m, W) for m in mascaras_borde(n))
+    return (x
+            ^ (_desplazar(x, n) & completo)
+            ^ _desplazar(x, -n)
+            ^ (_desplazar(x, 1) & sin_columna_0)
+            ^ (_desplazar(x, -1) & sin_columna_ultima))
+
+
+def verificar_solucion_batch(tableros: np.ndarray, soluciones: np.ndarray,
+                             n: Optional[int] = None,
+                             empaquetado: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Verifica k pares (tablero, solución) a la vez con desplazamientos y XOR.
+
+    El tablero final es b ⊕ x ⊕ (x desplazado a los cuatro vecinos), igual
+    que producto_A pero sobre todo el lote.
+
+    Parámetros:
+    -----------
+    tableros, soluciones : np.ndarray
+        Arreglos (k, n, n) o (k, n²) de 0s y 1s (de cualquier tipo entero), o
+        con empaquetado=True tableros (k, ⌈n²/64⌉) uint64 como los de
+        empaquetar_uint64
+    n : Optional[int]
+        Tamaño del tablero, obligatorio para la entrada empaquetada
+    empaquetado : bool
+        Indica que la entrada está empaquetada; nunca se deduce del tipo
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        Máscara booleana (k,) de soluciones correctas y los tableros residuales
+        (luces que quedan encendidas) de las incorrectas, en el formato de entrada
+    """
+    tableros = np.asarray(tableros)
+    soluciones = np.asarray(soluciones)
+    k = tableros.shape[0]
+
+    if empaquetado:
+        if n is None:
+            raise ValueError("Para tableros empaquetados hay que indicar n")
+        forma = (k, (n * n + 63) // 64)
+        for arreglo in (tableros, soluciones):
+            if arreglo.dtype != np.uint64 or arreglo.shape != forma:
+                raise ValueError(f"Tableros y soluciones empaquetados deben ser uint64 de forma {forma}")
+        residuo = tableros ^ producto_A_lote(soluciones, n)
+        correctas = ~residuo.any(axis=1)
+        return correctas, residuo[~correctas]
+
+    if soluciones.shape[0] != k or soluciones.size != tableros.size:
+        raise ValueError("Tableros y soluciones deben tener la misma cantidad de luces")
+    N = int(np.prod(tableros.shape[1:]))
+    lado = int(round(N ** 0.5))
+    if lado * lado != N or (n is not None and lado != n):
+        raise ValueError("Los tableros deben ser cuadrados de lado n")
+    x = soluciones.reshape(k, lado, lado).astype(np.uint8, copy=False) & 1
+    residuo = (tableros.reshape(k, lado, lado).astype(np.uint8) & 1) ^ x
+    residuo[:, 1:, :] ^= x[:, :-1, :]
+    residuo[:, :-1, :] ^= x[:, 1:, :]
+    residuo[:, :, 1:] ^= x[:, :, :-1]
+    residuo[:, :, :-1] ^= x[:, :, 1:]
+    correctas = ~residuo.reshape(k, N).any(axis=1)
+    return correctas, residuo[~correctas].reshape((-1,) + tableros.shape[1:])
+
+
+def resolver_lights_out_rapido(matriz: List[List[int]]) -> Optional[List[int]]:
+    """
+    Resuelve un tablero usando la factorización en caché.
+
+    Mismo formato que resolver_lights_out, pero None si no hay solución.
+    """
+    n = len(matriz)
+    x = factorizacion(n).resolver(empaquetar_tablero(matriz))
+    if x is None:
+        return None
+    return [(x >> k) & 1 for k in range(n * n)]
+
+
+def resolver_transformacion(origen: List[List[int]], destino: List[List[int]]) -> Optional[List[int]]:
+    """
+    Presiones que convierten el tablero origen en el destino.
+
+    Mismo formato que resolver_lights_out_rapido (resolver_lights_out es el
+    caso destino todo apagado); None si el destino no es alcanzable.
+    """
+    n = len(origen)
+    if len(destino) != n:
+        raise ValueError("Origen y destino deben tener el mismo tamaño")
+    x = factorizacion(n).resolver(empaquetar_tablero(origen) ^ empaquetar_tablero(destino))
+    if x is None:
+        return None
+    return [(x >> k) & 1 for k in range(n * n)]
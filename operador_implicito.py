@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - OPERADOR IMPLÍCITO (SIN MATRIZ)
+Producto A·x y Aᵀ·y sobre tableros empaquetados en bits
+
+construir_sistema materializa A como n² listas de n² enteros. Aquí el tablero
+completo se guarda en un único entero de Python (bit i·n + j = luz (i, j),
+el mismo orden que las variables x₀, x₁, ..., x_{n²-1}) y el producto por A
+se calcula con desplazamientos y máscaras de borde:
+
+    A·x = x ⊕ (x << n) ⊕ (x >> n) ⊕ ((x << 1) sin columna 0) ⊕ ((x >> 1) sin columna n-1)
+
+La memoria necesaria es O(n²) bits y nunca se construye A.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from typing import Dict, List, Tuple
+
+
+def empaquetar_tablero(matriz: List[List[int]]) -> int:
+    """Convierte la matriz n×n en un entero (bit i·n + j = luz (i, j))."""
+    n = len(matriz)
+    valor = 0
+    for i, fila in enumerate(matriz):
+        for j, luz in enumerate(fila):
+            if luz:
+                valor |= 1 << (i * n + j)
+    return valor
+
+
+def desempaquetar_tablero(bits: int, n: int) -> List[List[int]]:
+    """Convierte un tablero empaquetado en una matriz n×n."""
+    return [[(bits >> (i * n + j)) & 1 for j in range(n)] for i in range(n)]
+
+
+def vector_a_bits(vector: List[int]) -> int:
+    """Empaqueta un vector de 0s y 1s (como el que retorna resolver_lights_out)."""
+    valor = 0
+    for k, bit in enumerate(vector):
+        if bit:
+            valor |= 1 << k
+    return valor
+
+
+def bits_a_vector(bits: int, longitud: int) -> List[int]:
+    """Desempaqueta un entero en un vector de 0s y 1s de la longitud dada."""
+    return [(bits >> k) & 1 for k in range(longitud)]
+
+
+_CACHE_MASCARAS: Dict[int, Tuple[int, int, int]] = {}
+
+
+def mascaras_borde(n: int) -> Tuple[int, int, int]:
+    """
+    Máscaras del tablero n×n empaquetado.
+
+    Retorna:
+    --------
+    Tuple[int, int, int]
+        (tablero completo, todo salvo la columna 0, todo salvo la columna n-1)
+    """
+    if n not in _CACHE_MASCARAS:
+        completo = (1 << (n * n)) - 1
+        columna_0 = 0
+        for i in range(n):
+            columna_0 |= 1 << (i * n)
+        columna_ultima = columna_0 << (n - 1)
+        _CACHE_MASCARAS[n] = (completo, completo ^ columna_0, completo ^ columna_ultima)
+    return _CACHE_MASCARAS[n]
+
+
+def producto_A(x: int, n: int) -> int:
+    """
+    Calcula A·x para el tablero n×n sin construir A.
+
+    Parámetros:
+    -----------
+    x : int
+        Vector de presiones empaquetado
+    n : int
+        Tamaño del tablero
+
+    Retorna:
+    --------
+    int
+        Luces que cambian de estado (empaquetadas)
+    """
+    completo, sin_columna_0, sin_columna_ultima = mascaras_borde(n)
+    return (x
+            ^ ((x << n) & completo)
+            ^ (x >> n)
+            ^ ((x << 1) & sin_columna_0)
+            ^ ((x >> 1) & sin_columna_ultima))
+
+
+class OperadorLightsOut:
+    """
+    Operador lineal de Lights Out sobre GF(2) sin materializar la matriz.
+
+    Cada luz se afecta a sí misma y a sus vecinas ortogonales, por lo que A
+    es simétrica y Aᵀ·y = A·y. Se expone aplicar_traspuesta igualmente para
+    que los solvers iterativos no dependan de esa propiedad.
+    """
+
+    def __init__(self, n: int):
+        """
+        Parámetros:
+        -----------
+        n : int
+            Tamaño del tablero (n×n)
+        """
+        self.n = n
+        self.dimension = n * n
+        mascaras_borde(n)
+
+    def aplicar(self, x: int) -> int:
+        """Calcula A·x."""
+        return producto_A(x, self.n)
+
+    def aplicar_traspuesta(self, y: int) -> int:
+        """Calcula Aᵀ·y (igual a A·y por simetría)."""
+        return producto_A(y, self.n)
+
+    def mascara_presion(self, i: int, j: int) -> int:
+        """Luces que cambian al presionar (i, j), es decir, la columna i·n + j de A."""
+        return producto_A(1 << (i * self.n + j), self.n)
+
+    def columna(self, k: int) -> int:
+        """Columna k de A empaquetada."""
+        return producto_A(1 << k, self.n)
+
+
+def verificar_solucion_implicita(matriz_inicial: List[List[int]], solucion: List[int]) -> bool:
+    """
+    Verifica una solución con el operador implícito: A·x = b (mod 2).
+
+    Equivale a verificar_solucion sin salida detallada, pero en O(n²) bits.
+    """
+    n = len(matriz_inicial)
+    return producto_A(vector_a_bits(solucion), n) == empaquetar_tablero(matriz_inicial)
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LIGHTS OUT - OPERADOR IMPLÍCITO A·x")
+    print("=" * 60)
+    print()
+
+    tablero_3x3 = [
+        [1, 0, 1],
+        [0, 1, 0],
+        [1, 0, 1]
+    ]
+    solucion = [1] * 9
+    operador = OperadorLightsOut(3)
+    resultado = operador.aplicar(vector_a_bits(solucion))
+    print("A·x para x = todas las luces:")
+    for fila in desempaquetar_tablero(resultado, 3):
+        print("  " + " ".join(map(str, fila)))
+    print(f"\nSolución verificada: {'SÍ' if verificar_solucion_implicita(tablero_3x3, solucion) else 'NO'}")
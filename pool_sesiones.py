@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - POOL DE SESIONES
+Miles de partidas simultáneas del mismo tamaño en arreglos contiguos
+
+Cada LightsOutGame guarda su tablero como lista de listas y abre una
+ventana; un servidor con muchos jugadores no escala así. El pool guarda
+todos los tableros n×n en un único arreglo (capacidad, ⌈n²/64⌉) uint64
+(bit i·n + j = luz (i, j)), junto con los tableros iniciales y el estado de
+cada partida en arreglos paralelos. Presionar, verificar la victoria o
+buscar soluciones se hace para muchas sesiones en una sola llamada:
+
+    presionar      np.bitwise_xor.at sobre la vista plana del arreglo: la máscara
+                   de la presión (n ≤ 8) o sus hasta 5 bits por separado
+    victoria       una comparación con cero por fila
+    soluciones     tabla precalculada (n ≤ 5) o resolver_lote
+
+Cada sesión tiene además su propio manejador (SesionPool) con la misma
+semántica que LightsOutGame: presionar_luz, verificar_victoria,
+juego_ganado, contar_luces.
+
+Con un GrabadorSesiones (sesiones.py) el pool graba las partidas en el
+mismo registro binario que el juego. El formato pide los eventos de cada
+sesión seguidos, así que las presiones se acumulan en arreglos por llamada
+y cada sesión se escribe completa al cerrarla.
+
+El costo por presión depende mucho de la máquina y de la versión de NumPy
+(ufunc.at): la demostración lo mide. Con NumPy 2.4, lotes de 100000
+sesiones 5×5 dieron entre 25 y 65 ns por presión según la carga de la
+máquina; presionar de a una con SesionPool cuesta decenas de
+microsegundos por llamada (el costo fijo de cada operación de NumPy), así
+que conviene agrupar las presiones.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from motor_vectorizado import (desempaquetar_uint64, empaquetar_uint64, producto_A_lote,
+                               resolver_lote)
+from operador_implicito import producto_A
+from sesiones import GrabadorSesiones
+from tablas_precalculadas import NO_RESOLUBLE, TablaSoluciones
+
+
+class PoolSesiones:
+    """
+    Sesiones de juego n×n guardadas como estructura de arreglos.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño de los tableros del pool
+    capacidad : int
+        Sesiones reservadas al inicio (el pool crece duplicándose)
+    tabla : Optional[TablaSoluciones]
+        Tabla precalculada del mismo tamaño para buscar soluciones
+    grabador : Optional[GrabadorSesiones]
+        Registro donde se escribe cada sesión al cerrarla
+    """
+
+    def __init__(self, n: int, capacidad: int = 1024, tabla: Optional[TablaSoluciones] = None,
+                 grabador: Optional[GrabadorSesiones] = None):
+        if tabla is not None and tabla.n != n:
+            raise ValueError(f"La tabla es de tableros {tabla.n}×{tabla.n}, no {n}×{n}")
+        self.n = n
+        self.palabras = (n * n + 63) // 64
+        self.tabla = tabla
+        self.tableros = np.zeros((capacidad, self.palabras), dtype=np.uint64)
+        self.iniciales = np.zeros((capacidad, self.palabras), dtype=np.uint64)
+        self.activas = np.zeros(capacidad, dtype=bool)
+        self.ganadas = np.zeros(capacidad, dtype=bool)
+        self.presiones = np.zeros(capacidad, dtype=np.int64)
+        self._libres: List[int] = list(range(capacidad - 1, -1, -1))
+        self.grabador = grabador
+        self._inicio_ms = np.zeros(capacidad, dtype=np.int64)    # Época, para la cabecera
+        self._creada = np.zeros(capacidad, dtype=np.float64)     # Reloj monótono
+        self._eventos: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []  # (ids, índices, tiempos)
+        self._candado = threading.Lock()
+        # Con una palabra por tablero, cada presión es un XOR con su máscara
+        self._mascaras = (np.array([producto_A(1 << k, n) for k in range(n * n)], dtype=np.uint64)
+                          if self.palabras == 1 else None)
+
+    @property
+    def capacidad(self) -> int:
+        return len(self.activas)
+
+    @property
+    def cantidad(self) -> int:
+        """Sesiones abiertas."""
+        return self.capacidad - len(self._libres)
+
+    def _crecer(self, minimo: int):
+        """Amplía los arreglos para tener al menos minimo lugares libres."""
+        anterior = self.capacidad
+        capacidad = max(2 * anterior, anterior + minimo - len(self._libres), 1)
+        extra = capacidad - anterior
+        self.tableros = np.concatenate((self.tableros, np.zeros((extra, self.palabras), dtype=np.uint64)))
+        self.iniciales = np.concatenate((self.iniciales, np.zeros((extra, self.palabras), dtype=np.uint64)))
+        self.activas = np.concatenate((self.activas, np.zeros(extra, dtype=bool)))
+        self.ganadas = np.concatenate((self.ganadas, np.zeros(extra, dtype=bool)))
+        self.presiones = np.concatenate((self.presiones, np.zeros(extra, dtype=np.int64)))
+        self._inicio_ms = np.concatenate((self._inicio_ms, np.zeros(extra, dtype=np.int64)))
+        self._creada = np.concatenate((self._creada, np.zeros(extra, dtype=np.float64)))
+        self._libres[:0] = range(capacidad - 1, anterior - 1, -1)
+
+    def _validar(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) and (ids.min() < 0 or ids.max() >= self.capacidad or not self.activas[ids].all()):
+            raise ValueError("Alguna sesión no existe o ya fue cerrada")
+        return ids
+
+    # ---------------------------------------------------------------
+    # Alta y baja de sesiones
+    # ---------------------------------------------------------------
+
+    def tableros_aleatorios(self, cantidad: int, semilla: Optional[int] = None) -> np.ndarray:
+        """Tableros empaquetados resolubles: A·x para presiones x al azar."""
+        generador = np.random.default_rng(semilla)
+        N = self.n * self.n
+        presiones = generador.integers(0, np.iinfo(np.uint64).max, size=(cantidad, self.palabras),
+                                       dtype=np.uint64, endpoint=True)
+        if N % 64:
+            presiones[:, -1] &= np.uint64((1 << (N % 64)) - 1)
+        return producto_A_lote(presiones, self.n)
+
+    def crear(self, tableros: Optional[np.ndarray] = None, cantidad: int = 1,
+              semilla: Optional[int] = None) -> np.ndarray:
+        """
+        Abre sesiones nuevas.
+
+        Parámetros:
+        -----------
+        tableros : Optional[np.ndarray]
+            Tableros iniciales (k, n, n) o (k, n²) de 0s y 1s, o empaquetados
+            (k, ⌈n²/64⌉) uint64; si se omiten se generan cantidad al azar
+        cantidad : int
+            Sesiones a crear cuando no se dan tableros
+        semilla : Optional[int]
+            Semilla de los tableros aleatorios
+
+        Retorna:
+        --------
+        np.ndarray
+            Identificadores de las sesiones creadas
+        """
+        if tableros is None:
+            empaquetados = self.tableros_aleatorios(cantidad, semilla)
+        else:
+            tableros = np.asarray(tableros)
+            if tableros.dtype == np.uint64 and tableros.ndim == 2 and tableros.shape[1] == self.palabras:
+                empaquetados = tableros
+            else:
+                empaquetados = empaquetar_uint64(tableros.reshape(len(tableros), self.n * self.n).astype(np.uint8))
+
+        k = len(empaquetados)
+        with self._candado:
+            if k > len(self._libres):
+                self._crecer(k)
+            ids = np.array(self._libres[len(self._libres) - k:][::-1], dtype=np.int64)
+            del self._libres[len(self._libres) - k:]
+            self.tableros[ids] = empaquetados
+            self.iniciales[ids] = empaquetados
+            self.activas[ids] = True
+            self.presiones[ids] = 0
+            self.ganadas[ids] = ~empaquetados.any(axis=1)
+            self._inicio_ms[ids] = int(time.time() * 1000)
+            self._creada[ids] = time.monotonic()
+        return ids
+
+    def sesion(self, id_sesion: int) -> "SesionPool":
+        """Manejador de una sesión abierta."""
+        self._validar(id_sesion)
+        return SesionPool(self, int(id_sesion))
+
+    def nueva_sesion(self, tablero: Optional[List[List[int]]] = None) -> "SesionPool":
+        """Crea una sesión (con el tablero dado o uno aleatorio) y devuelve su manejador."""
+        ids = self.crear(None if tablero is None else np.array([tablero], dtype=np.uint8))
+        return SesionPool(self, int(ids[0]))
+
+    def cerrar(self, ids):
+        """
+        Cierra sesiones; sus lugares se reutilizan en las próximas altas.
+
+        Con grabador, cada sesión cerrada se escribe completa en el registro.
+        """
+        with self._candado:
+            ids = np.unique(self._validar(ids))
+            if self.grabador is not None:
+                self._grabar(ids)
+            self.activas[ids] = False
+            self.tableros[ids] = 0
+            self._libres.extend(ids[::-1].tolist())
+
+    def _registrar(self, ids: np.ndarray, indices: np.ndarray):
+        """Acumula eventos (índice -1: reinicio) para el grabador."""
+        if self.grabador is not None and len(ids):
+            self._eventos.append((ids.copy(), np.array(indices, dtype=np.int64),
+                                  np.full(len(ids), time.monotonic())))
+
+    def _grabar(self, ids: np.ndarray):
+        """Escribe las sesiones ids (ordenadas) y quita sus eventos pendientes."""
+        if self._eventos:
+            sesiones, indices, tiempos = (np.concatenate(partes) for partes in zip(*self._eventos))
+        else:
+            sesiones = indices = np.zeros(0, dtype=np.int64)
+            tiempos = np.zeros(0, dtype=np.float64)
+        cerradas = np.isin(sesiones, ids)
+        self._eventos = [(sesiones[~cerradas], indices[~cerradas], tiempos[~cerradas])]
+        # Orden estable por sesión: dentro de cada una queda el orden de llegada
+        orden = np.argsort(sesiones[cerradas], kind="stable")
+        sesiones, indices, tiempos = (arreglo[cerradas][orden] for arreglo in (sesiones, indices, tiempos))
+        limites = np.searchsorted(sesiones, ids, side="right")
+        desde = 0
+        for id_sesion, hasta in zip(ids.tolist(), limites.tolist()):
+            ms = np.round((tiempos[desde:hasta] - self._creada[id_sesion]) * 1000).astype(np.int64)
+            self.grabador.agregar_sesion(self.n, int.from_bytes(self.iniciales[id_sesion].tobytes(), "little"),
+                                         int(self._inicio_ms[id_sesion]), indices[desde:hasta].tolist(),
+                                         np.diff(ms, prepend=0).tolist())
+            desde = hasta
+
+    # ---------------------------------------------------------------
+    # Operaciones vectorizadas
+    # ---------------------------------------------------------------
+
+    def presionar(self, ids, filas, columnas, verificar: bool = True) -> Optional[np.ndarray]:
+        """
+        Presiona la luz (filas[k], columnas[k]) en la sesión ids[k], para todo k.
+
+        Una sesión puede aparecer varias veces: las presiones se acumulan.
+        Con verificar=True retorna la victoria de cada sesión presionada.
+        """
+        ids = self._validar(ids)
+        filas = np.broadcast_to(np.asarray(filas, dtype=np.int64), ids.shape)
+        columnas = np.broadcast_to(np.asarray(columnas, dtype=np.int64), ids.shape)
+        n = self.n
+        if len(ids) and (filas.min() < 0 or filas.max() >= n or columnas.min() < 0 or columnas.max() >= n):
+            raise ValueError(f"Posición fuera del tablero {n}×{n}")
+
+        if self._mascaras is not None:
+            destinos, valores = ids, self._mascaras[filas * n + columnas]
+        else:
+            # La luz presionada y sus vecinas dentro del tablero, bit por bit
+            destinos, posiciones = [ids], [filas * n + columnas]
+            for df, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                f, c = filas + df, columnas + dc
+                dentro = (f >= 0) & (f < n) & (c >= 0) & (c < n)
+                destinos.append(ids[dentro])
+                posiciones.append(f[dentro] * n + c[dentro])
+            posiciones = np.concatenate(posiciones)
+            destinos = np.concatenate(destinos) * self.palabras + (posiciones >> 6)
+            valores = np.uint64(1) << (posiciones & 63).astype(np.uint64)
+
+        with self._candado:
+            # Vista plana: np.bitwise_xor.at es mucho más rápido en 1-D
+            np.bitwise_xor.at(self.tableros.reshape(-1), destinos, valores)
+            np.add.at(self.presiones, ids, 1)
+            self._registrar(ids, filas * n + columnas)
+        if verificar:
+            return self.verificar_victoria(ids)
+        return None
+
+    def verificar_victoria(self, ids=None) -> np.ndarray:
+        """Actualiza y retorna si cada sesión tiene todas las luces apagadas."""
+        ids = np.flatnonzero(self.activas) if ids is None else self._validar(ids)
+        ganadas = ~self.tableros[ids].any(axis=1)
+        self.ganadas[ids] = ganadas
+        return ganadas
+
+    def contar_luces(self, ids=None) -> np.ndarray:
+        """Luces encendidas de cada sesión."""
+        ids = np.flatnonzero(self.activas) if ids is None else self._validar(ids)
+        return np.bitwise_count(self.tableros[ids]).sum(axis=1, dtype=np.int64)
+
+    def reiniciar(self, ids):
+        """Vuelve cada sesión a su tablero inicial."""
+        ids = self._validar(ids)
+        with self._candado:
+            self.tableros[ids] = self.iniciales[ids]
+            self.presiones[ids] = 0
+            self._registrar(ids, np.full(len(ids), -1))
+        self.verificar_victoria(ids)
+
+    def matrices(self, ids) -> np.ndarray:
+        """Tableros (k, n, n) uint8 de las sesiones."""
+        ids = self._validar(ids)
+        return desempaquetar_uint64(self.tableros[ids], self.n * self.n).reshape(len(ids), self.n, self.n)
+
+    def soluciones(self, ids) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Soluciones para el estado actual de cada sesión.
+
+        Retorna:
+        --------
+        Tuple[np.ndarray, np.ndarray]
+            Presiones empaquetadas (k, ⌈n²/64⌉) uint64 (0 sin solución) y
+            máscara (k,) de tableros resolubles
+        """
+        ids = self._validar(ids)
+        tableros = self.tableros[ids]
+        if self.tabla is not None:
+            valores = self.tabla.resolver_lote(tableros[:, 0].astype(np.uint32))
+            resolubles = valores != NO_RESOLUBLE
+            return np.where(resolubles, valores, 0).astype(np.uint64)[:, None], resolubles
+        soluciones, resolubles = resolver_lote(desempaquetar_uint64(tableros, self.n * self.n))
+        return empaquetar_uint64(soluciones), resolubles
+
+
+class SesionPool:
+    """
+    Manejador de una sesión del pool con la semántica de LightsOutGame.
+
+    No guarda estado propio: todo vive en los arreglos del pool.
+    """
+
+    __slots__ = ("pool", "id")
+
+    def __init__(self, pool: PoolSesiones, id_sesion: int):
+        self.pool = pool
+        self.id = id_sesion
+
+    @property
+    def n(self) -> int:
+        return self.pool.n
+
+    @property
+    def tablero(self) -> List[List[int]]:
+        """Tablero actual como lista de listas."""
+        return self.pool.matrices(self.id)[0].tolist()
+
+    @property
+    def juego_ganado(self) -> bool:
+        return bool(self.pool.ganadas[self.id])
+
+    @property
+    def presiones(self) -> int:
+        return int(self.pool.presiones[self.id])
+
+    def presionar_luz(self, fila: int, columna: int, verificar: bool = True):
+        """Presiona la luz (fila, columna) y, si verificar, revisa la victoria."""
+        self.pool.presionar(self.id, fila, columna, verificar)
+
+    def verificar_victoria(self) -> bool:
+        """Actualiza juego_ganado y lo retorna."""
+        return bool(self.pool.verificar_victoria(self.id)[0])
+
+    def contar_luces(self) -> int:
+        return int(self.pool.contar_luces(self.id)[0])
+
+    def calcular_solucion(self) -> Optional[List[int]]:
+        """Vector de presiones para el estado actual (formato de resolver_lights_out), o None."""
+        soluciones, resolubles = self.pool.soluciones(self.id)
+        if not resolubles[0]:
+            return None
+        return desempaquetar_uint64(soluciones, self.n * self.n)[0].tolist()
+
+    def reiniciar(self):
+        """Vuelve al tablero inicial."""
+        self.pool.reiniciar(self.id)
+
+    def cerrar(self):
+        """Libera el lugar de la sesión en el pool."""
+        self.pool.cerrar(self.id)
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from sesiones import analizar_sesiones, leer_registro
+
+    print("=" * 60)
+    print("LIGHTS OUT - POOL DE SESIONES")
+    print("=" * 60)
+    print()
+
+    n, sesiones = 5, 100_000
+    pool = PoolSesiones(n)
+    inicio = time.perf_counter()
+    ids = pool.crear(cantidad=sesiones, semilla=0)
+    print(f"{sesiones} sesiones {n}×{n} creadas en {time.perf_counter() - inicio:.3f} s "
+          f"(capacidad {pool.capacidad})")
+
+    # Cada jugador presiona una luz al azar por ronda (posiciones generadas
+    # antes de medir; la primera ronda no se mide)
+    generador = np.random.default_rng(1)
+    rondas = [(generador.integers(0, n, sesiones), generador.integers(0, n, sesiones))
+              for _ in range(11)]
+    pool.presionar(ids, *rondas[0])
+    tiempos = []
+    for filas, columnas in rondas[1:]:
+        inicio = time.perf_counter()
+        pool.presionar(ids, filas, columnas)
+        tiempos.append((time.perf_counter() - inicio) / sesiones * 1e9)
+    print(f"10 rondas de {sesiones} presiones (con verificación de victoria): "
+          f"mediana {np.median(tiempos):.0f} ns por presión "
+          f"(entre {min(tiempos):.0f} y {max(tiempos):.0f})")
+
+    # Una presión por llamada a través del manejador de una sesión
+    manejador = pool.sesion(int(ids[0]))
+    inicio = time.perf_counter()
+    for k in range(10_000):
+        manejador.presionar_luz(k % n, k // n % n)
+    print(f"Presiones de a una con SesionPool: "
+          f"{(time.perf_counter() - inicio) / 10_000 * 1e9:.0f} ns por presión")
+
+    # Los jugadores que piden ayuda aplican la solución completa
+    inicio = time.perf_counter()
+    soluciones, resolubles = pool.soluciones(ids)
+    presiones = desempaquetar_uint64(soluciones, n * n)
+    sesion, luz = np.nonzero(presiones)
+    pool.presionar(ids[sesion], luz // n, luz % n, verificar=False)
+    ganadas = pool.verificar_victoria(ids)
+    print(f"Soluciones buscadas y aplicadas en {time.perf_counter() - inicio:.3f} s: "
+          f"{int(ganadas.sum())} de {sesiones} ganadas")
+
+    jugador = pool.nueva_sesion([[1, 1, 0, 0, 0], [1, 0, 0, 0, 0], [0] * 5, [0] * 5, [0] * 5])
+    jugador.presionar_luz(0, 0)
+    print(f"\nSesión {jugador.id}: ganada = {jugador.juego_ganado}, luces = {jugador.contar_luces()}")
+    pool.cerrar(ids)
+    print(f"Sesiones abiertas tras cerrar el lote: {pool.cantidad}")
+
+    # Grabación: cada sesión se escribe completa en el registro al cerrarla
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "pool.lor")
+        with GrabadorSesiones(ruta) as grabador:
+            grabado = PoolSesiones(n, grabador=grabador)
+            ids = grabado.crear(cantidad=1000, semilla=2)
+            grabado.presionar(ids, generador.integers(0, n, 1000), generador.integers(0, n, 1000))
+            grabado.reiniciar(ids[::2])
+            soluciones, _ = grabado.soluciones(ids)
+            sesion, luz = np.nonzero(desempaquetar_uint64(soluciones, n * n))
+            grabado.presionar(ids[sesion], luz // n, luz % n)
+            grabado.cerrar(ids)
+        resumen = analizar_sesiones(leer_registro(ruta))
+        print(f"Sesiones grabadas por el pool: {len(resumen.n)}, resueltas: {int(resumen.resuelta.sum())}, "
+              f"presiones/óptimo = {(resumen.presiones / np.maximum(resumen.optimas, 1)).mean():.2f}")
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - REGISTRO COMPARTIDO DE FACTORIZACIONES
+Factorizaciones por tamaño publicadas una sola vez en memoria compartida
+
+Con varios procesos (trabajadores de un pool, servidores), cada uno haría
+su propia eliminación de Gauss-Jordan y tendría su propia copia de P, H y
+K para cada tamaño. El registro publica esos artefactos en un segmento de
+multiprocessing.shared_memory por tamaño:
+
+    cabecera | procesos conectados | P, H, K empaquetadas (uint64)
+             | columnas pivote | P, H, K en float32 (opcional, para BLAS)
+
+El primer proceso que necesita el tamaño n calcula la factorización y la
+publica; los demás se conectan y usan vistas de NumPy de solo lectura sobre
+el segmento, sin copiar las matrices. Un candado por tamaño (flock sobre un
+archivo en el directorio temporal) evita que dos procesos calculen lo mismo
+a la vez y protege la tabla de procesos conectados, que hace de contador de
+referencias: el último proceso en liberar el tamaño elimina el segmento, y
+las entradas de procesos que terminaron sin liberar se descartan en la
+siguiente conexión.
+
+Uso típico: habilitar_registro_compartido() al iniciar cada proceso; desde
+ahí motor_vectorizado.factorizacion(n) se conecta al registro.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import atexit
+import os
+import struct
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from motor_vectorizado import Factorizacion, establecer_proveedor
+
+try:
+    import fcntl
+except ImportError:  # Windows: el segmento se libera al cerrarse el último proceso
+    fcntl = None
+
+_MARCA = b"LOREG001"
+_CABECERA = struct.Struct("<8sIIIIII")  # marca, n, palabras, controles, núcleo, pivotes, matrices
+_MAX_PROCESOS = 256
+_INICIO_PROCESOS = 64
+_INICIO_DATOS = _INICIO_PROCESOS + 4 * _MAX_PROCESOS
+_ALINEACION = 64
+
+# Desde Python 3.13 se puede pedir que el resource_tracker no siga el
+# segmento; antes hay que quitarlo a mano para que no lo borre al salir
+_SEGUIMIENTO_OPCIONAL = sys.version_info >= (3, 13)
+
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _abrir_segmento(nombre: str, tamano: int = 0) -> shared_memory.SharedMemory:
+    """Crea (tamano > 0) o abre un segmento sin que lo siga el resource_tracker."""
+    crear = tamano > 0
+    if _SEGUIMIENTO_OPCIONAL:
+        return shared_memory.SharedMemory(nombre, create=crear, size=tamano, track=False)
+    segmento = shared_memory.SharedMemory(nombre, create=crear, size=tamano)
+    if os.name == "posix":
+        resource_tracker.unregister(segmento._name, "shared_memory")
+    return segmento
+
+
+def _eliminar_segmento(segmento: shared_memory.SharedMemory):
+    """Borra el nombre del segmento (los procesos conectados conservan su mapeo)."""
+    if not _SEGUIMIENTO_OPCIONAL and os.name == "posix":
+        # unlink() avisa al resource_tracker: debe encontrarlo registrado
+        resource_tracker.register(segmento._name, "shared_memory")
+    segmento.unlink()
+
+
+def _disposicion(N: int, controles: int, nucleo: int, pivotes: int,
+                 matrices: bool) -> Tuple[Dict[str, Tuple[int, Tuple[int, ...], type]], int]:
+    """
+    Desplazamiento, forma y tipo de cada arreglo del segmento.
+
+    Retorna:
+    --------
+    Tuple[dict, int]
+        ({nombre: (desplazamiento, forma, dtype)}, tamaño total en bytes)
+    """
+    palabras = (N + 63) // 64
+    arreglos = [
+        ("inversa", (N, palabras), np.uint64),
+        ("controles", (controles, palabras), np.uint64),
+        ("nucleo", (nucleo, palabras), np.uint64),
+        ("pivotes", (pivotes,), np.int32),
+    ]
+    if matrices:
+        arreglos += [("P", (N, N), np.float32), ("H", (controles, N), np.float32),
+                     ("K", (nucleo, N), np.float32)]
+
+    disposicion = {}
+    desplazamiento = _INICIO_DATOS
+    for nombre, forma, dtype in arreglos:
+        disposicion[nombre] = (desplazamiento, forma, dtype)
+        tamano = int(np.prod(forma)) * np.dtype(dtype).itemsize
+        desplazamiento += -(-tamano // _ALINEACION) * _ALINEACION
+    return disposicion, max(desplazamiento, _INICIO_DATOS + _ALINEACION)
+
+
+def _empaquetar_filas(filas: List[int], palabras: int) -> np.ndarray:
+    """Filas empaquetadas en enteros → arreglo (filas, palabras) uint64."""
+    datos = b"".join(fila.to_bytes(8 * palabras, "little") for fila in filas)
+    return np.frombuffer(datos, dtype="<u8").reshape(len(filas), palabras)
+
+
+def _filas_enteras(arreglo: np.ndarray) -> List[int]:
+    return [int.from_bytes(fila.tobytes(), "little") for fila in arreglo]
+
+
+class RegistroCompartido:
+    """
+    Registro de factorizaciones por tamaño en memoria compartida.
+
+    Parámetros:
+    -----------
+    prefijo : str
+        Prefijo de los segmentos y de los archivos de candado; procesos
+        con el mismo prefijo comparten los artefactos
+    matrices : bool
+        Publicar también P, H y K en float32 (las que usa resolver_lote).
+        Ocupan 32 veces más que las empaquetadas, pero sin ellas cada
+        proceso las desempaqueta en su propia memoria.
+    """
+
+    def __init__(self, prefijo: str = "lights_out", matrices: bool = True):
+        self.prefijo = prefijo
+        self.matrices = matrices
+        self._segmentos: Dict[int, shared_memory.SharedMemory] = {}
+        self._factorizaciones: Dict[int, Factorizacion] = {}
+        self._candado = threading.Lock()
+
+    def nombre(self, n: int) -> str:
+        """Nombre del segmento del tamaño n."""
+        return f"{self.prefijo}_{n}"
+
+    @contextmanager
+    def _bloqueo(self, n: int):
+        """Candado entre procesos para el tamaño n."""
+        ruta = os.path.join(tempfile.gettempdir(), f"{self.nombre(n)}.lock")
+        descriptor = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+            os.close(descriptor)
+
+    @staticmethod
+    def _procesos(segmento: shared_memory.SharedMemory) -> np.ndarray:
+        return np.ndarray((_MAX_PROCESOS,), dtype=np.int32, buffer=segmento.buf,
+                          offset=_INICIO_PROCESOS)
+
+    # ---------------------------------------------------------------
+    # Publicación y conexión
+    # ---------------------------------------------------------------
+
+    def _publicar(self, n: int) -> shared_memory.SharedMemory:
+        """Calcula la factorización de n y la copia a un segmento nuevo."""
+        f = Factorizacion(n)
+        N = n * n
+        palabras = (N + 63) // 64
+        disposicion, tamano = _disposicion(N, len(f.controles), len(f.nucleo),
+                                           len(f.columnas_pivote), self.matrices)
+        segmento = _abrir_segmento(self.nombre(n), tamano)
+        try:
+            datos = {
+                "inversa": _empaquetar_filas(f.filas_inversa, palabras),
+                "controles": _empaquetar_filas(f.controles, palabras),
+                "nucleo": _empaquetar_filas(f.nucleo, palabras),
+                "pivotes": np.array(f.columnas_pivote, dtype=np.int32),
+            }
+            if self.matrices:
+                datos["P"], datos["H"], datos["K"] = f.matrices()
+            for nombre, (desplazamiento, forma, dtype) in disposicion.items():
+                np.ndarray(forma, dtype=dtype, buffer=segmento.buf, offset=desplazamiento)[...] = datos[nombre]
+            # La cabecera se escribe al final: un segmento sin marca está incompleto
+            _CABECERA.pack_into(segmento.buf, 0, _MARCA, n, palabras, len(f.controles),
+                                len(f.nucleo), len(f.columnas_pivote), int(self.matrices))
+        except BaseException:
+            _eliminar_segmento(segmento)
+            segmento.close()
+            raise
+        return segmento
+
+    def _conectar(self, n: int) -> shared_memory.SharedMemory:
+        """Abre el segmento de n (publicándolo si falta) y anota este proceso."""
+        with self._bloqueo(n):
+            try:
+                segmento = _abrir_segmento(self.nombre(n))
+                if bytes(segmento.buf[:8]) != _MARCA:
+                    # Restos de un proceso que murió mientras publicaba
+                    _eliminar_segmento(segmento)
+                    segmento.close()
+                    segmento = self._publicar(n)
+            except FileNotFoundError:
+                segmento = self._publicar(n)
+
+            procesos = self._procesos(segmento)
+            for k, pid in enumerate(procesos):
+                if pid and not _proceso_vivo(int(pid)):
+                    procesos[k] = 0
+            libres = np.flatnonzero(procesos == 0)
+            if os.getpid() not in procesos:
+                if not len(libres):
+                    segmento.close()
+                    raise RuntimeError(f"Más de {_MAX_PROCESOS} procesos conectados a {self.nombre(n)}")
+                procesos[libres[0]] = os.getpid()
+            del procesos
+        return segmento
+
+    def _leer(self, n: int, segmento: shared_memory.SharedMemory) -> Factorizacion:
+        """Factorización con vistas de solo lectura sobre el segmento."""
+        _, n_guardado, _, controles, nucleo, pivotes, matrices = _CABECERA.unpack_from(segmento.buf, 0)
+        if n_guardado != n:
+            raise ValueError(f"El segmento {self.nombre(n)} guarda tableros {n_guardado}×{n_guardado}")
+        disposicion, _ = _disposicion(n * n, controles, nucleo, pivotes, bool(matrices))
+        vistas = {}
+        for nombre, (desplazamiento, forma, dtype) in disposicion.items():
+            vista = np.ndarray(forma, dtype=dtype, buffer=segmento.buf, offset=desplazamiento)
+            vista.flags.writeable = False
+            vistas[nombre] = vista
+
+        return Factorizacion.desde_artefactos(
+            n, _filas_enteras(vistas["inversa"]), _filas_enteras(vistas["controles"]),
+            _filas_enteras(vistas["nucleo"]), vistas["pivotes"].tolist(),
+            (vistas["P"], vistas["H"], vistas["K"]) if matrices else None)
+
+    def obtener(self, n: int) -> Factorizacion:
+        """Factorización de n desde memoria compartida (la publica la primera vez)."""
+        existente = self._factorizaciones.get(n)
+        if existente is not None:
+            return existente
+        with self._candado:
+            if n not in self._factorizaciones:
+                segmento = self._conectar(n)
+                try:
+                    self._factorizaciones[n] = self._leer(n, segmento)
+                except BaseException:
+                    self._segmentos[n] = segmento
+                    self.liberar(n)
+                    raise
+                self._segmentos[n] = segmento
+            return self._factorizaciones[n]
+
+    __call__ = obtener
+
+    # ---------------------------------------------------------------
+    # Referencias y limpieza
+    # ---------------------------------------------------------------
+
+    def referencias(self, n: int) -> int:
+        """Procesos vivos conectados al tamaño n (0 si no está publicado)."""
+        with self._bloqueo(n):
+            try:
+                segmento = _abrir_segmento(self.nombre(n))
+            except FileNotFoundError:
+                return 0
+            vivos = sum(1 for pid in self._procesos(segmento) if pid and _proceso_vivo(int(pid)))
+            segmento.close()
+            return vivos
+
+    def liberar(self, n: int):
+        """
+        Desconecta este proceso del tamaño n; el último en salir borra el segmento.
+
+        Las factorizaciones ya entregadas siguen siendo válidas: el mapeo
+        se mantiene mientras existan vistas sobre él.
+        """
+        with self._candado:
+            segmento = self._segmentos.pop(n, None)
+            self._factorizaciones.pop(n, None)
+        if segmento is None:
+            return
+        with self._bloqueo(n):
+            procesos = self._procesos(segmento)
+            procesos[procesos == os.getpid()] = 0
+            quedan = any(pid and _proceso_vivo(int(pid)) for pid in procesos)
+            del procesos
+            if not quedan:
+                _eliminar_segmento(segmento)
+        try:
+            segmento.close()
+        except BufferError:
+            pass  # Hay vistas en uso; el mapeo se libera cuando desaparezcan
+
+    def cerrar(self):
+        """Libera todos los tamaños conectados."""
+        for n in list(self._segmentos):
+            self.liberar(n)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+        return False
+
+
+def eliminar_publicacion(n: int, prefijo: str = "lights_out") -> bool:
+    """
+    Borra el segmento del tamaño n aunque tenga procesos conectados.
+
+    Para limpiar a mano después de caídas; retorna False si no existía.
+    """
+    try:
+        segmento = _abrir_segmento(f"{prefijo}_{n}")
+    except FileNotFoundError:
+        return False
+    _eliminar_segmento(segmento)
+    segmento.close()
+    return True
+
+
+# ===================================================================
+# INTEGRACIÓN CON motor_vectorizado
+# ===================================================================
+
+_REGISTRO_GLOBAL: Optional[RegistroCompartido] = None
+
+
+def habilitar_registro_compartido(prefijo: str = "lights_out", matrices: bool = True) -> RegistroCompartido:
+    """
+    Hace que motor_vectorizado.factorizacion obtenga los tamaños nuevos del registro.
+
+    El registro se libera automáticamente al terminar el proceso.
+    """
+    global _REGISTRO_GLOBAL
+    deshabilitar_registro_compartido()
+    _REGISTRO_GLOBAL = RegistroCompartido(prefijo, matrices)
+    establecer_proveedor(_REGISTRO_GLOBAL.obtener)
+    return _REGISTRO_GLOBAL
+
+
+def deshabilitar_registro_compartido():
+    """Vuelve a calcular las factorizaciones en cada proceso y libera el registro."""
+    global _REGISTRO_GLOBAL
+    if _REGISTRO_GLOBAL is not None:
+        establecer_proveedor(None)
+        _REGISTRO_GLOBAL.cerrar()
+        _REGISTRO_GLOBAL = None
+
+
+atexit.register(deshabilitar_registro_compartido)
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+def _resolver_en_trabajador(tableros: np.ndarray) -> Tuple[int, int]:
+    """Resuelve un lote en un proceso del pool (inicializado con el registro)."""
+    from motor_vectorizado import resolver_lote
+
+    _, resolubles = resolver_lote(tableros)
+    return os.getpid(), int(resolubles.sum())
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import time
+
+    print("=" * 60)
+    print("LIGHTS OUT - REGISTRO COMPARTIDO DE FACTORIZACIONES")
+    print("=" * 60)
+    print()
+
+    n = 28
+    prefijo = f"lights_out_demo_{os.getpid()}"
+    with RegistroCompartido(prefijo) as registro:
+        inicio = time.perf_counter()
+        f = registro.obtener(n)
+        print(f"{n}×{n} publicado en {time.perf_counter() - inicio:.2f} s "
+              f"(nulidad {f.nulidad}, segmento {registro.nombre(n)})")
+
+        generador = np.random.default_rng(0)
+        lotes = [generador.integers(0, 2, size=(200, n * n), dtype=np.uint8) for _ in range(8)]
+        inicio = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(4, habilitar_registro_compartido, (prefijo,)) as pool:
+            resultados = pool.map(_resolver_en_trabajador, lotes)
+        print(f"{len(lotes)} lotes en {len({pid for pid, _ in resultados})} procesos: "
+              f"{sum(r for _, r in resultados)} tableros resolubles "
+              f"({time.perf_counter() - inicio:.2f} s, sin recalcular la factorización)")
+        print(f"Procesos conectados tras cerrar el pool: {registro.referencias(n)}")
+    print(f"Segmento eliminado al liberar: {registro.referencias(n) == 0}")
+    os.remove(os.path.join(tempfile.gettempdir(), f"{registro.nombre(n)}.lock"))
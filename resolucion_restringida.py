@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - RESOLUCIÓN CON CELDAS BLOQUEADAS Y FORZADAS
+Variantes del juego donde ciertas celdas no se pueden presionar
+(bloqueadas, x_i = 0) o deben presionarse sí o sí (forzadas, x_i = 1)
+
+En lugar de armar y eliminar un sistema nuevo por tablero, se parte de la
+factorización en caché del tamaño (motor_vectorizado). Todas las soluciones
+de A·x = b son x = P·b ⊕ K·z, así que fijar las variables de un conjunto C
+(bloqueadas ∪ forzadas) a valores c deja un sistema chico sobre z:
+
+    K_C · z = c ⊕ (P·b)_C        (|C| ecuaciones, nulidad incógnitas)
+
+Ese sistema depende solo de n y de C, no del tablero: se reduce una vez
+por máscara y se guarda en caché. Cada resolución queda como
+
+    x = P·b ⊕ D·r,   r = c ⊕ (P·b)_C,   resoluble si H·b = 0 y G·r = 0
+
+donde D (corrección de rango ≤ nulidad) y G (controles de la máscara)
+salen de la reducción. Para tamaños con nulidad 0 la solución es única y
+basta con revisar que respete las restricciones.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from motor_vectorizado import desempaquetar_filas, factorizacion, resolver_lote
+from operador_implicito import bits_a_vector, empaquetar_tablero
+
+Celdas = Union[None, int, List[List[int]], Iterable[Tuple[int, int]]]
+
+
+# ===================================================================
+# REDUCCIÓN POR MÁSCARA
+# ===================================================================
+
+class ReduccionRestringida:
+    """
+    Sistema reducido para tableros n×n con un conjunto fijo de variables restringidas.
+
+    Atributos:
+    ----------
+    n : int
+        Tamaño del tablero
+    mascara : int
+        Variables restringidas (bloqueadas o forzadas) empaquetadas
+    variables : List[int]
+        Índices de las variables restringidas, en orden creciente
+    correcciones : List[int]
+        Columnas de D: correcciones[t] se suma a x cuando r_t = 1
+    controles : List[int]
+        Filas de G sobre r: la restricción se cumple si todas las paridades son 0
+    nucleo : List[int]
+        Base de las soluciones de A·x = 0 con x_C = 0 (presiones que se
+        pueden agregar sin romper las restricciones)
+    """
+
+    def __init__(self, n: int, mascara: int):
+        f = factorizacion(n)
+        self.n = n
+        self.dimension = n * n
+        self.mascara = mascara
+        self.variables = [i for i in range(self.dimension) if mascara >> i & 1]
+        self.correcciones, self.controles, self.nucleo = _reducir(f.nucleo, self.variables)
+        self._matrices = None
+        self._candado = threading.Lock()
+
+    @property
+    def nulidad(self) -> int:
+        return len(self.nucleo)
+
+    def _restos(self, x: int, forzadas: int) -> int:
+        """r = c ⊕ x_C empaquetado con un bit por variable restringida."""
+        restos = 0
+        for t, i in enumerate(self.variables):
+            if (x ^ forzadas) >> i & 1:
+                restos |= 1 << t
+        return restos
+
+    def resolver(self, b: int, forzadas: int = 0) -> Optional[int]:
+        """
+        Resuelve un tablero empaquetado respetando las restricciones.
+
+        Parámetros:
+        -----------
+        b : int
+            Tablero empaquetado
+        forzadas : int
+            Variables de la máscara que deben valer 1 (el resto de la máscara vale 0)
+
+        Retorna:
+        --------
+        Optional[int]
+            Presiones empaquetadas, o None si no hay solución con esas restricciones
+        """
+        if forzadas & ~self.mascara:
+            raise ValueError("Las variables forzadas deben estar dentro de la máscara")
+        x = factorizacion(self.n).resolver(b)
+        if x is None:
+            return None
+        restos = self._restos(x, forzadas)
+        if any((fila & restos).bit_count() & 1 for fila in self.controles):
+            return None
+        t = 0
+        while restos:
+            if restos & 1:
+                x ^= self.correcciones[t]
+            restos >>= 1
+            t += 1
+        return x
+
+    def matrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """D (|C| × n²) y G (controles × |C|) como matrices float32 de 0s y 1s."""
+        if self._matrices is None:
+            with self._candado:
+                if self._matrices is None:
+                    self._matrices = (
+                        desempaquetar_filas(self.correcciones, self.dimension),
+                        desempaquetar_filas(self.controles, len(self.variables)),
+                    )
+        return self._matrices
+
+    def resolver_lote(self, tableros: np.ndarray, forzadas: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resuelve k tableros n×n con las mismas restricciones.
+
+        Retorna:
+        --------
+        Tuple[np.ndarray, np.ndarray]
+            Presiones (k, n²) uint8 y máscara booleana (k,) de tableros
+            resolubles con las restricciones (las demás presiones quedan en 0)
+        """
+        if forzadas & ~self.mascara:
+            raise ValueError("Las variables forzadas deben estar dentro de la máscara")
+        soluciones, resolubles = resolver_lote(tableros)
+        if not self.variables:
+            return soluciones, resolubles
+
+        D, G = self.matrices()
+        objetivo = np.array([forzadas >> i & 1 for i in self.variables], dtype=np.uint8)
+        restos = (soluciones[:, self.variables] ^ objetivo).astype(np.float32)
+        if G.shape[0]:
+            resolubles &= ~((restos @ G.T).astype(np.int64) & 1).any(axis=1)
+        soluciones ^= ((restos @ D).astype(np.int64) & 1).astype(np.uint8)
+        soluciones[~resolubles] = 0
+        return soluciones, resolubles
+
+
+def _reducir(nucleo: List[int], variables: List[int]) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Gauss-Jordan mod 2 de K_C aumentada con la identidad.
+
+    La fila t guarda en los bits 0..nulidad-1 qué vectores del núcleo tocan
+    la variable variables[t] y en los bits superiores qué restricciones se
+    combinaron para obtenerla.
+    """
+    nulidad = len(nucleo)
+    filas = []
+    for t, i in enumerate(variables):
+        fila = 1 << (nulidad + t)
+        for j, vector in enumerate(nucleo):
+            if vector >> i & 1:
+                fila |= 1 << j
+        filas.append(fila)
+
+    pivotes = []  # (columna, fila)
+    fila_actual = 0
+    for col in range(nulidad):
+        bit = 1 << col
+        pivote = next((fila for fila in range(fila_actual, len(filas)) if filas[fila] & bit), None)
+        if pivote is None:
+            continue
+        filas[fila_actual], filas[pivote] = filas[pivote], filas[fila_actual]
+        for fila in range(len(filas)):
+            if fila != fila_actual and filas[fila] & bit:
+                filas[fila] ^= filas[fila_actual]
+        pivotes.append((col, fila_actual))
+        fila_actual += 1
+
+    # z_col = paridad(resolvente & r) en las columnas pivote; D = K·Q
+    correcciones = [0] * len(variables)
+    for col, fila in pivotes:
+        resolvente = filas[fila] >> nulidad
+        for t in range(len(variables)):
+            if resolvente >> t & 1:
+                correcciones[t] ^= nucleo[col]
+    controles = [filas[fila] >> nulidad for fila in range(fila_actual, len(filas))]
+
+    mascara_z = (1 << nulidad) - 1
+    columnas_pivote = {col for col, _ in pivotes}
+    nucleo_restringido = []
+    for libre in range(nulidad):
+        if libre in columnas_pivote:
+            continue
+        vector = nucleo[libre]
+        for col, fila in pivotes:
+            if (filas[fila] & mascara_z) >> libre & 1:
+                vector ^= nucleo[col]
+        nucleo_restringido.append(vector)
+
+    return correcciones, controles, nucleo_restringido
+
+
+# ===================================================================
+# CACHÉ POR MÁSCARA
+# ===================================================================
+
+CAPACIDAD_CACHE_REDUCCIONES = 256
+
+_CACHE_REDUCCIONES: "OrderedDict[Tuple[int, int], ReduccionRestringida]" = OrderedDict()
+_CANDADO_CACHE = threading.Lock()
+
+
+def reduccion(n: int, mascara: int) -> ReduccionRestringida:
+    """Reducción para (n, máscara de variables restringidas), con caché LRU."""
+    clave = (n, mascara)
+    with _CANDADO_CACHE:
+        existente = _CACHE_REDUCCIONES.get(clave)
+        if existente is not None:
+            _CACHE_REDUCCIONES.move_to_end(clave)
+            return existente
+    nueva = ReduccionRestringida(n, mascara)
+    with _CANDADO_CACHE:
+        existente = _CACHE_REDUCCIONES.setdefault(clave, nueva)
+        _CACHE_REDUCCIONES.move_to_end(clave)
+        while len(_CACHE_REDUCCIONES) > CAPACIDAD_CACHE_REDUCCIONES:
+            _CACHE_REDUCCIONES.popitem(last=False)
+        return existente
+
+
+def mascara_de_celdas(celdas: Celdas, n: int) -> int:
+    """
+    Empaqueta un conjunto de celdas: None, un entero ya empaquetado, una
+    matriz n×n de 0s y 1s (listas o arreglo) o tuplas (fila, columna),
+    también como arreglo (k, 2). Un arreglo n×n se toma como matriz.
+    """
+    if celdas is None:
+        return 0
+    if isinstance(celdas, (int, np.integer)):
+        return int(celdas)
+    if isinstance(celdas, np.ndarray):
+        if celdas.shape != (n, n):
+            if celdas.ndim != 2 or celdas.shape[1] != 2:
+                raise ValueError(f"Se esperaba una matriz {n}×{n} o coordenadas (k, 2), "
+                                 f"no un arreglo de forma {celdas.shape}")
+            celdas = [tuple(celda) for celda in celdas.tolist()]
+        else:
+            celdas = celdas.tolist()
+    celdas = list(celdas)
+    if celdas and isinstance(celdas[0], list):
+        if len(celdas) != n or any(len(fila) != n for fila in celdas):
+            raise ValueError(f"La matriz de celdas debe ser {n}×{n}")
+        return empaquetar_tablero([[int(v) & 1 for v in fila] for fila in celdas])
+    mascara = 0
+    for fila, columna in celdas:
+        if not (0 <= fila < n and 0 <= columna < n):
+            raise ValueError(f"Celda fuera del tablero: ({fila}, {columna})")
+        mascara |= 1 << (fila * n + columna)
+    return mascara
+
+
+def _mascaras(n: int, bloqueadas: Celdas, forzadas: Celdas) -> Tuple[int, int]:
+    bloqueadas = mascara_de_celdas(bloqueadas, n)
+    forzadas = mascara_de_celdas(forzadas, n)
+    if bloqueadas & forzadas:
+        raise ValueError("Una celda no puede estar bloqueada y forzada a la vez")
+    return bloqueadas | forzadas, forzadas
+
+
+# ===================================================================
+# INTERFAZ
+# ===================================================================
+
+def resolver_con_restricciones(matriz: List[List[int]], bloqueadas: Celdas = None,
+                               forzadas: Celdas = None) -> Optional[List[int]]:
+    """
+    Resuelve un tablero sin presionar las celdas bloqueadas y presionando las forzadas.
+
+    Parámetros:
+    -----------
+    matriz : List[List[int]]
+        Tablero n×n
+    bloqueadas, forzadas : Celdas
+        Matriz n×n de 0s y 1s, lista de (fila, columna) o máscara empaquetada
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Vector solución (mismo formato que resolver_lights_out), o None si
+        no hay solución que respete las restricciones
+    """
+    n = len(matriz)
+    mascara, forzadas = _mascaras(n, bloqueadas, forzadas)
+    x = reduccion(n, mascara).resolver(empaquetar_tablero(matriz), forzadas)
+    if x is None:
+        return None
+    return bits_a_vector(x, n * n)
+
+
+def resolver_lote_con_restricciones(tableros: np.ndarray, bloqueadas: Celdas = None,
+                                    forzadas: Celdas = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Versión por lotes: k tableros (k, n, n) con las mismas restricciones.
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        Presiones (k, n²) uint8 y máscara booleana (k,) de tableros resolubles
+    """
+    tableros = np.asarray(tableros)
+    n = tableros.shape[1]
+    mascara, forzadas = _mascaras(n, bloqueadas, forzadas)
+    return reduccion(n, mascara).resolver_lote(tableros, forzadas)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from operador_implicito import producto_A
+
+    print("=" * 60)
+    print("LIGHTS OUT - CELDAS BLOQUEADAS Y FORZADAS")
+    print("=" * 60)
+    print()
+
+    # 4×4 tiene nulidad 4: hay margen para elegir entre 16 soluciones
+    matriz = [[1, 0, 0, 1],
+              [0, 1, 1, 0],
+              [0, 1, 1, 0],
+              [1, 0, 0, 1]]
+    bloqueadas = [(0, 0), (3, 3)]
+    forzadas = [(1, 2)]
+    solucion = resolver_con_restricciones(matriz, bloqueadas, forzadas)
+    print(f"Tablero 4×4, bloqueadas {bloqueadas}, forzadas {forzadas}")
+    if solucion is None:
+        print("  Sin solución con esas restricciones")
+    else:
+        for fila in range(4):
+            print("  " + " ".join("X" if solucion[fila * 4 + c] else "." for c in range(4)))
+
+    # Contra fuerza bruta: todas las x de 3×3 y 4×4 con máscaras al azar
+    rng = random.Random(0)
+    coinciden = True
+    for n in (3, 4):
+        N = n * n
+        for _ in range(40):
+            mascara = rng.getrandbits(N) & rng.getrandbits(N)
+            forzadas_bits = mascara & rng.getrandbits(N)
+            b = rng.getrandbits(N)
+            validas = [x for x in range(1 << N) if producto_A(x, n) == b
+                       and x & mascara == forzadas_bits]
+            x = reduccion(n, mascara).resolver(b, forzadas_bits)
+            coinciden &= (x is None) == (not validas) and (x is None or x in validas)
+    print(f"\nCoincide con fuerza bruta (3×3 y 4×4): {'SÍ' if coinciden else 'NO'}")
+
+    # Lote: 19×19 (nulidad 16) con el borde bloqueado
+    n = 19
+    borde = [(0, c) for c in range(n)] + [(n - 1, c) for c in range(n)]
+    tableros = np.random.default_rng(1).integers(0, 2, size=(2000, n, n), dtype=np.uint8)
+    # Uno resoluble a propósito: presionar solo la celda central
+    tableros[0] = np.array(bits_a_vector(producto_A(1 << (n * n // 2), n), n * n)).reshape(n, n)
+
+    inicio = time.perf_counter()
+    reduccion(n, mascara_de_celdas(borde, n))
+    primera = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    soluciones, resolubles = resolver_lote_con_restricciones(tableros, bloqueadas=borde)
+    lote = time.perf_counter() - inicio
+    respetan = not soluciones[:, :n].any() and not soluciones[:, -n:].any()
+    print(f"\n{n}×{n}, borde bloqueado: {resolubles.sum()} de {len(tableros)} resolubles")
+    print(f"  Reducción de la máscara: {primera * 1e3:.2f} ms (luego en caché)")
+    print(f"  Lote: {lote * 1e3:.1f} ms, ninguna presión en el borde: {'SÍ' if respetan else 'NO'}")
+    print(f"  Nulidad con restricciones: {reduccion(n, mascara_de_celdas(borde, n)).nulidad}")
@@ -7,6 +7,9 @@ Autor: Cristian Baumann
 Fecha: Noviembre 2024
 """
 
+from metricas import REGISTRO
+
+
 def resolver_lights_out(matriz, verbose=False):
     """
     Resuelve el juego Lights Out usando eliminación de Gauss mod 2.
@@ -31,7 +34,9 @@ def resolver_lights_out(matriz, verbose=False):
         print()
     
     # Construir el sistema lineal Ax = b (mod 2)
+    inicio = REGISTRO.iniciar()
     A, b = construir_sistema(matriz, verbose)
+    REGISTRO.detener("construccion", inicio)
     
     if verbose:
         print("SISTEMA LINEAL CONSTRUIDO:")
@@ -135,7 +140,12 @@ def gauss_mod2(A, b, verbose=False):
         imprimir_matriz_aumentada_numerada(matriz_aumentada)
         print()
     
+    # Contadores locales: se publican en el registro de métricas al final
+    intercambios = 0
+    sumas_filas = 0
+    
     # Fase de eliminación hacia adelante
+    inicio = REGISTRO.iniciar()
     for col in range(n):
         if verbose:
             print(f"Procesando columna {col}:")
@@ -155,6 +165,7 @@ def gauss_mod2(A, b, verbose=False):
         # Intercambiar filas si es necesario (llevar pivot a la diagonal)
         if fila_pivot != col:
             matriz_aumentada[col], matriz_aumentada[fila_pivot] = matriz_aumentada[fila_pivot], matriz_aumentada[col]
+            intercambios += 1
             if verbose:
                 print(f"  Intercambio F{col} ↔ F{fila_pivot}")
         
@@ -164,6 +175,7 @@ def gauss_mod2(A, b, verbose=False):
         # Eliminar hacia abajo: Fi → Fi + F{col} para i > col
         for fila in range(col + 1, n):
             if matriz_aumentada[fila][col] == 1:
+                sumas_filas += 1
                 if verbose:
                     print(f"  F{fila} → F{fila} + F{col}")
                 
@@ -176,10 +188,15 @@ def gauss_mod2(A, b, verbose=False):
             imprimir_matriz_aumentada_numerada(matriz_aumentada)
             print()
     
+    REGISTRO.detener("eliminacion", inicio)
+    REGISTRO.contar("intercambios_filas", intercambios)
+    REGISTRO.contar("sumas_filas", sumas_filas)
+    
     # Fase de sustitución hacia atrás
     if verbose:
         print("SUSTITUCIÓN HACIA ATRÁS:")
     
+    inicio = REGISTRO.iniciar()
     solucion = [0] * n
     
     for i in range(n - 1, -1, -1):
@@ -201,6 +218,8 @@ def gauss_mod2(A, b, verbose=False):
         if verbose:
             print(f"    x_{i} = {solucion[i]}")
     
+    REGISTRO.detener("sustitucion", inicio)
+    
     if verbose:
         print()
     
@@ -228,6 +247,7 @@ def verificar_solucion(matriz_inicial, solucion, verbose=False):
         print()
     
     # Aplicar cada presión
+    inicio = REGISTRO.iniciar()
     for i in range(n):
         for j in range(n):
             idx = i * n + j
@@ -241,6 +261,7 @@ def verificar_solucion(matriz_inicial, solucion, verbose=False):
     
     # Verificar que todas las luces estén apagadas
     todas_apagadas = all(matriz_final[i][j] == 0 for i in range(n) for j in range(n))
+    REGISTRO.detener("verificacion", inicio)
     
     if verbose:
         print("RESULTADO FINAL:")
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - RESOLUCIÓN POLINOMIAL SOBRE GF(2)
+Resolución de tableros muy grandes usando los polinomios de Chebyshev mod 2
+
+Idea del método ("persecución de luces"):
+- Si se fijan las presiones de la fila superior X₀, cada fila siguiente queda
+  determinada: X_{k+1} = L_k + T·X_k + X_{k-1}, con T = tridiagonal(1, 1, 1)
+- Al final queda una fila residual X_n = p_n(T)·X₀ + c que debe ser nula
+- p_n cumple la recurrencia p_{k+1}(x) = x·p_k(x) + p_{k-1}(x), p₀ = 1, p₁ = x
+
+Como T es cíclica con vector e₀, el espacio GF(2)^n se identifica con
+GF(2)[x] / (χ), donde χ(x) = p_n(x + 1) es el polinomio característico de T.
+Así el sistema de la fila superior se resuelve con aritmética de polinomios:
+- Nulidad del tablero n×n = grado de mcd(p_n(x), p_n(x + 1))
+- Núcleo y solución particular se obtienen del mcd extendido
+
+Los polinomios y las filas se guardan empaquetados en enteros de Python
+(bit k = coeficiente de x^k, bit j = columna j), por lo que cada operación
+sobre una fila o un polinomio cuesta O(n/64) operaciones de palabra.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+# ===================================================================
+# ARITMÉTICA DE POLINOMIOS EN GF(2) (enteros empaquetados)
+# ===================================================================
+
+def grado(p: int) -> int:
+    """Grado del polinomio empaquetado p (-1 para el polinomio nulo)."""
+    return p.bit_length() - 1
+
+
+def multiplicar_gf2(a: int, b: int) -> int:
+    """Producto sin acarreo de dos polinomios de GF(2)[x]."""
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    resultado = 0
+    desplazamiento = 0
+    while b:
+        if b & 1:
+            resultado ^= a << desplazamiento
+        b >>= 1
+        desplazamiento += 1
+    return resultado
+
+
+def divmod_gf2(a: int, b: int) -> Tuple[int, int]:
+    """
+    División euclídea de polinomios en GF(2)[x].
+
+    Retorna:
+    --------
+    Tuple[int, int]
+        Cociente y resto de a / b
+    """
+    if b == 0:
+        raise ZeroDivisionError("División por el polinomio nulo")
+    grado_b = grado(b)
+    cociente = 0
+    while a and grado(a) >= grado_b:
+        salto = grado(a) - grado_b
+        cociente ^= 1 << salto
+        a ^= b << salto
+    return cociente, a
+
+
+def modulo_gf2(a: int, m: int) -> int:
+    """Resto de a módulo m en GF(2)[x]."""
+    return divmod_gf2(a, m)[1]
+
+
+def mcd_extendido_gf2(a: int, b: int) -> Tuple[int, int, int]:
+    """
+    Algoritmo de Euclides extendido en GF(2)[x].
+
+    Retorna:
+    --------
+    Tuple[int, int, int]
+        (g, s, t) con g = mcd(a, b) = s·a + t·b
+    """
+    r0, r1 = a, b
+    s0, s1 = 1, 0
+    t0, t1 = 0, 1
+    while r1:
+        q, r = divmod_gf2(r0, r1)
+        r0, r1 = r1, r
+        s0, s1 = s1, s0 ^ multiplicar_gf2(q, s1)
+        t0, t1 = t1, t0 ^ multiplicar_gf2(q, t1)
+    return r0, s0, t0
+
+
+def inverso_modular_gf2(a: int, m: int) -> int:
+    """Inverso de a módulo m en GF(2)[x] (requiere mcd(a, m) = 1)."""
+    g, s, _ = mcd_extendido_gf2(modulo_gf2(a, m), m)
+    if g != 1:
+        raise ValueError("El polinomio no es invertible módulo m")
+    return modulo_gf2(s, m)
+
+
+# ===================================================================
+# POLINOMIOS DE CHEBYSHEV MOD 2
+# ===================================================================
+
+def polinomio_chebyshev(n: int, desplazado: bool = False) -> int:
+    """
+    Calcula p_n(x) (o p_n(x + 1) si desplazado=True) empaquetado.
+
+    Recurrencia: p_{k+1}(x) = x·p_k(x) + p_{k-1}(x), p₀ = 1, p₁ = x
+    Para la versión desplazada se multiplica por (x + 1) en lugar de x.
+    """
+    anterior, actual = 0, 1
+    for _ in range(n):
+        siguiente = (actual << 1) ^ anterior
+        if desplazado:
+            siguiente ^= actual
+        anterior, actual = actual, siguiente
+    return actual
+
+
+def _aplicar_T(v: int, mascara: int) -> int:
+    """Aplica T = tridiagonal(1, 1, 1) a una fila empaquetada."""
+    return (v ^ (v << 1) ^ (v >> 1)) & mascara
+
+
+def evaluar_en_T(f: int, n: int) -> int:
+    """
+    Calcula f(T)·e₀ (Horner), es decir, la fila asociada al polinomio f.
+
+    Es el isomorfismo GF(2)[x]/(χ) → GF(2)^n que usa el método.
+    """
+    mascara = (1 << n) - 1
+    fila = 0
+    for k in range(grado(f), -1, -1):
+        fila = _aplicar_T(fila, mascara) ^ ((f >> k) & 1)
+    return fila
+
+
+def polinomio_de_fila(fila: int, n: int) -> int:
+    """
+    Inverso de evaluar_en_T: polinomio γ de grado < n con γ(T)·e₀ = fila.
+
+    Usa que e_k = p_k(T + I)·e₀, por lo que γ(x) = Σ fila_k · p_k(x + 1).
+    """
+    gamma = 0
+    anterior, actual = 0, 1
+    for k in range(n):
+        if (fila >> k) & 1:
+            gamma ^= actual
+        anterior, actual = actual, (actual << 1) ^ actual ^ anterior
+    return gamma
+
+
+# ===================================================================
+# ARTEFACTOS POR TAMAÑO
+# ===================================================================
+
+class ArtefactosPolinomiales(NamedTuple):
+    """Datos precalculados para resolver tableros n×n."""
+    n: int
+    p: int                      # p_n(x)
+    chi: int                    # p_n(x + 1), polinomio característico de T
+    mcd: int                    # g = mcd(p, chi)
+    modulo_reducido: int        # chi / g
+    inverso: int                # (p / g)^{-1} mod (chi / g)
+    nucleo_fila_superior: List[int]  # Base del núcleo (filas superiores)
+
+    @property
+    def nulidad(self) -> int:
+        return grado(self.mcd)
+
+
+_CACHE_ARTEFACTOS: Dict[int, ArtefactosPolinomiales] = {}
+
+
+def construir_artefactos(n: int) -> ArtefactosPolinomiales:
+    """
+    Construye (o devuelve de la caché) los artefactos para tableros n×n.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño del tablero
+
+    Retorna:
+    --------
+    ArtefactosPolinomiales
+        Polinomios, mcd, inverso modular y base del núcleo
+    """
+    if n in _CACHE_ARTEFACTOS:
+        return _CACHE_ARTEFACTOS[n]
+
+    p = polinomio_chebyshev(n)
+    chi = polinomio_chebyshev(n, desplazado=True)
+    artefactos = _artefactos_desde_polinomios(n, p, chi)
+    _CACHE_ARTEFACTOS[n] = artefactos
+    return artefactos
+
+
+def _artefactos_desde_polinomios(n: int, p: int, chi: int) -> ArtefactosPolinomiales:
+    """Completa los artefactos a partir de p_n(x) y p_n(x + 1)."""
+    g = mcd_extendido_gf2(p, chi)[0]
+    modulo_reducido = divmod_gf2(chi, g)[0]
+    p_reducido = divmod_gf2(p, g)[0]
+    if grado(modulo_reducido) > 0:
+        inverso = inverso_modular_gf2(p_reducido, modulo_reducido)
+    else:
+        inverso = 0
+
+    # Núcleo de p_n(T): múltiplos de chi/g, es decir (chi/g)·x^i con i < grado(g)
+    nucleo = [evaluar_en_T(modulo_reducido << i, n) for i in range(grado(g))]
+
+    return ArtefactosPolinomiales(n, p, chi, g, modulo_reducido, inverso, nucleo)
+
+
+def precalcular_artefactos(tamanos: Iterable[int]) -> Dict[int, ArtefactosPolinomiales]:
+    """
+    Precalcula los artefactos de varios tamaños.
+
+    Los polinomios p_n(x) y p_n(x + 1) se generan con una sola pasada de la
+    recurrencia hasta el tamaño máximo pedido.
+    """
+    pendientes = sorted(set(tamanos) - set(_CACHE_ARTEFACTOS))
+    if pendientes:
+        objetivo = set(pendientes)
+        p_ant, p_act = 0, 1
+        c_ant, c_act = 0, 1
+        for k in range(pendientes[-1] + 1):
+            if k in objetivo:
+                _CACHE_ARTEFACTOS[k] = _artefactos_desde_polinomios(k, p_act, c_act)
+            p_ant, p_act = p_act, (p_act << 1) ^ p_ant
+            c_ant, c_act = c_act, (c_act << 1) ^ c_act ^ c_ant
+    return {n: _CACHE_ARTEFACTOS[n] for n in tamanos}
+
+
+def nulidad(n: int) -> int:
+    """Dimensión del núcleo de la matriz A del tablero n×n."""
+    return construir_artefactos(n).nulidad
+
+
+# ===================================================================
+# RESOLUCIÓN
+# ===================================================================
+
+def perseguir_luces(filas: List[int], n: int, fila_superior: int) -> Tuple[List[int], int]:
+    """
+    Persigue las luces fila por fila a partir de las presiones de la fila superior.
+
+    Parámetros:
+    -----------
+    filas : List[int]
+        Tablero como n filas empaquetadas (bit j = columna j)
+    n : int
+        Tamaño del tablero
+    fila_superior : int
+        Presiones de la primera fila (empaquetadas)
+
+    Retorna:
+    --------
+    Tuple[List[int], int]
+        Presiones por fila y fila residual X_n (nula si el tablero queda apagado)
+    """
+    mascara = (1 << n) - 1
+    presiones = []
+    anterior, actual = 0, fila_superior
+    for k in range(n):
+        presiones.append(actual)
+        anterior, actual = actual, filas[k] ^ _aplicar_T(actual, mascara) ^ anterior
+    return presiones, actual
+
+
+def resolver_filas_polinomial(filas: List[int], n: int) -> Optional[List[int]]:
+    """
+    Resuelve un tablero dado como filas empaquetadas.
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Presiones por fila (empaquetadas), o None si el tablero no tiene solución
+    """
+    artefactos = construir_artefactos(n)
+
+    # Fila residual con la fila superior sin presionar: p_n(T)·X₀ = c
+    _, c = perseguir_luces(filas, n, 0)
+    gamma = polinomio_de_fila(c, n)
+
+    cociente, resto = divmod_gf2(gamma, artefactos.mcd)
+    if resto:
+        return None
+
+    if grado(artefactos.modulo_reducido) > 0:
+        phi = modulo_gf2(multiplicar_gf2(cociente, artefactos.inverso), artefactos.modulo_reducido)
+    else:
+        phi = 0
+
+    presiones, residuo = perseguir_luces(filas, n, evaluar_en_T(phi, n))
+    if residuo:
+        # No debería ocurrir: indica un error en los artefactos
+        raise RuntimeError("La persecución de luces dejó luces encendidas")
+    return presiones
+
+
+def empaquetar_filas(matriz: List[List[int]]) -> List[int]:
+    """Convierte la matriz n×n en una lista de filas empaquetadas."""
+    filas = []
+    for fila in matriz:
+        valor = 0
+        for j, luz in enumerate(fila):
+            if luz:
+                valor |= 1 << j
+        filas.append(valor)
+    return filas
+
+
+def resolver_lights_out_polinomial(matriz: List[List[int]]) -> Optional[List[int]]:
+    """
+    Resuelve el juego Lights Out con el método polinomial.
+
+    Devuelve el mismo formato que resolver_lights_out (vector de n² valores
+    por filas), pero None si el tablero no tiene solución.
+
+    Parámetros:
+    -----------
+    matriz : List[List[int]]
+        Tablero n×n con valores 0 (apagada) o 1 (encendida)
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Vector de 0s y 1s indicando qué luces presionar
+    """
+    n = len(matriz)
+    presiones = resolver_filas_polinomial(empaquetar_filas(matriz), n)
+    if presiones is None:
+        return None
+    return [(fila >> j) & 1 for fila in presiones for j in range(n)]
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import time
+
+    print("=" * 60)
+    print("LIGHTS OUT - RESOLUCIÓN POLINOMIAL (CHEBYSHEV MOD 2)")
+    print("=" * 60)
+    print()
+
+    print("Nulidad de A para n = 1..20:")
+    print("  " + " ".join(str(nulidad(n)) for n in range(1, 21)))
+    print()
+
+    inicio = time.perf_counter()
+    precalcular_artefactos(range(1, 1001))
+    print(f"Artefactos para n ≤ 1000 precalculados en {time.perf_counter() - inicio:.2f} s")
+
+    tablero_3x3 = [
+        [1, 0, 1],
+        [0, 1, 0],
+        [1, 0, 1]
+    ]
+    print(f"Solución del ejemplo 3×3: {resolver_lights_out_polinomial(tablero_3x3)}")
@@ -0,0 +1,702 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - RESOLUCIÓN ITERATIVA (WIEDEMANN POR BLOQUES) SOBRE GF(2)
+Solver para topologías irregulares grandes que solo usa productos A·x
+
+Para grafos con cientos de miles de luces no se puede eliminar una matriz
+densa. Este solver solo necesita el producto del operador disperso por un
+bloque de 64 vectores empaquetados en palabras uint64 (bit l = carril l).
+
+Método (Wiedemann por bloques de Coppersmith):
+- Se trabaja con la matriz aumentada M = [[A, b], [0, 0]] de tamaño D = N + 1
+- Si A·x* = b, el vector (x*, 1) está en el núcleo de M
+- Con X al azar (64 carriles) e Y = M·X se proyectan 64 filas de M^i·Y:
+  a_i es una matriz 64×64 y bastan unos 2D/64 términos (no 2D por carril)
+- Berlekamp-Massey matricial (base de aproximantes) da polinomios f con
+  Σ_j a_{i+j}·f_j = 0, y v = Σ_j M^j·X·f_j cae en el núcleo generalizado
+- Combinando los carriles con M·v = 0 se obtienen vectores del núcleo; si
+  alguno tiene t = 1, su parte x es la solución
+
+Antes de iterar, los grafos explícitos pasan por un filtrado (eliminación
+de filas y columnas livianas) que quita las estructuras locales cuyos
+autovalores repetidos superarían los 64 carriles del bloque.
+
+Un bloque que solo encuentra vectores con t = 0 no prueba nada: si A tiene
+más de 64 factores invariantes no triviales (un toro 40×40, cientos de
+componentes K4 iguales), ningún bloque llega a t = 1. Que no haya solución
+solo se concluye con un certificado: para A simétrica, un u con A·u = 0 y
+u·b = 1. Si los bloques no deciden, se elimina el sistema reducido (denso)
+con eliminacion_reanudable hasta MAX_DIMENSION_ELIMINACION variables; más
+allá se lanza WiedemannNoConcluyente.
+
+Cada bloque cuesta unos 3D/64 productos del operador y memoria proporcional
+a D; Berlekamp-Massey matricial es O(σ²) pasos vectorizados con σ ≈ D/32.
+Bloques distintos (con semillas distintas) pueden calcularse en procesos
+separados.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import multiprocessing
+import random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from eliminacion_reanudable import resolver_sistema_reanudable
+
+CARRILES = 64
+
+# Términos extra de la secuencia sobre el mínimo D/m + D/n
+MARGEN_SECUENCIA = 8
+
+# Peso máximo de la fila que se suma al eliminar una columna de peso 2
+PESO_MAXIMO_PIVOTE = 16
+
+# Variables del sistema reducido que todavía se eliminan en forma densa
+# cuando los bloques no deciden (unos 6 s y N² bytes con 8192)
+MAX_DIMENSION_ELIMINACION = 8192
+
+
+class WiedemannNoConcluyente(RuntimeError):
+    """
+    Los bloques no hallaron solución ni certificado de que no la hay, y el
+    sistema reducido es demasiado grande para eliminarlo.
+
+    Atributos:
+    ----------
+    dimension : int
+        Variables del sistema reducido
+    """
+
+    def __init__(self, dimension: int):
+        super().__init__(f"Wiedemann no concluyente con {dimension} variables "
+                         f"(más de {MAX_DIMENSION_ELIMINACION} para eliminar)")
+        self.dimension = dimension
+
+
+# ===================================================================
+# OPERADORES POR BLOQUES
+# ===================================================================
+
+class OperadorDisperso:
+    """
+    Operador disperso de Lights Out para un grafo arbitrario.
+
+    Cada luz i cambia al presionar cualquier luz j de vecinos[i] (que debe
+    incluir a la propia i según la regla del juego). Se guarda en formato
+    CSR con arreglos de NumPy.
+    """
+
+    def __init__(self, vecinos: Sequence[Sequence[int]]):
+        """
+        Parámetros:
+        -----------
+        vecinos : Sequence[Sequence[int]]
+            vecinos[i] = luces cuya presión afecta a la luz i (fila i de A)
+        """
+        self.dimension = len(vecinos)
+        longitudes = [len(fila) for fila in vecinos]
+        if min(longitudes, default=1) == 0:
+            raise ValueError("Cada fila de A debe tener al menos un elemento")
+        self.indptr = np.zeros(self.dimension + 1, dtype=np.int64)
+        np.cumsum(longitudes, out=self.indptr[1:])
+        self.indices = np.fromiter((j for fila in vecinos for j in fila),
+                                   dtype=np.int64, count=int(self.indptr[-1]))
+
+    @classmethod
+    def desde_grafo(cls, num_luces: int, aristas: Sequence[Tuple[int, int]]) -> "OperadorDisperso":
+        """Construye el operador de un grafo no dirigido (cada luz se afecta a sí misma)."""
+        vecinos = [[i] for i in range(num_luces)]
+        for a, c in aristas:
+            vecinos[a].append(c)
+            vecinos[c].append(a)
+        return cls(vecinos)
+
+    def aplicar_bloque(self, X: np.ndarray) -> np.ndarray:
+        """Calcula A·X para 64 vectores empaquetados por carril."""
+        return np.bitwise_xor.reduceat(X[self.indices], self.indptr[:-1])
+
+    def simetrico(self) -> bool:
+        """Indica si A = Aᵀ (mod 2: las entradas repetidas se cancelan de a pares)."""
+        filas = np.repeat(np.arange(self.dimension, dtype=np.int64), np.diff(self.indptr))
+        claves, veces = np.unique(filas * self.dimension + self.indices, return_counts=True)
+        claves = claves[veces & 1 == 1]
+        transpuestas = np.sort((claves % self.dimension) * self.dimension + claves // self.dimension)
+        return bool(np.array_equal(claves, transpuestas))
+
+
+class OperadorCuadricula:
+    """Operador del tablero n×n clásico aplicado a bloques de 64 vectores."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.dimension = n * n
+
+    def aplicar_bloque(self, X: np.ndarray) -> np.ndarray:
+        """Calcula A·X con desplazamientos sobre la vista (n, n)."""
+        T = X.reshape(self.n, self.n)
+        Y = T.copy()
+        Y[1:] ^= T[:-1]
+        Y[:-1] ^= T[1:]
+        Y[:, 1:] ^= T[:, :-1]
+        Y[:, :-1] ^= T[:, 1:]
+        return Y.reshape(-1)
+
+    def simetrico(self) -> bool:
+        return True
+
+
+def _aplicar_aumentada(operador, b: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """Calcula M·X con M = [[A, b], [0, 0]] (la última fila es la variable t)."""
+    N = operador.dimension
+    Y = np.zeros_like(X)
+    Y[:N] = operador.aplicar_bloque(X[:N])
+    Y[:N][b] ^= X[N]
+    return Y
+
+
+# ===================================================================
+# FILTRADO (ELIMINACIÓN ESTRUCTURADA)
+# ===================================================================
+
+def _filtrar(operador: OperadorDisperso, b: np.ndarray):
+    """
+    Elimina filas y columnas livianas antes de iterar.
+
+    Los grafos dispersos tienen muchas estructuras locales (luces aisladas,
+    hojas gemelas, aristas sueltas) que dan autovalores 0 y 1 con
+    multiplicidad mucho mayor que 64, y Wiedemann por bloques no puede
+    con más de 64 factores invariantes repetidos. Se eliminan como en el
+    filtrado de la criba numérica:
+    - Fila de peso 1: la variable queda fijada y se sustituye
+    - Columna de peso 1: su fila la define en función de las demás
+    - Columna de peso 2: se suma la fila más liviana a la otra
+    - Fila vacía: se descarta, o el sistema no tiene solución si b_i = 1
+
+    Retorna:
+    --------
+    Optional[Tuple[OperadorDisperso, np.ndarray, List[int], List]]
+        (operador reducido cuadrado, b reducido, columna original de cada
+        variable reducida, registro (j, S, valor) con x_j = valor ⊕ Σ_S x_k),
+        o None si el filtrado ya muestra que no hay solución
+    """
+    N = operador.dimension
+    filas = []
+    for i in range(N):
+        fila = set()
+        for j in operador.indices[operador.indptr[i]:operador.indptr[i + 1]].tolist():
+            fila ^= {j}
+        filas.append(fila)
+    columnas = [set() for _ in range(N)]
+    for i, fila in enumerate(filas):
+        for j in fila:
+            columnas[j].add(i)
+    b = [int(v) for v in b]
+
+    registro = []
+    pendientes_filas = list(range(N))
+    pendientes_columnas = list(range(N))
+
+    def quitar_fila(i):
+        for k in filas[i]:
+            columnas[k].discard(i)
+            pendientes_columnas.append(k)
+        filas[i] = None
+
+    while pendientes_filas or pendientes_columnas:
+        while pendientes_filas:
+            i = pendientes_filas.pop()
+            if filas[i] is None or len(filas[i]) > 1:
+                continue
+            if not filas[i]:
+                if b[i]:
+                    return None
+                filas[i] = None
+                continue
+            (j,) = filas[i]
+            registro.append((j, (), b[i]))
+            for r in columnas[j]:
+                if r != i:
+                    filas[r].discard(j)
+                    b[r] ^= b[i]
+                    pendientes_filas.append(r)
+            filas[i] = None
+            columnas[j] = None
+
+        while pendientes_columnas and not pendientes_filas:
+            j = pendientes_columnas.pop()
+            if columnas[j] is None or len(columnas[j]) > 2:
+                continue
+            if not columnas[j]:
+                columnas[j] = None
+                continue
+            pivote, *otra = sorted(columnas[j], key=lambda r: len(filas[r]))
+            if otra and len(filas[pivote]) > PESO_MAXIMO_PIVOTE:
+                continue
+            registro.append((j, tuple(filas[pivote] - {j}), b[pivote]))
+            if otra:
+                r = otra[0]
+                for k in filas[pivote]:
+                    if k in filas[r]:
+                        filas[r].discard(k)
+                        columnas[k].discard(r)
+                    else:
+                        filas[r].add(k)
+                        columnas[k].add(r)
+                b[r] ^= b[pivote]
+                pendientes_filas.append(r)
+            quitar_fila(pivote)
+            columnas[j] = None
+
+    restantes = [i for i in range(N) if filas[i] is not None]
+    variables = [j for j in range(N) if columnas[j] is not None]
+    posicion = {j: p for p, j in enumerate(variables)}
+    vecinos = [[posicion[k] for k in filas[i]] for i in restantes]
+    b_reducido = [b[i] for i in restantes]
+    # Cuadrado: filas repetidas (no agregan restricciones) o variables sueltas
+    while vecinos and len(vecinos) < len(variables):
+        vecinos.append(vecinos[0])
+        b_reducido.append(b_reducido[0])
+    dimension = len(vecinos)
+    variables += [None] * (dimension - len(variables))
+    return OperadorDisperso(vecinos), np.array(b_reducido, dtype=bool), variables, registro
+
+
+# ===================================================================
+# BERLEKAMP-MASSEY MATRICIAL EN GF(2)
+# ===================================================================
+
+def generador_matricial(secuencia: np.ndarray, columnas: int = CARRILES) -> List[np.ndarray]:
+    """
+    Generador lineal de una secuencia de matrices m×n sobre GF(2).
+
+    Berlekamp-Massey matricial como base de aproximantes (M-Basis) del
+    polinomio [A(x) | I_m]: cada columna guarda su parte de generador F (n
+    bits por coeficiente) y su discrepancia T = A·F (m bits por término).
+    En cada paso la eliminación se calcula sobre las 64 discrepancias con
+    enteros de Python y se aplica de una vez a todas las filas con tablas de
+    256 combinaciones de pivotes. Memoria O((n + m)·σ) palabras.
+
+    Parámetros:
+    -----------
+    secuencia : np.ndarray
+        (σ, m) uint64; secuencia[i, r] = fila r de a_i (bit c = columna c)
+    columnas : int
+        Número n de columnas de cada a_i (≤ 64)
+
+    Retorna:
+    --------
+    List[np.ndarray]
+        Polinomios f (uint64, bit c = columna c) de menor a mayor grado con
+        Σ_j a_{i+j}·f_j = 0 para 0 ≤ i < σ - grado(f)
+    """
+    sigma, m = secuencia.shape
+    s = columnas + m
+    F = np.zeros((s, sigma + 2), dtype=np.uint64)
+    T = np.zeros((s, sigma), dtype=np.uint64)
+    pesos = np.uint64(1) << np.arange(m, dtype=np.uint64)
+    for c in range(columnas):
+        bits = (secuencia >> np.uint64(c)) & np.uint64(1)
+        T[c] = (bits * pesos).sum(axis=1, dtype=np.uint64)
+        F[c, 0] = np.uint64(1) << np.uint64(c)
+    for r in range(m):
+        T[columnas + r, 0] = np.uint64(1) << np.uint64(r)
+
+    # Grados desplazados: 0 para las columnas de F, 1 para las de la identidad
+    grados = [0] * columnas + [1] * m
+    bytes_mascara = (s + 7) // 8
+    for k in range(sigma):
+        # Eliminación sobre las discrepancias; mascaras[c] = columnas que se suman a c
+        discrepancias = T[:, k].tolist()
+        mascaras = [0] * s
+        pivotes = {}
+        for c in sorted(range(s), key=grados.__getitem__):
+            d = discrepancias[c]
+            while d and (d & -d) in pivotes:
+                p = pivotes[d & -d]
+                d ^= discrepancias[p]
+                mascaras[c] ^= mascaras[p] ^ (1 << p)
+            discrepancias[c] = d
+            if d:
+                pivotes[d & -d] = c
+        if not pivotes:
+            continue
+
+        # Las fuentes son siempre pivotes: se reindexan y se agrupan de a 8
+        fuentes = np.array(sorted(pivotes.values()))
+        bits = np.unpackbits(np.frombuffer(b"".join(mk.to_bytes(bytes_mascara, "little")
+                                                     for mk in mascaras), dtype=np.uint8)
+                             .reshape(s, bytes_mascara), axis=1, bitorder="little")[:, fuentes]
+        destinos = np.flatnonzero(bits.any(axis=1))
+        indices = np.packbits(bits[destinos], axis=1, bitorder="little")
+        ancho = max(grados) + 1
+        origen_F = F[fuentes, :ancho].copy()
+        origen_T = T[fuentes, k:].copy()
+        for g in range(indices.shape[1]):
+            grupo = range(8 * g, min(8 * g + 8, len(fuentes)))
+            tabla_F = np.zeros((1 << len(grupo), ancho), dtype=np.uint64)
+            tabla_T = np.zeros((1 << len(grupo), sigma - k), dtype=np.uint64)
+            for e, fila in enumerate(grupo):
+                tabla_F[1 << e:2 << e] = tabla_F[:1 << e] ^ origen_F[fila]
+                tabla_T[1 << e:2 << e] = tabla_T[:1 << e] ^ origen_T[fila]
+            F[destinos, :ancho] ^= tabla_F[indices[:, g]]
+            T[destinos, k:] ^= tabla_T[indices[:, g]]
+
+        # Los pivotes se multiplican por x
+        F[fuentes, 1:ancho + 1] = F[fuentes, :ancho]
+        F[fuentes, 0] = 0
+        T[fuentes, k + 1:] = T[fuentes, k:-1]
+        for p in fuentes.tolist():
+            grados[p] += 1
+
+    # f_j = g[δ - j] con δ el grado desplazado de la columna
+    polinomios = []
+    for c in sorted(range(s), key=grados.__getitem__):
+        g = F[c, :grados[c] + 1]
+        if g.any():
+            polinomios.append(g[::-1].copy())
+    return polinomios
+
+
+# ===================================================================
+# MUESTREO DEL NÚCLEO
+# ===================================================================
+
+def _combinar_carriles(X: np.ndarray, mascaras: Sequence[int]) -> np.ndarray:
+    """
+    Calcula X·F para una matriz F de 64×64 bits (columna l = mascaras[l]).
+
+    El carril l del resultado es el XOR de los carriles de X marcados en
+    mascaras[l]; se resuelve con una tabla de 256 entradas por byte.
+    """
+    F = np.zeros(CARRILES, dtype=np.uint64)
+    F[:len(mascaras)] = mascaras
+    valores = np.arange(256, dtype=np.uint64)
+    pesos = np.uint64(1) << np.arange(CARRILES, dtype=np.uint64)
+    resultado = np.zeros_like(X)
+    for byte in range(8):
+        desplazamiento = np.uint64(8 * byte)
+        paridades = np.bitwise_count(valores[:, None] & ((F >> desplazamiento) & np.uint64(255))) & 1
+        tabla = (paridades.astype(np.uint64) * pesos).sum(axis=1, dtype=np.uint64)
+        resultado ^= tabla[(X >> desplazamiento) & np.uint64(255)]
+    return resultado
+
+
+def _carriles_a_enteros(V: np.ndarray) -> List[int]:
+    """Extrae los 64 carriles de V como enteros empaquetados."""
+    bits = np.unpackbits(V.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    planos = np.packbits(bits.T, axis=1, bitorder="little")
+    return [int.from_bytes(plano.tobytes(), "little") for plano in planos]
+
+
+def _muestrear_bloque(argumentos) -> Tuple[Optional[int], List[int]]:
+    """
+    Calcula un bloque de Wiedemann y busca vectores del núcleo de M.
+
+    Retorna:
+    --------
+    Tuple[Optional[int], List[int]]
+        (v empaquetado con M·v = 0 y t = 1 si se encontró, base de los
+        vectores del núcleo hallados con t = 0)
+    """
+    operador, b, semilla = argumentos
+    generador = np.random.default_rng(semilla)
+    N = operador.dimension
+    D = N + 1
+
+    def M(X):
+        return _aplicar_aumentada(operador, b, X)
+
+    # Proyección sobre m filas de A (la fila de t es siempre nula)
+    m = min(CARRILES, N)
+    filas = np.sort(generador.choice(N, size=m, replace=False))
+    X = generador.integers(0, 2**64, size=D, dtype=np.uint64)
+
+    # a_i = filas de M^i·Y, con Y = M·X: bastan D/m + D/n términos
+    sigma = -(-D // m) + -(-D // CARRILES) + MARGEN_SECUENCIA
+    secuencia = np.empty((sigma, m), dtype=np.uint64)
+    Z = M(X)
+    for i in range(sigma):
+        secuencia[i] = Z[filas]
+        if i + 1 < sigma:
+            Z = M(Z)
+
+    polinomios = generador_matricial(secuencia)[:CARRILES]
+
+    # Horner simultáneo: carril l de V = Σ_j M^j·X·f_l[j]
+    V = np.zeros(D, dtype=np.uint64)
+    for j in range(max(len(f) for f in polinomios) - 1, -1, -1):
+        V = M(V) ^ _combinar_carriles(X, [int(f[j]) if j < len(f) else 0 for f in polinomios])
+
+    # Combinaciones de carriles con M·v = 0
+    imagenes = {}   # bit pivote -> (M·v reducido, combinación de v)
+    nucleo = {}     # bit pivote -> vector del núcleo con t = 0
+    for v, mv in zip(_carriles_a_enteros(V), _carriles_a_enteros(M(V))):
+        while mv and (mv.bit_length() - 1) in imagenes:
+            imagen, combinacion = imagenes[mv.bit_length() - 1]
+            mv ^= imagen
+            v ^= combinacion
+        if mv:
+            imagenes[mv.bit_length() - 1] = (mv, v)
+        elif (v >> N) & 1:
+            return v, list(nucleo.values())
+        else:
+            while v and (v.bit_length() - 1) in nucleo:
+                v ^= nucleo[v.bit_length() - 1]
+            if v:
+                nucleo[v.bit_length() - 1] = v
+    return None, list(nucleo.values())
+
+
+# ===================================================================
+# RESOLUCIÓN
+# ===================================================================
+
+def resolver_wiedemann(operador, b: List[int], procesos: int = 1,
+                       max_bloques: int = 8, semilla: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Resuelve A·x = b (mod 2) usando solo productos del operador.
+
+    Se devuelve None solo con una prueba: el filtrado encontró una fila
+    0 = 1, un bloque dio u con A·u = 0 y u·b = 1 (A simétrica) o la
+    eliminación densa del sistema reducido no tiene solución. Los bloques que
+    solo hallan vectores con t = 0 no prueban nada y se repiten.
+
+    Parámetros:
+    -----------
+    operador : OperadorDisperso | OperadorCuadricula
+        Operador con atributo dimension y métodos aplicar_bloque y simetrico
+    b : List[int]
+        Vector independiente (estado inicial de las luces)
+    procesos : int
+        Número de procesos que calculan bloques en paralelo
+    max_bloques : int
+        Bloques a intentar antes de pasar a la eliminación densa
+    semilla : Optional[int]
+        Semilla para reproducir la ejecución
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Vector solución, o None si el sistema no tiene solución
+
+    Lanza WiedemannNoConcluyente si los bloques no deciden y el sistema
+    reducido tiene más de MAX_DIMENSION_ELIMINACION variables.
+    """
+    N = operador.dimension
+    if len(b) != N:
+        raise ValueError(f"El vector b debe tener {N} elementos")
+    if not any(b):
+        return [0] * N
+
+    b_mascara = np.array(b, dtype=bool)
+    if isinstance(operador, OperadorDisperso):
+        filtrado = _filtrar(operador, b_mascara)
+        if filtrado is None:
+            return None
+        reducido, b_reducido, variables, registro = filtrado
+    else:
+        reducido, b_reducido, variables, registro = operador, b_mascara, list(range(N)), []
+
+    if not b_reducido.any():
+        return _levantar(0, variables, registro, N)
+
+    # u del núcleo reducido → A·u = 0 en el original (sustitución con b = 0)
+    simetrico = operador.simetrico()
+    registro_homogeneo = [(j, S, 0) for j, S, _ in registro]
+
+    def certifica(u: int) -> bool:
+        if not simetrico:
+            return False
+        levantado = np.array(_levantar(u, variables, registro_homogeneo, N), dtype=bool)
+        return bool(np.count_nonzero(levantado & b_mascara) & 1)
+
+    concluyente, x_reducido = _resolver_bloques(reducido, b_reducido, procesos, max_bloques, semilla, certifica)
+    if not concluyente:
+        if reducido.dimension > MAX_DIMENSION_ELIMINACION:
+            raise WiedemannNoConcluyente(reducido.dimension)
+        solucion = resolver_sistema_reanudable(_matriz_densa(reducido), b_reducido.astype(np.uint8))
+        x_reducido = None if solucion is None else int.from_bytes(
+            np.packbits(solucion, bitorder="little").tobytes(), "little")
+    if x_reducido is None:
+        return None
+    return _levantar(x_reducido, variables, registro, N)
+
+
+def _levantar(x_reducido: int, variables: List[Optional[int]], registro: List, N: int) -> List[int]:
+    """Sustitución hacia atrás de las variables filtradas."""
+    x = [0] * N
+    for p, j in enumerate(variables):
+        if j is not None:
+            x[j] = (x_reducido >> p) & 1
+    for j, S, valor in reversed(registro):
+        x[j] = valor ^ (sum(x[k] for k in S) & 1)
+    return x
+
+
+def _matriz_densa(operador) -> np.ndarray:
+    """A como matriz (N, N) uint8, con N/64 productos por bloques de la identidad."""
+    N = operador.dimension
+    palabras = (N + 63) // 64
+    empaquetada = np.zeros((N, palabras), dtype=np.uint64)
+    for k in range(palabras):
+        X = np.zeros(N, dtype=np.uint64)
+        columnas = np.arange(64 * k, min(N, 64 * k + 64))
+        X[columnas] = np.uint64(1) << (columnas - 64 * k).astype(np.uint64)
+        empaquetada[:, k] = operador.aplicar_bloque(X)
+    bits = np.unpackbits(empaquetada.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+    return bits[:, :N]
+
+
+def _resolver_bloques(operador, b: np.ndarray, procesos: int, max_bloques: int,
+                      semilla: Optional[int], certifica) -> Tuple[bool, Optional[int]]:
+    """
+    Corre bloques de Wiedemann hasta hallar x o un certificado de que no hay.
+
+    Retorna:
+    --------
+    Tuple[bool, Optional[int]]
+        (concluyente, x empaquetado o None si se certificó que no hay solución)
+    """
+    generador_semillas = random.Random(semilla)
+    mascara_x = (1 << operador.dimension) - 1
+
+    pool = multiprocessing.Pool(procesos) if procesos > 1 else None
+    try:
+        intentos = 0
+        while intentos < max_bloques:
+            lote = [(operador, b, generador_semillas.getrandbits(63))
+                    for _ in range(max(1, procesos))]
+            resultados = pool.map(_muestrear_bloque, lote) if pool else map(_muestrear_bloque, lote)
+            for v, nucleo in resultados:
+                if v is not None and _verificar(operador, v & mascara_x, b):
+                    return True, v & mascara_x
+                if any(certifica(u & mascara_x) for u in nucleo):
+                    return True, None
+            intentos += len(lote)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return False, None
+
+
+def _verificar(operador, x: int, b: np.ndarray) -> bool:
+    """Comprueba A·x = b usando el carril 0 de un bloque."""
+    N = operador.dimension
+    X = np.array([(x >> k) & 1 for k in range(N)], dtype=np.uint64)
+    return bool(np.array_equal(operador.aplicar_bloque(X) & np.uint64(1), b.astype(np.uint64)))
+
+
+def resolver_lights_out_wiedemann(matriz: List[List[int]], procesos: int = 1) -> Optional[List[int]]:
+    """
+    Resuelve el tablero n×n clásico con el solver iterativo.
+
+    Retorna:
+    --------
+    Optional[List[int]]
+        Vector de presiones por filas, o None si el tablero no tiene solución
+    """
+    n = len(matriz)
+    b = [matriz[i][j] for i in range(n) for j in range(n)]
+    return resolver_wiedemann(OperadorCuadricula(n), b, procesos=procesos)
+
+
+# =====================================================================
+# COMPARACIÓN CON gauss_mod2 EN CASOS PEQUEÑOS
+# =====================================================================
+
+if __name__ == "__main__":
+    from resolver_lights_out import construir_sistema, gauss_mod2
+
+    print("=" * 60)
+    print("LIGHTS OUT - SOLVER ITERATIVO (WIEDEMANN) VS GAUSS MOD 2")
+    print("=" * 60)
+    print()
+
+    rng = random.Random(2024)
+    errores_totales = 0
+
+    # Tableros cuadrados clásicos, incluidos tamaños singulares (4×4, 5×5)
+    for n in range(1, 8):
+        errores = 0
+        for _ in range(5):
+            tablero = [[rng.randint(0, 1) for _ in range(n)] for _ in range(n)]
+            A, b = construir_sistema(tablero)
+            x_gauss = gauss_mod2(A, b)
+            resoluble = all(sum(A[i][j] * x_gauss[j] for j in range(n * n)) % 2 == b[i]
+                            for i in range(n * n))
+            x = resolver_lights_out_wiedemann(tablero)
+            correcto = (x is not None) == resoluble
+            if x is not None:
+                correcto = correcto and all(sum(A[i][j] * x[j] for j in range(n * n)) % 2 == b[i]
+                                            for i in range(n * n))
+            errores += not correcto
+        errores_totales += errores
+        print(f"Tableros {n}×{n}: {'OK' if errores == 0 else f'{errores} ERRORES'}")
+
+    # Grafos aleatorios irregulares
+    for num_luces in (10, 30, 60):
+        errores = 0
+        for _ in range(5):
+            aristas = [(rng.randrange(num_luces), rng.randrange(num_luces)) for _ in range(num_luces)]
+            aristas = [(a, c) for a, c in aristas if a != c]
+            operador = OperadorDisperso.desde_grafo(num_luces, aristas)
+            A = [[0] * num_luces for _ in range(num_luces)]
+            for i in range(num_luces):
+                for j in operador.indices[operador.indptr[i]:operador.indptr[i + 1]]:
+                    A[i][j] ^= 1
+            b = [rng.randint(0, 1) for _ in range(num_luces)]
+            x_gauss = gauss_mod2(A, b)
+            resoluble = all(sum(A[i][j] * x_gauss[j] for j in range(num_luces)) % 2 == b[i]
+                            for i in range(num_luces))
+            x = resolver_wiedemann(operador, b)
+            correcto = (x is not None) == resoluble and (
+                x is None or all(sum(A[i][j] * x[j] for j in range(num_luces)) % 2 == b[i]
+                                 for i in range(num_luces)))
+            errores += not correcto
+        errores_totales += errores
+        print(f"Grafos de {num_luces} luces: {'OK' if errores == 0 else f'{errores} ERRORES'}")
+
+    # Más de 64 factores invariantes repetidos: los bloques no llegan a t = 1
+    lado, componentes = 40, 300
+    toro = OperadorDisperso.desde_grafo(lado * lado, [
+        (i * lado + j, vecino) for i in range(lado) for j in range(lado)
+        for vecino in (i * lado + (j + 1) % lado, (i + 1) % lado * lado + j)])
+    cliques = OperadorDisperso.desde_grafo(4 * componentes, [
+        (4 * k + a, 4 * k + c) for k in range(componentes) for a in range(4) for c in range(a + 1, 4)])
+    for nombre, operador in ((f"Toro {lado}×{lado}", toro), (f"{componentes} componentes K4", cliques)):
+        errores = 0
+        for alcanzable in (True, False):
+            x = np.array([rng.randint(0, 1) for _ in range(operador.dimension)], dtype=np.uint64)
+            b = (operador.aplicar_bloque(x) & np.uint64(1)).astype(int).tolist()
+            if not alcanzable:
+                b[0] ^= 1  # Cambiar una sola luz no es alcanzable en ninguno de los dos
+            x = resolver_wiedemann(operador, b, semilla=0)
+            correcto = (x is not None) == alcanzable and (x is None or np.array_equal(
+                operador.aplicar_bloque(np.array(x, dtype=np.uint64)) & np.uint64(1),
+                np.array(b, dtype=np.uint64)))
+            errores += not correcto
+        errores_totales += errores
+        print(f"{nombre}: {'OK' if errores == 0 else f'{errores} ERRORES'}")
+
+    # Escala: grafo aleatorio grande con b alcanzable
+    import time
+    num_luces = 20000
+    aristas = [(rng.randrange(num_luces), rng.randrange(num_luces)) for _ in range(2 * num_luces)]
+    operador = OperadorDisperso.desde_grafo(num_luces, [(a, c) for a, c in aristas if a != c])
+    x = np.array([rng.randint(0, 1) for _ in range(num_luces)], dtype=np.uint64)
+    b = (operador.aplicar_bloque(x) & np.uint64(1)).astype(int).tolist()
+    inicio = time.perf_counter()
+    x = resolver_wiedemann(operador, b, semilla=0)
+    correcto = x is not None and np.array_equal(
+        operador.aplicar_bloque(np.array(x, dtype=np.uint64)) & np.uint64(1), np.array(b, dtype=np.uint64))
+    errores_totales += not correcto
+    print(f"Grafo de {num_luces} luces: {'OK' if correcto else 'ERROR'} "
+          f"({time.perf_counter() - inicio:.1f} s)")
+
+    print()
+    print(f"RESULTADO: {'ÉXITO' if errores_totales == 0 else f'{errores_totales} ERRORES'}")
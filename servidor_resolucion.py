@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - SERVIDOR LOCAL DE RESOLUCIÓN
+Servidor asyncio que agrupa solicitudes concurrentes en micro-lotes
+
+Protocolo: una línea JSON por solicitud y una línea JSON por respuesta,
+sobre un socket Unix o TCP en localhost.
+
+    → {"id": 1, "tablero": [[1, 0, 1], [0, 1, 0], [1, 0, 1]], "plazo_ms": 200}
+    ← {"id": 1, "resoluble": true, "solucion": [1, 1, 1, 1, 1, 1, 1, 1, 1]}
+
+La solución tiene el mismo formato que resolver_lights_out. Las solicitudes
+del mismo tamaño que llegan dentro de una ventana corta se resuelven juntas
+con motor_vectorizado.resolver_lote, usando la factorización en caché de
+cada tamaño.
+
+Control de carga:
+- Límite global de solicitudes pendientes (las que exceden se rechazan)
+- Límite de solicitudes en curso por conexión (deja de leer el socket)
+- Plazo por solicitud: si vence antes de resolverse se responde con error
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from metricas import REGISTRO
+from motor_vectorizado import precalentar, resolver_lote
+
+
+class _Pendiente:
+    """Solicitud a la espera de su micro-lote."""
+
+    __slots__ = ("tablero", "vence", "futuro")
+
+    def __init__(self, tablero: List[List[int]], vence: float, futuro: asyncio.Future):
+        self.tablero = tablero
+        self.vence = vence
+        self.futuro = futuro
+
+
+class ServidorResolucion:
+    """
+    Servidor de resolución con micro-lotes por tamaño de tablero.
+
+    Parámetros:
+    -----------
+    max_lote : int
+        Máximo de tableros por micro-lote
+    ventana_ms : float
+        Tiempo máximo que espera un lote para llenarse
+    max_pendientes : int
+        Solicitudes pendientes admitidas antes de rechazar (backpressure)
+    max_en_curso_conexion : int
+        Solicitudes simultáneas por conexión antes de dejar de leer
+    plazo_ms : float
+        Plazo por defecto de cada solicitud
+    tamano_maximo : int
+        Tamaño de tablero más grande aceptado
+    """
+
+    def __init__(self, max_lote: int = 256, ventana_ms: float = 2.0,
+                 max_pendientes: int = 10000, max_en_curso_conexion: int = 64,
+                 plazo_ms: float = 1000.0, tamano_maximo: int = 64):
+        self.max_lote = max_lote
+        self.ventana = ventana_ms / 1000.0
+        self.max_pendientes = max_pendientes
+        self.max_en_curso_conexion = max_en_curso_conexion
+        self.plazo = plazo_ms / 1000.0
+        self.tamano_maximo = tamano_maximo
+
+        self._colas: Dict[int, asyncio.Queue] = {}
+        self._despachadores: Dict[int, asyncio.Task] = {}
+        self._pendientes = 0
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    # ---------------------------------------------------------------
+    # Resolución
+    # ---------------------------------------------------------------
+
+    async def resolver(self, tablero: List[List[int]], plazo_ms: Optional[float] = None) -> dict:
+        """
+        Resuelve un tablero dentro del servidor (sin pasar por el socket).
+
+        Retorna:
+        --------
+        dict
+            {"resoluble": bool, "solucion": [...]} o {"error": "..."}
+        """
+        REGISTRO.contar("servidor_solicitudes")
+        error = self._validar(tablero)
+        if error:
+            return {"error": error}
+        n = len(tablero)
+
+        if self._pendientes >= self.max_pendientes:
+            REGISTRO.contar("servidor_rechazos")
+            return {"error": "Servidor saturado, reintente más tarde"}
+
+        plazo = self.plazo if plazo_ms is None else plazo_ms / 1000.0
+        bucle = asyncio.get_running_loop()
+        pendiente = _Pendiente(tablero, bucle.time() + plazo, bucle.create_future())
+
+        self._pendientes += 1
+        try:
+            self._cola(n).put_nowait(pendiente)
+            return await asyncio.wait_for(asyncio.shield(pendiente.futuro), plazo)
+        except asyncio.TimeoutError:
+            REGISTRO.contar("servidor_plazos_vencidos")
+            pendiente.futuro.cancel()
+            return {"error": "Plazo vencido"}
+        finally:
+            self._pendientes -= 1
+
+    def _validar(self, tablero) -> Optional[str]:
+        """Mensaje de error si el tablero no es una matriz n×n de ceros y unos."""
+        if not isinstance(tablero, list) or not 1 <= len(tablero) <= self.tamano_maximo:
+            return f"El tablero debe ser n×n con 1 ≤ n ≤ {self.tamano_maximo}"
+        n = len(tablero)
+        if any(not isinstance(fila, list) or len(fila) != n for fila in tablero):
+            return f"El tablero debe ser n×n con 1 ≤ n ≤ {self.tamano_maximo}"
+        if not all(isinstance(celda, int) and celda in (0, 1) for fila in tablero for celda in fila):
+            return "Las celdas del tablero deben ser 0 o 1"
+        return None
+
+    def _cola(self, n: int) -> asyncio.Queue:
+        """Cola del tamaño n (crea su despachador la primera vez)."""
+        if n not in self._colas:
+            self._colas[n] = asyncio.Queue()
+            self._despachadores[n] = asyncio.create_task(self._despachar(n))
+        return self._colas[n]
+
+    async def _despachar(self, n: int):
+        """Arma micro-lotes del tamaño n y los resuelve en un hilo aparte."""
+        cola = self._colas[n]
+        bucle = asyncio.get_running_loop()
+        while True:
+            lote = [await cola.get()]
+            cierre = bucle.time() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = cierre - bucle.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            ahora = bucle.time()
+            vigentes = [p for p in lote if not p.futuro.done() and p.vence > ahora]
+            if not vigentes:
+                continue
+
+            # Un tablero que no se puede convertir solo falla su propia solicitud
+            tableros = np.empty((len(vigentes), n, n), dtype=np.uint8)
+            validos = []
+            for p in vigentes:
+                try:
+                    tableros[len(validos)] = p.tablero
+                except (TypeError, ValueError, OverflowError) as e:
+                    p.futuro.set_result({"error": f"Tablero inválido: {e}"})
+                else:
+                    validos.append(p)
+            if not validos:
+                continue
+            vigentes = validos
+
+            REGISTRO.contar("servidor_lotes")
+            REGISTRO.contar("servidor_tableros_en_lotes", len(vigentes))
+            try:
+                soluciones, resolubles = await bucle.run_in_executor(None, resolver_lote,
+                                                                     tableros[:len(vigentes)])
+            except Exception as e:
+                for p in vigentes:
+                    if not p.futuro.done():
+                        p.futuro.set_result({"error": f"Error interno: {e}"})
+                continue
+
+            for p, solucion, resoluble in zip(vigentes, soluciones, resolubles):
+                if not p.futuro.done():
+                    p.futuro.set_result({"resoluble": bool(resoluble), "solucion": solucion.tolist()})
+
+    # ---------------------------------------------------------------
+    # Red
+    # ---------------------------------------------------------------
+
+    async def _atender_conexion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Lee solicitudes JSON por línea y responde en el orden en que terminan."""
+        en_curso = asyncio.Semaphore(self.max_en_curso_conexion)
+        candado_escritura = asyncio.Lock()
+        tareas = set()
+
+        async def atender(linea: bytes):
+            try:
+                try:
+                    solicitud = json.loads(linea)
+                    respuesta = await self.resolver(solicitud["tablero"], solicitud.get("plazo_ms"))
+                    respuesta["id"] = solicitud.get("id")
+                except (ValueError, KeyError, TypeError) as e:
+                    respuesta = {"error": f"Solicitud inválida: {e}"}
+                async with candado_escritura:
+                    escritor.write(json.dumps(respuesta).encode() + b"\n")
+                    await escritor.drain()
+            finally:
+                en_curso.release()
+
+        try:
+            while True:
+                await en_curso.acquire()
+                linea = await lector.readline()
+                if not linea:
+                    en_curso.release()
+                    break
+                tarea = asyncio.create_task(atender(linea))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+            if tareas:
+                await asyncio.gather(*tareas, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, ruta_unix: Optional[str] = None, host: str = "127.0.0.1", puerto: int = 8765):
+        """Empieza a escuchar en un socket Unix (si se indica ruta) o en TCP local."""
+        if ruta_unix:
+            self._servidor = await asyncio.start_unix_server(self._atender_conexion, path=ruta_unix)
+        else:
+            self._servidor = await asyncio.start_server(self._atender_conexion, host, puerto)
+
+    async def cerrar(self):
+        """Deja de aceptar conexiones y detiene los despachadores."""
+        if self._servidor:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        for tarea in self._despachadores.values():
+            tarea.cancel()
+        await asyncio.gather(*self._despachadores.values(), return_exceptions=True)
+        self._despachadores.clear()
+        self._colas.clear()
+
+
+async def _ejecutar(argumentos, tamanos: Iterable[int]):
+    if argumentos.registro_compartido:
+        from registro_compartido import habilitar_registro_compartido
+        habilitar_registro_compartido(argumentos.registro_compartido)
+    inicio = time.perf_counter()
+    precalentar(tamanos)
+    print(f"Factorizaciones precalculadas en {time.perf_counter() - inicio:.2f} s")
+
+    servidor = ServidorResolucion(max_lote=argumentos.max_lote, ventana_ms=argumentos.ventana_ms,
+                                  max_pendientes=argumentos.max_pendientes,
+                                  plazo_ms=argumentos.plazo_ms)
+    await servidor.iniciar(argumentos.unix, argumentos.host, argumentos.puerto)
+    destino = argumentos.unix or f"{argumentos.host}:{argumentos.puerto}"
+    print(f"Servidor escuchando en {destino} (Ctrl+C para salir)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.cerrar()
+
+
+def main():
+    """Punto de entrada por línea de comandos."""
+    parser = argparse.ArgumentParser(description="Servidor local de resolución Lights Out")
+    parser.add_argument("--unix", help="Ruta del socket Unix (si no, TCP en localhost)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--precalentar", default="3,4,5", help="Tamaños a factorizar al iniciar")
+    parser.add_argument("--registro-compartido", metavar="PREFIJO",
+                        help="Compartir las factorizaciones con otros procesos por memoria compartida")
+    parser.add_argument("--max-lote", type=int, default=256)
+    parser.add_argument("--ventana-ms", type=float, default=2.0)
+    parser.add_argument("--max-pendientes", type=int, default=10000)
+    parser.add_argument("--plazo-ms", type=float, default=1000.0)
+    argumentos = parser.parse_args()
+
+    tamanos = [int(t) for t in argumentos.precalentar.split(",") if t.strip()]
+    try:
+        asyncio.run(_ejecutar(argumentos, tamanos))
+    except KeyboardInterrupt:
+        print("\nServidor detenido")
+
+
+if __name__ == "__main__":
+    main()
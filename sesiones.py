@@ -0,0 +1,549 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - GRABACIÓN Y ANÁLISIS DE SESIONES
+Registro binario de partidas (solo se agrega al final) y su análisis
+vectorizado, sin depender de Pygame
+
+Todo el archivo es una secuencia de enteros en varint (7 bits por byte, el
+bit alto indica que sigue otro byte). Una sesión empieza con
+
+    0, versión, n, inicio (ms desde la época), tablero inicial
+
+donde el tablero va empaquetado (bit i·n + j = luz (i, j)) en ⌈n²/56⌉
+fragmentos de 56 bits. Después sigue un par (código, ms desde el evento
+anterior) por evento:
+
+    código 1         el tablero volvió al estado inicial
+    código 2 + 2·k   presión manual de la luz k
+    código 3 + 2·k   presión automática de la luz k (reproducción de la solución)
+
+Los fragmentos y los ms se guardan sumándoles 1, de modo que el varint 0
+solo aparece al comienzo de una sesión: la lectura ubica todas las
+sesiones con una sola búsqueda en NumPy. Una escritura interrumpida puede
+dejar al final un evento o una cabecera incompletos, que la lectura
+descarta, o un varint cortado (bytes con el bit alto encendido). Este
+último absorbería el 0 de la sesión siguiente y rompería la división en
+sesiones de todo lo que sigue, así que GrabadorSesiones lo recorta al
+abrir el archivo antes de agregar nada.
+
+El análisis decodifica todos los varints de un archivo de una vez y
+reconstruye los estados con XOR acumulados de las máscaras de presión
+(tableros de hasta 64 luces en uint64; los más grandes con enteros).
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from estadisticas import pesos_minimos
+from motor_vectorizado import empaquetar_uint64, factorizacion, resolver_lote
+from operador_implicito import producto_A
+
+VERSION = 1
+_BITS_FRAGMENTO = 56
+_CODIGO_REINICIO = 1
+_CODIGO_PRESION = 2
+TAMANO_MAXIMO_OPTIMO = 32  # Más allá no se calcula el óptimo (factorización muy costosa)
+MAX_NULIDAD_OPTIMO = 16    # Más allá tampoco (2^nulidad soluciones por tablero)
+
+
+def _agregar_varint(salida: bytearray, valor: int):
+    while valor >= 0x80:
+        salida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+
+def _fragmentos(n: int) -> int:
+    return -(-n * n // _BITS_FRAGMENTO)
+
+
+def _recortar_varint_cortado(archivo):
+    """Trunca el archivo después del último byte que termina un varint."""
+    fin = archivo.seek(0, 2)
+    while fin > 0:
+        desde = max(0, fin - 64)
+        archivo.seek(desde)
+        finales = np.flatnonzero(np.frombuffer(archivo.read(fin - desde), dtype=np.uint8) < 0x80)
+        if len(finales):
+            fin = desde + int(finales[-1]) + 1
+            break
+        fin = desde
+    if fin < archivo.seek(0, 2):
+        archivo.truncate(fin)
+
+
+# ===================================================================
+# GRABACIÓN
+# ===================================================================
+
+class GrabadorSesiones:
+    """
+    Agrega sesiones a un registro binario con escrituras agrupadas.
+
+    Los eventos se acumulan en memoria y se escriben cuando el búfer supera
+    tamano_buffer bytes o pasó más de intervalo segundos desde la última
+    escritura (así una caída pierde a lo sumo ese intervalo).
+
+    Parámetros:
+    -----------
+    ruta : str
+        Archivo del registro (se crea si no existe; nunca se sobrescribe,
+        solo se recorta un varint cortado al final)
+    tamano_buffer : int
+        Bytes acumulados antes de escribir
+    intervalo : float
+        Segundos máximos entre escrituras
+    """
+
+    def __init__(self, ruta: str, tamano_buffer: int = 1 << 16, intervalo: float = 1.0):
+        self.ruta = ruta
+        self.tamano_buffer = tamano_buffer
+        self.intervalo = intervalo
+        self._archivo = open(ruta, "a+b")
+        _recortar_varint_cortado(self._archivo)
+        self._buffer = bytearray()
+        self._ultima_escritura = time.monotonic()
+        self._ultimo_evento: Optional[float] = None
+        self.n: Optional[int] = None
+
+    def iniciar(self, n: int, tablero: int):
+        """Empieza una sesión nueva con el tablero inicial empaquetado."""
+        self.n = n
+        self._ultimo_evento = time.monotonic()
+        self._cabecera(n, tablero, int(time.time() * 1000))
+        self._quizas_vaciar()
+
+    def agregar_sesion(self, n: int, tablero: int, inicio_ms: int, indices: Sequence[int],
+                       deltas_ms: Sequence[int], automaticas: Optional[Sequence[bool]] = None):
+        """
+        Escribe de una vez una sesión ya terminada (con sus propios tiempos).
+
+        Parámetros:
+        -----------
+        n : int
+            Tamaño del tablero
+        tablero : int
+            Tablero inicial empaquetado
+        inicio_ms : int
+            Inicio en ms desde la época
+        indices : Sequence[int]
+            Luz presionada en cada evento, -1 para un reinicio (como en
+            RegistroSesiones)
+        deltas_ms : Sequence[int]
+            ms desde el evento anterior (o desde el inicio)
+        automaticas : Optional[Sequence[bool]]
+            Presiones hechas por el reproductor (por omisión, ninguna)
+        """
+        if automaticas is None:
+            automaticas = [False] * len(indices)
+        self._cabecera(n, tablero, inicio_ms)
+        for indice, delta, automatica in zip(indices, deltas_ms, automaticas):
+            if not -1 <= indice < n * n:
+                raise ValueError(f"Índice {indice} fuera del tablero {n}×{n}")
+            codigo = _CODIGO_REINICIO if indice < 0 else _CODIGO_PRESION + 2 * indice + int(automatica)
+            _agregar_varint(self._buffer, codigo)
+            _agregar_varint(self._buffer, max(0, delta) + 1)
+        self.n = None  # Los eventos siguientes necesitan una sesión nueva
+        self._quizas_vaciar()
+
+    def _cabecera(self, n: int, tablero: int, inicio_ms: int):
+        for valor in (0, VERSION, n, inicio_ms):
+            _agregar_varint(self._buffer, valor)
+        mascara = (1 << _BITS_FRAGMENTO) - 1
+        for k in range(_fragmentos(n)):
+            _agregar_varint(self._buffer, ((tablero >> (_BITS_FRAGMENTO * k)) & mascara) + 1)
+
+    def _evento(self, codigo: int):
+        if self.n is None:
+            raise ValueError("No hay una sesión iniciada")
+        ahora = time.monotonic()
+        delta = max(0, int(round((ahora - self._ultimo_evento) * 1000)))
+        self._ultimo_evento += delta / 1000
+        _agregar_varint(self._buffer, codigo)
+        _agregar_varint(self._buffer, delta + 1)
+        self._quizas_vaciar()
+
+    def presion(self, indice: int, automatica: bool = False):
+        """Registra la presión de la luz indice = fila·n + columna."""
+        if not 0 <= indice < self.n * self.n:
+            raise ValueError(f"Índice {indice} fuera del tablero {self.n}×{self.n}")
+        self._evento(_CODIGO_PRESION + 2 * indice + int(automatica))
+
+    def reinicio(self):
+        """Registra que el tablero volvió a su estado inicial."""
+        self._evento(_CODIGO_REINICIO)
+
+    def _quizas_vaciar(self):
+        if (len(self._buffer) >= self.tamano_buffer
+                or time.monotonic() - self._ultima_escritura >= self.intervalo):
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe los eventos acumulados."""
+        if self._buffer:
+            self._archivo.write(self._buffer)
+            self._archivo.flush()
+            self._buffer.clear()
+        self._ultima_escritura = time.monotonic()
+
+    def cerrar(self):
+        """Escribe lo pendiente y cierra el archivo."""
+        if not self._archivo.closed:
+            self.vaciar()
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+        return False
+
+
+# ===================================================================
+# LECTURA
+# ===================================================================
+
+class RegistroSesiones(NamedTuple):
+    """Sesiones leídas de uno o más registros, con los eventos en arreglos planos."""
+    n: np.ndarray              # (sesiones,) tamaño de cada tablero
+    inicio_ms: np.ndarray      # (sesiones,) inicio en ms desde la época
+    tableros: List[int]        # Tablero inicial empaquetado de cada sesión
+    sesion: np.ndarray         # (eventos,) sesión a la que pertenece cada evento
+    indices: np.ndarray        # (eventos,) luz presionada, -1 si es un reinicio
+    automaticas: np.ndarray    # (eventos,) True si la presión la hizo el reproductor
+    tiempos_ms: np.ndarray     # (eventos,) ms desde el inicio de la sesión
+
+    @property
+    def cantidad(self) -> int:
+        return len(self.n)
+
+
+def decodificar_varints(datos: bytes) -> np.ndarray:
+    """Decodifica todos los varints completos de datos (uint64)."""
+    octetos = np.frombuffer(datos, dtype=np.uint8)
+    finales = np.flatnonzero(octetos < 0x80)
+    if not len(finales):
+        return np.zeros(0, dtype=np.uint64)
+    octetos = octetos[:finales[-1] + 1]  # Descarta un varint cortado al final
+    inicios = np.concatenate(([0], finales[:-1] + 1))
+    posicion = np.arange(len(octetos)) - np.repeat(inicios, finales - inicios + 1)
+    partes = (octetos & 0x7F).astype(np.uint64) << (7 * posicion).astype(np.uint64)
+    return np.bitwise_or.reduceat(partes, inicios)
+
+
+def _tablero_de_fragmentos(fragmentos: np.ndarray) -> int:
+    octetos = ((fragmentos - np.uint64(1))[:, None] >> (8 * np.arange(7, dtype=np.uint64))) & np.uint64(0xFF)
+    return int.from_bytes(octetos.astype(np.uint8).tobytes(), "little")
+
+
+def _leer_tokens(ruta: str, tokens: np.ndarray):
+    """Sesiones de un archivo: (n, inicio_ms, tableros, posición del primer evento, eventos)."""
+    if len(tokens) and tokens[0] != 0:
+        raise ValueError(f"{ruta}: el registro no empieza con una sesión")
+    inicios = np.flatnonzero(tokens == 0)
+    hasta = np.append(inicios[1:], len(tokens))
+    # Una escritura cortada puede dejar una cabecera incompleta antes de la
+    # sesión siguiente: se descarta antes de mirar la versión
+    completas = hasta - inicios >= 4
+    inicios, hasta = inicios[completas], hasta[completas]
+    versiones = tokens[inicios + 1]
+    if (versiones != VERSION).any():
+        raise ValueError(f"{ruta}: versión de registro {int(versiones[versiones != VERSION][0])} no soportada")
+    n = tokens[inicios + 2].astype(np.int64)
+    inicio_ms = tokens[inicios + 3].astype(np.int64)
+    fragmentos = -(-n * n // _BITS_FRAGMENTO)
+    desde = inicios + 4 + fragmentos
+    completas = desde <= hasta  # Fragmentos del tablero cortados
+    inicios, n, inicio_ms, fragmentos, desde, hasta = (
+        arreglo[completas] for arreglo in (inicios, n, inicio_ms, fragmentos, desde, hasta))
+
+    # Tableros de hasta 64 luces (1 o 2 fragmentos) en bloque; el resto uno por uno
+    tableros = np.zeros(len(inicios), dtype=np.uint64)
+    chicos = n * n <= 64
+    primeros = tokens[inicios[chicos] + 4] - np.uint64(1)
+    segundos = np.where(fragmentos[chicos] == 2,
+                        tokens[np.minimum(inicios[chicos] + 5, len(tokens) - 1)] - np.uint64(1), 0)
+    tableros[chicos] = primeros | (segundos.astype(np.uint64) << np.uint64(_BITS_FRAGMENTO))
+    tableros = tableros.tolist()
+    for k in np.flatnonzero(~chicos).tolist():
+        tableros[k] = _tablero_de_fragmentos(tokens[inicios[k] + 4:desde[k]])
+
+    return n, inicio_ms, tableros, desde, (hasta - desde) // 2
+
+
+def leer_registro(*rutas: str) -> RegistroSesiones:
+    """
+    Lee las sesiones de uno o más archivos de registro.
+
+    Los registros incompletos al final de un archivo (escritura cortada) se
+    descartan; una sesión cuya cabecera está cortada no se incluye.
+    """
+    tamanos, inicios, tableros, codigos, deltas, longitudes = [], [], [], [], [], []
+    for ruta in rutas:
+        with open(ruta, "rb") as archivo:
+            tokens = decodificar_varints(archivo.read())
+        n, inicio_ms, tableros_archivo, desde, eventos = _leer_tokens(ruta, tokens)
+        # Posición del código de cada evento, sesión por sesión
+        primeros = np.cumsum(eventos) - eventos
+        posiciones = np.repeat(desde - 2 * primeros, eventos) + 2 * np.arange(eventos.sum())
+        tamanos.append(n)
+        inicios.append(inicio_ms)
+        tableros.extend(tableros_archivo)
+        codigos.append(tokens[posiciones].astype(np.int64))
+        deltas.append(tokens[posiciones + 1].astype(np.int64) - 1)
+        longitudes.append(eventos)
+
+    def unir(partes, dtype=np.int64):
+        return np.concatenate(partes).astype(dtype) if partes else np.zeros(0, dtype=dtype)
+
+    longitudes = unir(longitudes)
+    codigos, deltas = unir(codigos), unir(deltas)
+    sesion = np.repeat(np.arange(len(longitudes)), longitudes)
+    acumulado = np.cumsum(deltas)
+    # ms acumulados antes del primer evento de cada sesión
+    base = np.concatenate(([0], acumulado))[np.cumsum(longitudes) - longitudes]
+
+    presion = codigos >= _CODIGO_PRESION
+    return RegistroSesiones(
+        n=unir(tamanos),
+        inicio_ms=unir(inicios),
+        tableros=tableros,
+        sesion=sesion,
+        indices=np.where(presion, (codigos - _CODIGO_PRESION) >> 1, -1),
+        automaticas=presion & ((codigos - _CODIGO_PRESION) & 1 == 1),
+        tiempos_ms=acumulado - base[sesion],
+    )
+
+
+# ===================================================================
+# REPRODUCCIÓN Y ESTADÍSTICAS
+# ===================================================================
+
+class ResumenSesiones(NamedTuple):
+    """Estadísticas por sesión."""
+    n: np.ndarray                  # (sesiones,)
+    presiones: np.ndarray          # Presiones manuales hasta resolver (o en total)
+    asistidas: np.ndarray          # True si hubo presiones automáticas antes de resolver
+    optimas: np.ndarray            # Presiones mínimas del tablero inicial (-1: sin solución o no calculado)
+    resuelta: np.ndarray           # Se llegó a todas las luces apagadas
+    tiempo_resolucion: np.ndarray  # Segundos hasta resolver (nan si no se resolvió)
+
+
+def _recorrer(registro: RegistroSesiones) -> Tuple[List[int], np.ndarray]:
+    """
+    Estado final de cada sesión y primer evento que dejó el tablero apagado.
+
+    Retorna:
+    --------
+    Tuple[List[int], np.ndarray]
+        (tableros finales empaquetados, índice global del evento que resolvió
+        cada sesión: -1 si ya empezó resuelta, -2 si no se resolvió)
+    """
+    finales = list(registro.tableros)
+    resolucion = np.full(registro.cantidad, -2, dtype=np.int64)
+    resolucion[[k for k, tablero in enumerate(registro.tableros) if tablero == 0]] = -1
+    n_evento = registro.n[registro.sesion]
+
+    for n in np.unique(registro.n).tolist():
+        eventos = np.flatnonzero(n_evento == n)
+        if not len(eventos):
+            continue
+        sesiones = registro.sesion[eventos]
+        indices = registro.indices[eventos]
+        mascaras = [producto_A(1 << k, n) for k in range(n * n)]
+
+        if n * n > 64:
+            # Tableros grandes: XOR de enteros, evento por evento
+            actual = None
+            for k, (s, i) in enumerate(zip(sesiones.tolist(), indices.tolist())):
+                if s != actual:
+                    actual, estado = s, registro.tableros[s]
+                estado = registro.tableros[s] if i < 0 else estado ^ mascaras[i]
+                finales[s] = estado
+                if estado == 0 and resolucion[s] == -2:
+                    resolucion[s] = eventos[k]
+            continue
+
+        # Estado tras el evento e: inicial ⊕ (XOR de las máscaras desde el
+        # último reinicio o el comienzo de la sesión), con XOR acumulados
+        reinicio = indices < 0
+        valores = np.where(reinicio, np.uint64(0),
+                           np.array(mascaras, dtype=np.uint64)[np.maximum(indices, 0)])
+        acumulado = np.concatenate(([np.uint64(0)], np.bitwise_xor.accumulate(valores)))
+        posicion = np.arange(len(eventos))
+        primeros = np.flatnonzero(np.concatenate(([True], sesiones[1:] != sesiones[:-1])))
+        marcas = np.where(reinicio, posicion + 1, 0)
+        marcas[primeros] = np.maximum(marcas[primeros], primeros)
+        base = np.maximum.accumulate(marcas)
+
+        iniciales = np.array([registro.tableros[s] for s in sesiones[primeros].tolist()], dtype=np.uint64)
+        estados = (np.repeat(iniciales, np.diff(np.append(primeros, len(eventos))))
+                   ^ acumulado[posicion + 1] ^ acumulado[base])
+
+        ultimos = np.append(primeros[1:], len(eventos)) - 1
+        for s, estado in zip(sesiones[ultimos].tolist(), estados[ultimos].tolist()):
+            finales[s] = estado
+        apagados = np.flatnonzero(estados == 0)
+        resueltas, primera = np.unique(sesiones[apagados], return_index=True)
+        pendientes = resolucion[resueltas] == -2
+        resolucion[resueltas[pendientes]] = eventos[apagados[primera[pendientes]]]
+    return finales, resolucion
+
+
+def estados_finales(registro: RegistroSesiones) -> List[int]:
+    """Tablero empaquetado al final de cada sesión."""
+    return _recorrer(registro)[0]
+
+
+def presiones_optimas(n: int, tableros: List[int]) -> np.ndarray:
+    """
+    Presiones mínimas de cada tablero empaquetado.
+
+    -1 si el tablero no tiene solución o si la nulidad de n supera
+    MAX_NULIDAD_OPTIMO (el mínimo no se calcula).
+    """
+    f = factorizacion(n)
+    if f.nulidad > MAX_NULIDAD_OPTIMO:
+        return np.full(len(tableros), -1, dtype=np.int64)
+    N = n * n
+    bytes_tablero = (N + 7) // 8
+    datos = b"".join(tablero.to_bytes(bytes_tablero, "little") for tablero in tableros)
+    bits = np.unpackbits(np.frombuffer(datos, dtype=np.uint8).reshape(len(tableros), bytes_tablero),
+                         axis=1, count=N, bitorder="little")
+    soluciones, resolubles = resolver_lote(bits)
+
+    if f.nulidad:
+        _, _, K = f.matrices()
+        pesos = pesos_minimos(empaquetar_uint64(soluciones), empaquetar_uint64(K.astype(np.uint8)))
+    else:
+        pesos = soluciones.sum(axis=1, dtype=np.int64)
+    return np.where(resolubles, pesos, -1)
+
+
+def analizar_sesiones(registro: RegistroSesiones) -> ResumenSesiones:
+    """Presiones frente al óptimo y tiempo hasta resolver de cada sesión."""
+    _, resolucion = _recorrer(registro)
+    resuelta = resolucion != -2
+
+    # Solo cuentan los eventos hasta el que resolvió la sesión (inclusive)
+    limite = np.where(resuelta, resolucion, np.iinfo(np.int64).max)
+    hasta_resolver = np.arange(len(registro.sesion)) <= limite[registro.sesion]
+    presion = (registro.indices >= 0) & hasta_resolver
+    presiones = np.bincount(registro.sesion[presion & ~registro.automaticas],
+                            minlength=registro.cantidad)
+    asistidas = np.bincount(registro.sesion[presion & registro.automaticas],
+                            minlength=registro.cantidad) > 0
+
+    tiempo = np.full(registro.cantidad, np.nan)
+    tiempo[resolucion == -1] = 0.0
+    con_evento = resolucion >= 0
+    tiempo[con_evento] = registro.tiempos_ms[resolucion[con_evento]] / 1000.0
+
+    optimas = np.full(registro.cantidad, -1, dtype=np.int64)
+    for n in np.unique(registro.n).tolist():
+        if n <= TAMANO_MAXIMO_OPTIMO:
+            grupo = np.flatnonzero(registro.n == n)
+            optimas[grupo] = presiones_optimas(n, [registro.tableros[k] for k in grupo.tolist()])
+
+    return ResumenSesiones(registro.n, presiones, asistidas, optimas, resuelta, tiempo)
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+def _simular(ruta: str, sesiones: int, semilla: int = 0):
+    """Graba sesiones sintéticas: jugadores que resuelven con presiones de más."""
+    import random
+
+    from operador_implicito import bits_a_vector
+
+    rng = random.Random(semilla)
+    with GrabadorSesiones(ruta) as grabador:
+        for _ in range(sesiones):
+            n = rng.choice((3, 4, 5, 7, 10))
+            N = n * n
+            tablero = producto_A(rng.getrandbits(N), n)
+            grabador.iniciar(n, tablero)
+            solucion = factorizacion(n).resolver(tablero) if n * n <= 64 else None
+            if solucion is None:
+                for _ in range(rng.randint(1, 30)):
+                    grabador.presion(rng.randrange(N))
+                continue
+            presiones = [k for k, bit in enumerate(bits_a_vector(solucion, N)) if bit]
+            extra = rng.randrange(N)
+            for k in [extra] + presiones + [extra]:
+                grabador.presion(k)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Estadísticas de sesiones grabadas de Lights Out")
+    parser.add_argument("registros", nargs="*", help="Archivos de registro (sin archivos: demostración)")
+    argumentos = parser.parse_args()
+
+    print("=" * 60)
+    print("LIGHTS OUT - GRABACIÓN Y ANÁLISIS DE SESIONES")
+    print("=" * 60)
+    print()
+
+    rutas = argumentos.registros
+    temporal = None
+    if not rutas:
+        temporal = tempfile.NamedTemporaryFile(suffix=".lor", delete=False)
+        temporal.close()
+        inicio = time.perf_counter()
+        _simular(temporal.name, 20000)
+        print(f"20000 sesiones simuladas en {time.perf_counter() - inicio:.2f} s "
+              f"({os.path.getsize(temporal.name) / 1024:.0f} KB)")
+        rutas = [temporal.name]
+
+    # Un varint cortado al final no debe arrastrar a las sesiones agregadas después
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "cortado.lor")
+        _simular(ruta, 50, semilla=1)
+        with open(ruta, "ab") as archivo:
+            archivo.write(b"\x80" * 3)
+        _simular(ruta, 50, semilla=2)
+        leidas = leer_registro(ruta).cantidad
+        print(f"Reapertura tras un varint cortado: {leidas} de 100 sesiones "
+              f"{'(OK)' if leidas == 100 else '(ERROR)'}")
+
+        # Ni una cabecera cortada justo después de su 0
+        with open(ruta, "ab") as archivo:
+            archivo.write(b"\x00")
+        _simular(ruta, 50, semilla=3)
+        leidas = leer_registro(ruta).cantidad
+        print(f"Reapertura tras una cabecera cortada: {leidas} de 150 sesiones "
+              f"{'(OK)' if leidas == 150 else '(ERROR)'}\n")
+
+    try:
+        inicio = time.perf_counter()
+        registro = leer_registro(*rutas)
+        resumen = analizar_sesiones(registro)
+        print(f"{registro.cantidad} sesiones y {len(registro.sesion)} eventos analizados "
+              f"en {time.perf_counter() - inicio:.2f} s\n")
+
+        for n in np.unique(resumen.n).tolist():
+            grupo = resumen.n == n
+            resueltas = grupo & resumen.resuelta
+            linea = f"{n}×{n}: {int(grupo.sum())} sesiones, {int(resueltas.sum())} resueltas"
+            comparables = resueltas & ~resumen.asistidas & (resumen.optimas > 0)
+            if comparables.any():
+                exceso = resumen.presiones[comparables] / resumen.optimas[comparables]
+                linea += f", presiones/óptimo = {exceso.mean():.2f}"
+            if resueltas.any():
+                linea += f", tiempo mediano = {np.median(resumen.tiempo_resolucion[resueltas]):.2f} s"
+            print(linea)
+    finally:
+        if temporal is not None:
+            os.remove(temporal.name)
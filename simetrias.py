@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - SIMETRÍAS DEL TABLERO
+Forma canónica de un tablero bajo las 8 simetrías del cuadrado
+
+El tablero n×n tiene las simetrías del grupo diedral (4 rotaciones y 4
+reflexiones) y la matriz A las respeta: si T es una simetría,
+A·T(x) = T(A·x). Por eso la solución de T(b) es T(solución de b), y basta
+guardar una solución por clase de tableros equivalentes.
+
+El representante canónico es la imagen con menor valor empaquetado
+(bit i·n + j = luz (i, j)). Para n² ≤ 64 las simetrías se aplican con
+tablas de 256 entradas por byte (también sobre arreglos de NumPy); para
+tableros más grandes se desempaqueta y se reordena con NumPy.
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+TRANSFORMACIONES = ("identidad", "rotacion_90", "rotacion_180", "rotacion_270",
+                    "espejo_horizontal", "espejo_vertical", "traspuesta", "antitraspuesta")
+INVERSAS = (0, 3, 2, 1, 4, 5, 6, 7)  # INVERSAS[t] deshace la transformación t
+
+_CACHE_DESTINOS: Dict[int, np.ndarray] = {}
+_CACHE_TABLAS: Dict[int, np.ndarray] = {}
+
+
+def _destino(n: int, t: int, i: int, j: int) -> Tuple[int, int]:
+    """Posición a la que la transformación t lleva la luz (i, j)."""
+    u = n - 1
+    return ((i, j), (j, u - i), (u - i, u - j), (u - j, i),
+            (i, u - j), (u - i, j), (j, i), (u - j, u - i))[t]
+
+
+def destinos(n: int) -> np.ndarray:
+    """Arreglo (8, n²): destinos[t, k] = índice al que t lleva el bit k."""
+    if n not in _CACHE_DESTINOS:
+        tabla = np.zeros((8, n * n), dtype=np.int64)
+        for t in range(8):
+            for i in range(n):
+                for j in range(n):
+                    di, dj = _destino(n, t, i, j)
+                    tabla[t, i * n + j] = di * n + dj
+        _CACHE_DESTINOS[n] = tabla
+    return _CACHE_DESTINOS[n]
+
+
+def _tablas_bytes(n: int) -> np.ndarray:
+    """
+    Tablas (8, bytes, 256) uint64 para n² ≤ 64.
+
+    tabla[t, c, v] = imagen por t de los bits v ubicados en el byte c, de
+    modo que T(x) es el OR de tabla[t, c, byte c de x] sobre los bytes.
+    """
+    if n not in _CACHE_TABLAS:
+        N = n * n
+        bytes_tablero = (N + 7) // 8
+        tabla = np.zeros((8, bytes_tablero, 256), dtype=np.uint64)
+        destino = destinos(n)
+        valores = np.arange(256)
+        for t in range(8):
+            for c in range(bytes_tablero):
+                for b in range(8):
+                    k = 8 * c + b
+                    if k < N:
+                        encendido = (valores >> b) & 1 == 1
+                        tabla[t, c, encendido] |= np.uint64(1 << int(destino[t, k]))
+        _CACHE_TABLAS[n] = tabla
+    return _CACHE_TABLAS[n]
+
+
+# ===================================================================
+# TABLEROS EMPAQUETADOS EN ENTEROS
+# ===================================================================
+
+def transformar(bits: int, n: int, t: int) -> int:
+    """Aplica la simetría t al tablero (o vector de presiones) empaquetado."""
+    if t == 0:
+        return bits
+    N = n * n
+    if N <= 64:
+        tabla = _tablas_bytes(n)[t]
+        resultado = 0
+        for c in range(tabla.shape[0]):
+            resultado |= int(tabla[c, (bits >> (8 * c)) & 255])
+        return resultado
+    origen = np.frombuffer(bits.to_bytes((N + 7) // 8, "little"), dtype=np.uint8)
+    luces = np.unpackbits(origen, count=N, bitorder="little")
+    imagen = np.zeros(N, dtype=np.uint8)
+    imagen[destinos(n)[t]] = luces
+    return int.from_bytes(np.packbits(imagen, bitorder="little").tobytes(), "little")
+
+
+def canonizar(bits: int, n: int) -> Tuple[int, int]:
+    """
+    Representante canónico del tablero empaquetado.
+
+    Retorna:
+    --------
+    Tuple[int, int]
+        (representante, t) con representante = transformar(bits, n, t)
+    """
+    mejor, mejor_t = bits, 0
+    for t in range(1, 8):
+        imagen = transformar(bits, n, t)
+        if imagen < mejor:
+            mejor, mejor_t = imagen, t
+    return mejor, mejor_t
+
+
+def descanonizar(bits: int, n: int, t: int) -> int:
+    """
+    Deshace la transformación t (la que devolvió canonizar).
+
+    Sirve tanto para el tablero como para su solución: si x resuelve el
+    representante, descanonizar(x, n, t) resuelve el tablero original.
+    """
+    return transformar(bits, n, INVERSAS[t])
+
+
+# ===================================================================
+# ARREGLOS DE NUMPY
+# ===================================================================
+
+def transformar_lote(claves: np.ndarray, n: int, t: int) -> np.ndarray:
+    """Aplica la simetría t a un arreglo de tableros empaquetados (uint32/uint64, n² ≤ 64)."""
+    if n * n > 64:
+        raise ValueError("transformar_lote requiere n² ≤ 64; use canonizar_arreglo")
+    claves = np.asarray(claves)
+    if t == 0:
+        return claves.copy()
+    tabla = _tablas_bytes(n)[t]
+    claves64 = claves.astype(np.uint64)
+    resultado = np.zeros_like(claves64)
+    for c in range(tabla.shape[0]):
+        resultado |= tabla[c][(claves64 >> np.uint64(8 * c)) & np.uint64(255)]
+    return resultado.astype(claves.dtype)
+
+
+def canonizar_lote(claves: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Versión vectorizada de canonizar para tableros empaquetados con n² ≤ 64.
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        (representantes, transformación usada por cada tablero, uint8)
+    """
+    claves = np.asarray(claves)
+    mejores = claves.copy()
+    transformaciones = np.zeros(claves.shape, dtype=np.uint8)
+    for t in range(1, 8):
+        imagenes = transformar_lote(claves, n, t)
+        mejora = imagenes < mejores
+        mejores[mejora] = imagenes[mejora]
+        transformaciones[mejora] = t
+    return mejores, transformaciones
+
+
+def descanonizar_lote(claves: np.ndarray, n: int, transformaciones: np.ndarray) -> np.ndarray:
+    """Deshace, elemento por elemento, las transformaciones devueltas por canonizar_lote."""
+    claves = np.asarray(claves)
+    resultado = claves.copy()
+    for t in range(1, 8):
+        seleccion = transformaciones == t
+        if seleccion.any():
+            resultado[seleccion] = transformar_lote(claves[seleccion], n, INVERSAS[t])
+    return resultado
+
+
+def canonizar_arreglo(tableros: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forma canónica de tableros (k, n, n) de cualquier tamaño.
+
+    Usa el mismo orden que canonizar (valor empaquetado), comparando los
+    bytes empaquetados desde el más significativo.
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        (tableros canónicos (k, n, n) uint8, transformación de cada uno)
+    """
+    tableros = np.asarray(tableros, dtype=np.uint8)
+    k, n = tableros.shape[0], tableros.shape[1]
+    planos = tableros.reshape(k, n * n)
+    destino = destinos(n)
+
+    mejores = planos.copy()
+    claves_mejores = np.packbits(mejores, axis=1, bitorder="little")[:, ::-1]
+    transformaciones = np.zeros(k, dtype=np.uint8)
+    filas = np.arange(k)
+    for t in range(1, 8):
+        imagenes = np.empty_like(planos)
+        imagenes[:, destino[t]] = planos
+        claves = np.packbits(imagenes, axis=1, bitorder="little")[:, ::-1]
+        # Primer byte distinto: decide cuál es menor
+        distintos = claves != claves_mejores
+        primero = distintos.argmax(axis=1)
+        mejora = distintos.any(axis=1) & (claves[filas, primero] < claves_mejores[filas, primero])
+        mejores[mejora] = imagenes[mejora]
+        claves_mejores[mejora] = claves[mejora]
+        transformaciones[mejora] = t
+    return mejores.reshape(k, n, n), transformaciones
+
+
+def transformar_arreglo(planos: np.ndarray, n: int, transformaciones: np.ndarray) -> np.ndarray:
+    """
+    Aplica a cada fila de planos (k, n²) su propia simetría.
+
+    Con las transformaciones de canonizar_arreglo lleva las soluciones de
+    los tableros originales a soluciones de sus representantes.
+    """
+    planos = np.asarray(planos)
+    resultado = planos.copy()
+    destino = destinos(n)
+    for t in range(1, 8):
+        seleccion = transformaciones == t
+        if seleccion.any():
+            imagenes = np.empty_like(planos[seleccion])
+            imagenes[:, destino[t]] = planos[seleccion]
+            resultado[seleccion] = imagenes
+    return resultado
+
+
+def clases_de_equivalencia(n: int) -> int:
+    """Cantidad de tableros n×n distintos salvo simetría (lema de Burnside)."""
+    destino = destinos(n)
+    total = 0
+    for t in range(8):
+        # Los tableros fijos por t son 2^(ciclos de la permutación)
+        visitados = np.zeros(n * n, dtype=bool)
+        ciclos = 0
+        for k in range(n * n):
+            if not visitados[k]:
+                ciclos += 1
+                while not visitados[k]:
+                    visitados[k] = True
+                    k = int(destino[t, k])
+        total += 1 << ciclos
+    return total // 8
+
+
+# =====================================================================
+# EJEMPLO DE EJECUCIÓN
+# =====================================================================
+
+if __name__ == "__main__":
+    import random
+
+    from operador_implicito import producto_A
+
+    print("=" * 60)
+    print("LIGHTS OUT - SIMETRÍAS DEL TABLERO")
+    print("=" * 60)
+    print()
+
+    for n in range(1, 7):
+        print(f"{n}×{n}: {1 << (n * n)} tableros, {clases_de_equivalencia(n)} clases de equivalencia")
+
+    # A conmuta con todas las simetrías: T(A·x) = A·T(x)
+    rng = random.Random(0)
+    conmutan = all(transformar(producto_A(x, n), n, t) == producto_A(transformar(x, n, t), n)
+                   for n in (3, 5, 9, 12) for t in range(8)
+                   for x in (rng.getrandbits(n * n) for _ in range(20)))
+    print(f"\nA·T(x) = T(A·x) para las 8 simetrías: {'SÍ' if conmutan else 'NO'}")
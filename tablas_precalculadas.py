@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - TABLAS DE SOLUCIONES PRECALCULADAS
+Tablas completas para tamaños pequeños (n ≤ 5)
+
+Para n ≤ 5 hay a lo sumo 2²⁵ tableros, así que se puede guardar la solución
+mínima de TODOS en un archivo (.npy mapeado en memoria, uint32 por tablero):
+- Posición = tablero empaquetado (bit i·n + j = luz (i, j))
+- Valor = presiones mínimas empaquetadas, o NO_RESOLUBLE
+
+Formato canónico (opcional, hasta 8 veces más chico): solo se guardan los
+tableros que son su propio representante bajo las simetrías del cuadrado
+(simetrias.py), como pares (tablero, solución) ordenados por tablero. La
+consulta canoniza, busca por bisección y transforma la solución de vuelta.
+
+Construcción (sin eliminar tablero por tablero):
+- La solución P·b es lineal en b, así que la tabla se llena "duplicando":
+  T[2^k + r] = T[r] ⊕ P·e_k (lo mismo para el síndrome H·b)
+- Para minimizar se prueban todas las combinaciones del núcleo
+- El rango de tableros se reparte en bloques entre varios procesos
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import multiprocessing
+import os
+import sys
+from typing import List, Optional
+
+import numpy as np
+
+from motor_vectorizado import factorizacion, minimizar_con_nucleo, tabla_lineal
+from operador_implicito import bits_a_vector, empaquetar_tablero
+from simetrias import canonizar, canonizar_lote, descanonizar, descanonizar_lote
+
+NO_RESOLUBLE = np.uint32(0xFFFFFFFF)
+TAMANO_MAXIMO = 5
+_BITS_BLOQUE = 20
+_MARCA_CANONICA = np.uint32(0x43414E4F)  # Cabecera (n, marca) de las tablas canónicas
+
+
+def _columnas(filas: List[int], N: int) -> List[int]:
+    """Columnas empaquetadas de una matriz dada por filas empaquetadas."""
+    columnas = []
+    for k in range(N):
+        columna = 0
+        for r, fila in enumerate(filas):
+            if (fila >> k) & 1:
+                columna |= 1 << r
+        columnas.append(columna)
+    return columnas
+
+
+def _calcular_bloque(argumentos):
+    """
+    Calcula las soluciones mínimas de los tableros [inicio, inicio + 2^bits).
+
+    En la tabla completa las escribe en el archivo; en la canónica retorna
+    los pares (tablero, solución) de los representantes del bloque.
+    """
+    ruta, inicio, bits, columnas_x, columnas_s, nucleo, n = argumentos
+
+    alto_x = 0
+    alto_s = 0
+    for k in range(bits, len(columnas_x)):
+        if (inicio >> k) & 1:
+            alto_x ^= columnas_x[k]
+            alto_s ^= columnas_s[k]
+
+    soluciones = tabla_lineal(columnas_x, bits, np.uint32) ^ np.uint32(alto_x)
+    sindromes = tabla_lineal(columnas_s, bits, np.uint32) ^ np.uint32(alto_s)
+
+    # Solución mínima: probar las 2^nulidad combinaciones del núcleo
+    mejores, _ = minimizar_con_nucleo(soluciones, nucleo)
+    mejores[sindromes != 0] = NO_RESOLUBLE
+    if ruta is None:
+        claves = np.arange(inicio, inicio + (1 << bits), dtype=np.uint32)
+        representantes, _ = canonizar_lote(claves, n)
+        propios = representantes == claves
+        return claves[propios], mejores[propios]
+
+    tabla = np.load(ruta, mmap_mode="r+")
+    tabla[inicio:inicio + (1 << bits)] = mejores
+    tabla.flush()
+    return inicio
+
+
+def construir_tabla(n: int, ruta: str, procesos: Optional[int] = None, canonica: bool = False):
+    """
+    Construye la tabla completa de soluciones mínimas para tableros n×n.
+
+    Parámetros:
+    -----------
+    n : int
+        Tamaño del tablero (1 ≤ n ≤ 5)
+    ruta : str
+        Archivo .npy de destino
+    procesos : Optional[int]
+        Procesos a usar (por defecto, todos los núcleos)
+    canonica : bool
+        Guardar solo un tablero por clase de simetría (pares ordenados)
+    """
+    if not 1 <= n <= TAMANO_MAXIMO:
+        raise ValueError(f"Las tablas completas solo son viables para 1 ≤ n ≤ {TAMANO_MAXIMO}")
+
+    N = n * n
+    f = factorizacion(n)
+    columnas_x = _columnas(f.filas_inversa, N)
+    columnas_s = _columnas(f.controles, N)
+
+    if not canonica:
+        tabla = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.uint32, shape=(1 << N,))
+        del tabla
+
+    bits = min(N, _BITS_BLOQUE)
+    tareas = [(None if canonica else ruta, inicio, bits, columnas_x, columnas_s, f.nucleo, n)
+              for inicio in range(0, 1 << N, 1 << bits)]
+    if len(tareas) > 1 and procesos != 1:
+        with multiprocessing.Pool(procesos) as pool:
+            resultados = pool.map(_calcular_bloque, tareas)
+    else:
+        resultados = [_calcular_bloque(tarea) for tarea in tareas]
+
+    if canonica:
+        # Los bloques llegan en orden, así que los tableros ya quedan ordenados
+        pares = np.empty((1 + sum(len(claves) for claves, _ in resultados), 2), dtype=np.uint32)
+        pares[0] = (n, _MARCA_CANONICA)
+        fila = 1
+        for claves, soluciones in resultados:
+            pares[fila:fila + len(claves), 0] = claves
+            pares[fila:fila + len(claves), 1] = soluciones
+            fila += len(claves)
+        np.save(ruta, pares)
+
+
+class TablaSoluciones:
+    """
+    Tabla precalculada abierta en modo solo lectura (mapeada en memoria).
+
+    En la tabla completa, resolver un tablero es una única lectura en el
+    arreglo; en la canónica, una canonización y una bisección.
+    """
+
+    def __init__(self, ruta: str):
+        self.tabla = np.load(ruta, mmap_mode="r")
+        self.canonica = self.tabla.ndim == 2
+        if self.canonica:
+            if self.tabla.shape[1] != 2 or self.tabla[0, 1] != _MARCA_CANONICA:
+                raise ValueError(f"{ruta} no es una tabla canónica de tableros n×n")
+            self.n = int(self.tabla[0, 0])
+            self.claves = self.tabla[1:, 0]
+            self.soluciones = self.tabla[1:, 1]
+            return
+        N = self.tabla.shape[0].bit_length() - 1
+        self.n = int(round(N ** 0.5))
+        if self.n * self.n != N or self.tabla.shape[0] != 1 << N:
+            raise ValueError(f"{ruta} no es una tabla completa de tableros n×n")
+
+    def buscar(self, clave: int) -> Optional[int]:
+        """Presiones mínimas empaquetadas del tablero clave, o None si no tiene solución."""
+        if not self.canonica:
+            valor = self.tabla[clave]
+            return None if valor == NO_RESOLUBLE else int(valor)
+        representante, simetria = canonizar(clave, self.n)
+        valor = self.soluciones[np.searchsorted(self.claves, representante)]
+        return None if valor == NO_RESOLUBLE else descanonizar(int(valor), self.n, simetria)
+
+    def resolver(self, matriz: List[List[int]]) -> Optional[List[int]]:
+        """
+        Solución mínima del tablero (mismo formato que resolver_lights_out).
+
+        Retorna None si el tablero no tiene solución.
+        """
+        if len(matriz) != self.n:
+            raise ValueError(f"La tabla es para tableros {self.n}×{self.n}")
+        x = self.buscar(empaquetar_tablero(matriz))
+        return None if x is None else bits_a_vector(x, self.n * self.n)
+
+    def resolver_lote(self, claves: np.ndarray) -> np.ndarray:
+        """Presiones para un arreglo de tableros empaquetados (NO_RESOLUBLE si no hay solución)."""
+        if not self.canonica:
+            return self.tabla[np.asarray(claves, dtype=np.int64)]
+        representantes, simetrias = canonizar_lote(np.asarray(claves, dtype=np.uint32), self.n)
+        valores = np.asarray(self.soluciones[np.searchsorted(self.claves, representantes)])
+        resolubles = valores != NO_RESOLUBLE
+        valores[resolubles] = descanonizar_lote(valores[resolubles], self.n, simetrias[resolubles])
+        return valores
+
+
+# =====================================================================
+# CONSTRUCCIÓN DESDE LÍNEA DE COMANDOS
+# =====================================================================
+
+if __name__ == "__main__":
+    import time
+
+    argumentos = [a for a in sys.argv[1:] if a != "--canonica"]
+    canonica = len(argumentos) != len(sys.argv) - 1
+    if not argumentos:
+        print("Uso: python tablas_precalculadas.py N [archivo.npy] [procesos] [--canonica]")
+        sys.exit(1)
+
+    n = int(argumentos[0])
+    ruta = argumentos[1] if len(argumentos) > 1 else f"tabla_{n}x{n}{'_canonica' if canonica else ''}.npy"
+    procesos = int(argumentos[2]) if len(argumentos) > 2 else None
+
+    inicio = time.perf_counter()
+    construir_tabla(n, ruta, procesos, canonica)
+    print(f"Tabla {n}×{n} construida en {time.perf_counter() - inicio:.2f} s "
+          f"({os.path.getsize(ruta) / 2**20:.1f} MB): {ruta}")
+
+    tabla = TablaSoluciones(ruta)
+    if tabla.canonica:
+        resolubles = int(np.count_nonzero(tabla.soluciones != NO_RESOLUBLE))
+        print(f"Clases de simetría resolubles: {resolubles} de {len(tabla.claves)}")
+    else:
+        resolubles = int(np.count_nonzero(tabla.tabla != NO_RESOLUBLE))
+        print(f"Tableros resolubles: {resolubles} de {tabla.tabla.shape[0]}")
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+LIGHTS OUT - VERIFICACIÓN CRUZADA DE MOTORES
+Pruebas aleatorias que comparan todos los resolvedores entre sí
+
+Para tableros de muchos tamaños (y grafos de varias topologías) se generan
+casos al azar y se comprueba que todos los motores:
+- coincidan en si el tablero tiene solución
+- devuelvan soluciones válidas (A·x = b)
+
+Motores comparados:
+- gauss_mod2 (listas, la referencia de la consigna)
+- Factorización con filas empaquetadas en enteros (motor_vectorizado)
+- Resolución por lotes con NumPy (resolver_lote + verificar_solucion_batch)
+- Persecución de luces con polinomios de Chebyshev (resolver_polinomial)
+- Wiedemann por bloques (resolver_wiedemann), también sobre grafos (entre
+  ellos un toro 40×40 y 300 componentes K4, con más factores invariantes
+  repetidos que los 64 carriles del bloque)
+- BFS bidireccional (busqueda_bfs) en grafos chicos
+
+Además hay controles de tiempo: fallan si un motor rápido no alcanza la
+aceleración mínima respecto de gauss_mod2.
+
+Uso: python verificacion_cruzada.py [--semilla S] [--rondas R] [--sin-tiempos]
+(termina con código 1 si hay alguna discrepancia)
+
+Autor: Cristian Baumann
+Fecha: Noviembre 2024
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from busqueda_bfs import ReglasLightsOut, busqueda_bidireccional
+from eliminacion_reanudable import resolver_sistema_reanudable
+from motor_vectorizado import factorizacion, resolver_lote, verificar_solucion_batch
+from operador_implicito import empaquetar_tablero, producto_A, verificar_solucion_implicita
+from resolver_lights_out import gauss_mod2, resolver_lights_out
+from resolver_polinomial import resolver_lights_out_polinomial
+from resolver_wiedemann import OperadorDisperso, resolver_lights_out_wiedemann, resolver_wiedemann
+
+# Aceleración mínima (tiempo de gauss_mod2 / tiempo del motor) por tablero
+ACELERACIONES_MINIMAS = {
+    "empaquetado": 50.0,
+    "numpy_lote": 1000.0,
+    "persecucion": 50.0,
+}
+
+TAMANO_MAXIMO_WIEDEMANN = 16  # Más allá, Wiedemann es lento para una prueba
+
+# Más luces que esto: la referencia en grafos es la eliminación empaquetada
+# (gauss_mod2 con listas es O(N³) en Python)
+MAX_LUCES_GAUSS_LISTAS = 64
+
+
+class Discrepancia(NamedTuple):
+    """Caso en el que un motor no coincide con la referencia."""
+    prueba: str
+    motor: str
+    detalle: str
+
+
+# ===================================================================
+# GENERACIÓN DE CASOS
+# ===================================================================
+
+def generar_tableros(n: int, cantidad: int, rng: random.Random) -> List[List[List[int]]]:
+    """
+    Tableros n×n de distintos tipos, incluidos los casos borde.
+
+    Mezcla tableros uniformes, resolubles por construcción (A·x), casi
+    vacíos, casi llenos y los extremos (todo apagado / todo encendido).
+    """
+    N = n * n
+    tableros = [[[0] * n for _ in range(n)], [[1] * n for _ in range(n)]]
+    while len(tableros) < cantidad:
+        tipo = rng.randrange(4)
+        if tipo == 0:
+            bits = rng.getrandbits(N)
+        elif tipo == 1:
+            bits = producto_A(rng.getrandbits(N), n)
+        elif tipo == 2:
+            bits = sum(1 << rng.randrange(N) for _ in range(rng.randint(1, 3)))
+        else:
+            bits = ((1 << N) - 1) ^ sum(1 << rng.randrange(N) for _ in range(rng.randint(1, 3)))
+        tableros.append([[(bits >> (i * n + j)) & 1 for j in range(n)] for i in range(n)])
+    return tableros[:cantidad]
+
+
+def generar_grafo(num_luces: int, topologia: str, rng: random.Random) -> List[List[int]]:
+    """
+    Vecinos de cada luz (incluida ella misma) para varias topologías.
+
+    topologia: "aleatorio", "toro", "ciclo", "estrella", "denso" o "k4"
+    (num_luces/4 componentes K4 iguales: cientos de factores invariantes
+    repetidos, más de los 64 carriles de Wiedemann)
+    """
+    aristas = []
+    if topologia == "aleatorio":
+        aristas = [(rng.randrange(num_luces), rng.randrange(num_luces)) for _ in range(num_luces)]
+    elif topologia == "toro":
+        lado = int(round(num_luces ** 0.5))
+        for i in range(lado):
+            for j in range(lado):
+                aristas.append((i * lado + j, i * lado + (j + 1) % lado))
+                aristas.append((i * lado + j, ((i + 1) % lado) * lado + j))
+    elif topologia == "ciclo":
+        aristas = [(k, (k + 1) % num_luces) for k in range(num_luces)]
+    elif topologia == "estrella":
+        aristas = [(0, k) for k in range(1, num_luces)]
+    elif topologia == "denso":
+        aristas = [(a, c) for a in range(num_luces) for c in range(a + 1, num_luces) if rng.random() < 0.5]
+    elif topologia == "k4":
+        aristas = [(k + a, k + c) for k in range(0, num_luces - 3, 4) for a in range(4) for c in range(a + 1, 4)]
+    else:
+        raise ValueError(f"Topología desconocida: {topologia}")
+
+    vecinos = [{k} for k in range(num_luces)]
+    for a, c in aristas:
+        if a != c:
+            vecinos[a].add(c)
+            vecinos[c].add(a)
+    return [sorted(fila) for fila in vecinos]
+
+
+# ===================================================================
+# COMPARACIÓN EN TABLEROS CUADRADOS
+# ===================================================================
+
+def _referencia_gauss(matriz: List[List[int]]) -> Optional[List[int]]:
+    """gauss_mod2 deja las variables libres en 0; si el resultado no verifica, no hay solución."""
+    x = resolver_lights_out(matriz)
+    return x if verificar_solucion_implicita(matriz, x) else None
+
+
+def _motor_empaquetado(matriz: List[List[int]]) -> Optional[List[int]]:
+    n = len(matriz)
+    x = factorizacion(n).resolver(empaquetar_tablero(matriz))
+    return None if x is None else [(x >> k) & 1 for k in range(n * n)]
+
+
+MOTORES: Dict[str, Callable[[List[List[int]]], Optional[List[int]]]] = {
+    "empaquetado": _motor_empaquetado,
+    "persecucion": resolver_lights_out_polinomial,
+    "wiedemann": resolver_lights_out_wiedemann,
+}
+
+
+def comprobar_tableros(n: int, tableros: List[List[List[int]]]) -> List[Discrepancia]:
+    """Compara todos los motores contra gauss_mod2 en tableros n×n."""
+    prueba = f"{n}x{n}"
+    discrepancias = []
+    referencia = [_referencia_gauss(t) for t in tableros]
+    resolubles = np.array([x is not None for x in referencia])
+
+    # Control de la referencia: debe coincidir con los controles de paridad H·b = 0
+    f = factorizacion(n)
+    if any(resolubles != [f.es_resoluble(empaquetar_tablero(t)) for t in tableros]):
+        discrepancias.append(Discrepancia(prueba, "gauss_mod2", "resolubilidad distinta a H·b = 0"))
+
+    for nombre, motor in MOTORES.items():
+        if nombre == "wiedemann" and n > TAMANO_MAXIMO_WIEDEMANN:
+            continue
+        for t, esperado in zip(tableros, referencia):
+            x = motor(t)
+            if (x is None) != (esperado is None):
+                discrepancias.append(Discrepancia(prueba, nombre, f"resolubilidad distinta en {t}"))
+            elif x is not None and not verificar_solucion_implicita(t, x):
+                discrepancias.append(Discrepancia(prueba, nombre, f"solución inválida en {t}"))
+
+    # Motor por lotes: todo el arreglo de una vez, verificado también por lotes
+    arreglo = np.array(tableros, dtype=np.uint8)
+    soluciones, resolubles_lote = resolver_lote(arreglo)
+    if (resolubles_lote != resolubles).any():
+        discrepancias.append(Discrepancia(prueba, "numpy_lote", "resolubilidad distinta"))
+    correctas, _ = verificar_solucion_batch(arreglo[resolubles_lote], soluciones[resolubles_lote])
+    if not correctas.all():
+        discrepancias.append(Discrepancia(prueba, "numpy_lote", f"{int((~correctas).sum())} soluciones inválidas"))
+
+    # La verificación por lotes debe coincidir con la verificación uno a uno
+    x_referencia = np.array([x if x is not None else [0] * (n * n) for x in referencia], dtype=np.uint8)
+    correctas, residuos = verificar_solucion_batch(arreglo, x_referencia.reshape(arreglo.shape))
+    if (correctas != resolubles).any() or not residuos.reshape(len(residuos), n * n).any(axis=1).all():
+        discrepancias.append(Discrepancia(prueba, "verificar_solucion_batch", "no coincide con la verificación uno a uno"))
+    return discrepancias
+
+
+# ===================================================================
+# COMPARACIÓN EN GRAFOS
+# ===================================================================
+
+def comprobar_grafo(vecinos: List[List[int]], tableros: Iterable[List[int]], prueba: str) -> List[Discrepancia]:
+    """
+    Compara la eliminación densa, Wiedemann y, si es chico, BFS en un grafo.
+
+    La referencia es gauss_mod2 hasta MAX_LUCES_GAUSS_LISTAS luces y la
+    eliminación empaquetada de eliminacion_reanudable en grafos más grandes.
+    """
+    N = len(vecinos)
+    A = np.zeros((N, N), dtype=np.uint8)
+    for i, fila in enumerate(vecinos):
+        A[i, fila] = 1
+    operador = OperadorDisperso(vecinos)
+    lado = int(round(N ** 0.5))
+    reglas = None
+    if lado * lado == N and N <= 16:
+        mascaras = [sum(1 << i for i in range(N) if A[i, j]) for j in range(N)]
+        reglas = ReglasLightsOut(lado, mascaras=mascaras)
+
+    def valida(x: List[int], b: List[int]) -> bool:
+        return bool(np.array_equal(A.astype(np.int64) @ np.array(x, dtype=np.int64) % 2, b))
+
+    discrepancias = []
+    for b in tableros:
+        if N <= MAX_LUCES_GAUSS_LISTAS:
+            resoluble = valida(gauss_mod2(A.tolist(), b), b)
+        else:
+            resoluble = resolver_sistema_reanudable(A, np.array(b, dtype=np.uint8)) is not None
+        x = resolver_wiedemann(operador, b, semilla=0)
+        if (x is not None) != resoluble:
+            discrepancias.append(Discrepancia(prueba, "wiedemann", f"resolubilidad distinta en b = {b}"))
+        elif x is not None and not valida(x, b):
+            discrepancias.append(Discrepancia(prueba, "wiedemann", f"solución inválida en b = {b}"))
+
+        if reglas is not None:
+            camino = busqueda_bidireccional(sum(bit << k for k, bit in enumerate(b)), reglas)
+            if (camino is not None) != resoluble:
+                discrepancias.append(Discrepancia(prueba, "bfs", f"alcanzabilidad distinta en b = {b}"))
+            elif camino is not None:
+                x = [0] * N
+                for celda in camino:
+                    x[celda] ^= 1
+                if not valida(x, b):
+                    discrepancias.append(Discrepancia(prueba, "bfs", f"camino inválido en b = {b}"))
+    return discrepancias
+
+
+# ===================================================================
+# CONTROLES DE TIEMPO
+# ===================================================================
+
+def _tiempo_por_tablero(funcion: Callable[[], object], cantidad: int, repeticiones: int = 3) -> float:
+    """Mejor tiempo (de varias repeticiones) dividido por la cantidad de tableros."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / cantidad
+
+
+def comprobar_tiempos(n: int = 12, cantidad: int = 40, semilla: int = 0) -> List[Discrepancia]:
+    """
+    Mide cada motor rápido contra gauss_mod2 en tableros n×n.
+
+    Falla si la aceleración queda por debajo de ACELERACIONES_MINIMAS.
+    """
+    rng = random.Random(semilla)
+    tableros = generar_tableros(n, cantidad, rng)
+    arreglo = np.array(tableros, dtype=np.uint8)
+    factorizacion(n).matrices()  # La factorización se calcula una vez por tamaño
+
+    base = _tiempo_por_tablero(lambda: [resolver_lights_out(t) for t in tableros], cantidad, 1)
+    tiempos = {
+        "empaquetado": _tiempo_por_tablero(lambda: [_motor_empaquetado(t) for t in tableros], cantidad),
+        "numpy_lote": _tiempo_por_tablero(lambda: resolver_lote(arreglo), cantidad),
+        "persecucion": _tiempo_por_tablero(lambda: [resolver_lights_out_polinomial(t) for t in tableros], cantidad),
+    }
+
+    discrepancias = []
+    for nombre, tiempo in tiempos.items():
+        aceleracion = base / tiempo
+        print(f"   {nombre:12s} {tiempo * 1e6:9.1f} µs/tablero  (×{aceleracion:.0f} sobre gauss_mod2)")
+        if aceleracion < ACELERACIONES_MINIMAS[nombre]:
+            discrepancias.append(Discrepancia(
+                f"tiempos {n}x{n}", nombre,
+                f"aceleración ×{aceleracion:.1f} menor que la mínima ×{ACELERACIONES_MINIMAS[nombre]:g}"))
+    return discrepancias
+
+
+# ===================================================================
+# EJECUCIÓN COMPLETA
+# ===================================================================
+
+def ejecutar_verificacion(semilla: int = 0, rondas: int = 1, tamanos: Iterable[int] = range(1, 17),
+                          tiempos: bool = True) -> List[Discrepancia]:
+    """
+    Corre todas las comprobaciones y retorna las discrepancias encontradas.
+
+    Parámetros:
+    -----------
+    semilla : int
+        Semilla de los casos aleatorios (para reproducir una falla)
+    rondas : int
+        Repeticiones con semillas consecutivas
+    tamanos : Iterable[int]
+        Tamaños de tablero a comparar
+    tiempos : bool
+        Si se incluyen los controles de tiempo
+    """
+    discrepancias = []
+    tamanos = list(tamanos)
+    for ronda in range(rondas):
+        rng = random.Random(semilla + ronda)
+        for n in tamanos:
+            encontradas = comprobar_tableros(n, generar_tableros(n, 24, rng))
+            print(f"Tableros {n}×{n}: {'OK' if not encontradas else f'{len(encontradas)} ERRORES'}")
+            discrepancias += encontradas
+
+        for topologia, num_luces in (("aleatorio", 9), ("aleatorio", 40), ("toro", 16), ("toro", 36),
+                                     ("toro", 1600), ("ciclo", 15), ("estrella", 12), ("denso", 16),
+                                     ("k4", 1200)):
+            vecinos = generar_grafo(num_luces, topologia, rng)
+            # Mitad al azar y mitad alcanzables (b = A·x): en grafos con núcleo
+            # grande un b al azar casi nunca tiene solución
+            tableros = [[rng.randint(0, 1) for _ in range(num_luces)] for _ in range(4)]
+            for _ in range(4):
+                x = [rng.randint(0, 1) for _ in range(num_luces)]
+                tableros.append([sum(x[j] for j in fila) % 2 for fila in vecinos])
+            encontradas = comprobar_grafo(vecinos, tableros, f"{topologia} ({num_luces} luces)")
+            print(f"Grafo {topologia} de {num_luces} luces: {'OK' if not encontradas else f'{len(encontradas)} ERRORES'}")
+            discrepancias += encontradas
+
+    if tiempos:
+        print("Controles de tiempo:")
+        discrepancias += comprobar_tiempos(semilla=semilla)
+    return discrepancias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación cruzada de los motores de Lights Out")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--rondas", type=int, default=1)
+    parser.add_argument("--sin-tiempos", action="store_true", help="omitir los controles de tiempo")
+    argumentos = parser.parse_args()
+
+    print("=" * 60)
+    print("LIGHTS OUT - VERIFICACIÓN CRUZADA DE MOTORES")
+    print("=" * 60)
+    print()
+
+    discrepancias = ejecutar_verificacion(argumentos.semilla, argumentos.rondas,
+                                          tiempos=not argumentos.sin_tiempos)
+    print()
+    for d in discrepancias[:20]:
+        print(f"[{d.prueba}] {d.motor}: {d.detalle}")
+    print(f"RESULTADO: {'ÉXITO' if not discrepancias else f'{len(discrepancias)} DISCREPANCIAS'}")
+    sys.exit(1 if discrepancias else 0)